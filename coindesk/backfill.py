@@ -0,0 +1,328 @@
+# encoding: utf-8
+
+import asyncio
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from logging import getLogger
+from multiprocessing.util import Finalize
+from os.path import exists, join
+
+from . import settings
+from .client import CoindeskAPIHttpRequest
+from .decorators import async_event_loop
+from .exceptions import CoindeskAPIClientError
+from .registry import currency_registry
+from .scheduler import PriorityScheduler
+from .specs import RequestSpec
+from .transport import BaseTransport, HttpTransport
+
+# Custom logger for backfill module
+logger = getLogger(__name__)
+
+# Historical closes for one index and currency over an inclusive date range
+WorkUnit = namedtuple('WorkUnit', ['index', 'currency', 'start', 'end'])
+
+
+def plan_work_units(currencies: list = None, indexes: list = None, start: str = None,
+                    end: str = None, chunk_days: int = None):
+    """
+    Split (index, currency, date range) space into backfill work units.
+
+    :param list currencies: currency codes, all supported currencies if None.
+    :param list indexes: price indexes, all valid indexes if None.
+    :param str start: first date YYYY-MM-DD, Coindesk BPI start if None.
+    :param str end: last date YYYY-MM-DD, yesterday if None.
+    :param int chunk_days: days per work unit.
+    :return list: WorkUnit instances.
+    """
+    currencies = currencies or sorted(currency_registry.codes)
+    indexes = indexes or settings.VALID_INDEX
+    first = date.fromisoformat(start or settings.BACKFILL_START_DATE)
+    last = date.fromisoformat(end) if end else date.today() - timedelta(days=1)
+    chunk_days = chunk_days or settings.BACKFILL_CHUNK_DAYS
+    if first > last or chunk_days < 1:
+        msg = f'Unvalid backfill range {first} to {last} in {chunk_days} day chunks.'
+        logger.error(f'[BackfillRunner] Plan error. {msg}')
+        raise CoindeskAPIClientError(msg)
+    units = []
+    for index in indexes:
+        for currency in currencies:
+            chunk_start = first
+            while chunk_start <= last:
+                chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), last)
+                units.append(WorkUnit(index, currency, chunk_start.isoformat(), chunk_end.isoformat()))
+                chunk_start = chunk_end + timedelta(days=1)
+    return units
+
+
+# Per worker process event loop, session and request settings
+_worker = {}
+
+
+def _init_worker(transport: BaseTransport, retries: int, timeout: int):
+    """
+    Open worker process event loop and async session reused for every unit.
+
+    :param obj transport: transport performing http requests.
+    :param int retries: number of request attempts before failing.
+    :param int timeout: seconds before request timeout.
+    """
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    context = transport.session()
+    session = loop.run_until_complete(context.__aenter__())
+    request = CoindeskAPIHttpRequest(retries=retries, timeout=timeout, transport=transport)
+    _worker.update(loop=loop, context=context, session=session, request=request)
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    """
+    Close worker process session and event loop.
+    """
+    loop = _worker['loop']
+    loop.run_until_complete(_worker['context'].__aexit__(None, None, None))
+    loop.close()
+
+
+def _fetch_unit(unit: WorkUnit):
+    """
+    Fetch historical closes of a work unit in a worker process.
+
+    :param obj unit: WorkUnit instance.
+    :return tuple: work unit and historical api response data.
+    """
+    spec = RequestSpec(settings.API_HISTORICAL_DATA_TYPE, currency=unit.currency, index=unit.index,
+                       start=unit.start, end=unit.end)
+    request, session = _worker['request'], _worker['session']
+    return unit, _worker['loop'].run_until_complete(request.execute(session, spec))
+
+
+class BackfillProgress(object):
+    """
+    Track backfill throughput and estimated time to completion.
+    """
+
+    def __init__(self, total: int, skipped: int = 0):
+        """
+        Initialize backfill progress.
+
+        :param int total: number of planned work units.
+        :param int skipped: units already completed by a previous run.
+        """
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.days = 0
+        self.started = time.monotonic()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        eta = self.eta
+        eta = f'{eta:.0f}s' if eta is not None else 'unknown'
+        return (f'<{classname} - {self.done + self.skipped}/{self.total} units, '
+                f'{self.failed} failed, {self.throughput:.2f} units/s, eta {eta}>')
+
+    @property
+    def elapsed(self):
+        """
+        Get seconds since backfill started.
+        """
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self):
+        """
+        Get completed units per second in this run.
+        """
+        elapsed = self.elapsed
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def remaining(self):
+        """
+        Get number of units neither completed nor failed.
+        """
+        return self.total - self.skipped - self.done - self.failed
+
+    @property
+    def eta(self):
+        """
+        Get estimated seconds until every remaining unit completes.
+        """
+        throughput = self.throughput
+        return self.remaining / throughput if throughput > 0 else None
+
+
+class BackfillRunner(object):
+    """
+    Run historical backfill work units across a process pool with checkpoints.
+    """
+
+    def __init__(self, output_dir: str, checkpoint: str = None, processes: int = None,
+                 retries: int = 10, timeout: int = 5, transport: BaseTransport = None,
+                 scheduler: PriorityScheduler = None, priority: str = None):
+        """
+        Initialize backfill runner.
+
+        :param str output_dir: directory where unit results are written.
+        :param str checkpoint: checkpoint file path, inside output_dir if None.
+        :param int processes: number of worker processes.
+        :param int retries: number of request attempts before failing.
+        :param int timeout: seconds before request timeout.
+        :param obj transport: transport performing http requests in workers.
+        :param obj scheduler: PriorityScheduler holding a request slot for each unit in flight.
+        :param str priority: priority class of units, settings.BACKFILL_PRIORITY if None.
+        """
+        self._output_dir = output_dir
+        self._checkpoint = checkpoint or join(output_dir, 'backfill.checkpoint')
+        self._processes = processes or settings.BACKFILL_PROCESSES
+        self._retries = retries
+        self._timeout = timeout
+        self._transport = transport if transport is not None else HttpTransport()
+        self._scheduler = scheduler
+        self._priority = priority or settings.BACKFILL_PRIORITY
+        self._last_report = None
+        self.progress = None
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._output_dir} with {self._processes} processes>'
+
+    def completed_units(self):
+        """
+        Get work units recorded in checkpoint file.
+
+        :return set: completed WorkUnit instances.
+        """
+        completed = set()
+        if not exists(self._checkpoint): return completed
+        with open(self._checkpoint) as checkpoint:
+            for line in checkpoint:
+                try:
+                    completed.add(WorkUnit(*json.loads(line)['unit']))
+                except (ValueError, KeyError, TypeError):
+                    # Partial line written by an interrupted run
+                    continue
+        return completed
+
+    def unit_path(self, unit: WorkUnit):
+        """
+        Get result file path of work unit.
+
+        :param obj unit: WorkUnit instance.
+        :return str: unit result file path.
+        """
+        return join(self._output_dir, f'{unit.index}-{unit.currency}-{unit.start}-{unit.end}.json')
+
+    def write_unit(self, unit: WorkUnit, data: dict):
+        """
+        Write work unit result atomically.
+
+        :param obj unit: WorkUnit instance.
+        :param dict data: historical api response data.
+        """
+        path = self.unit_path(unit)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as outfile:
+            json.dump(data, outfile)
+        os.replace(tmp_path, path)
+
+    def _record(self, checkpoint, unit: WorkUnit, days: int):
+        """
+        Append completed unit to checkpoint file.
+        """
+        checkpoint.write(json.dumps({'unit': list(unit), 'days': days}) + '\n')
+        checkpoint.flush()
+        os.fsync(checkpoint.fileno())
+
+    def run(self, units: list = None, **plan):
+        """
+        Fetch every pending work unit and checkpoint each completion.
+        Units already in the checkpoint file are skipped, so an interrupted
+        backfill resumes where it stopped.
+
+        :param list units: WorkUnit instances, planned from plan kwargs if None.
+        :return obj: BackfillProgress with final counts.
+        """
+        units = units if units is not None else plan_work_units(**plan)
+        os.makedirs(self._output_dir, exist_ok=True)
+        completed = self.completed_units()
+        pending = [unit for unit in units if unit not in completed]
+        self.progress = progress = BackfillProgress(len(units), len(units) - len(pending))
+        logger.info('[BackfillRunner] Backfill started. %d units pending, %d skipped.',
+                    len(pending), progress.skipped)
+        self._last_report = time.monotonic()
+        with open(self._checkpoint, 'a') as checkpoint, ProcessPoolExecutor(
+                self._processes, initializer=_init_worker,
+                initargs=(self._transport, self._retries, self._timeout)) as executor:
+            self._fetch_units(executor, checkpoint, deque(pending))
+        logger.info('[BackfillRunner] Backfill finished. %s', progress)
+        return progress
+
+    @async_event_loop
+    async def _fetch_units(self, executor: ProcessPoolExecutor, checkpoint, pending: deque):
+        """
+        Fetch pending units with one feeder per worker process.
+
+        :param obj executor: worker process pool.
+        :param obj checkpoint: checkpoint file opened for appending.
+        :param obj pending: WorkUnit instances not fetched yet.
+        """
+        await asyncio.gather(*(self._feed(executor, checkpoint, pending)
+                               for _ in range(self._processes)))
+
+    async def _feed(self, executor: ProcessPoolExecutor, checkpoint, pending: deque):
+        """
+        Hand pending units to the pool one at a time, writing and checkpointing results.
+        """
+        progress = self.progress
+        while pending:
+            unit = pending.popleft()
+            try:
+                data = await self._submit(executor, unit)
+                self.write_unit(unit, data)
+            except Exception as err:
+                progress.failed += 1
+                logger.error(f'[BackfillRunner] Unit error. {unit}: {err}.')
+                continue
+            progress.done += 1
+            progress.days += len(data.get('bpi', {}))
+            self._record(checkpoint, unit, len(data.get('bpi', {})))
+            if time.monotonic() - self._last_report >= settings.BACKFILL_PROGRESS_INTERVAL:
+                logger.info('[BackfillRunner] Backfill progress. %s', progress)
+                self._last_report = time.monotonic()
+
+    async def _submit(self, executor: ProcessPoolExecutor, unit: WorkUnit):
+        """
+        Fetch unit in a worker process, holding a scheduler slot meanwhile so
+        backfills share the request concurrency limit with in-process requests.
+
+        :param obj executor: worker process pool.
+        :param obj unit: WorkUnit instance.
+        :return dict: historical api response data.
+        """
+        if self._scheduler is None:
+            _, data = await asyncio.wrap_future(executor.submit(_fetch_unit, unit))
+            return data
+        priority = await self._scheduler.acquire(self._priority)
+        try:
+            _, data = await asyncio.wrap_future(executor.submit(_fetch_unit, unit))
+            return data
+        finally:
+            self._scheduler.release(priority)
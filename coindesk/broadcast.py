@@ -0,0 +1,288 @@
+# encoding: utf-8
+
+import asyncio
+from collections import Counter, OrderedDict, deque, namedtuple
+from logging import getLogger
+
+from . import settings
+from .client import CoindeskAPIHttpRequest, CoindeskAPIHttpResponse
+from .exceptions import CoindeskAPIClientError
+from .specs import RequestSpec
+
+# Custom logger for broadcast module
+logger = getLogger(__name__)
+
+# Subscriber queue behaviors for slow consumers
+DROP_OLDEST = 'drop_oldest'
+LATEST_ONLY = 'latest_only'
+BROADCAST_MODES = [DROP_OLDEST, LATEST_ONLY]
+
+# Bitcoin price update in one currency, shared by every subscriber
+PriceUpdate = namedtuple('PriceUpdate', ['currency', 'rate', 'rate_float', 'updatedISO'])
+
+
+class Subscription(object):
+    """
+    Bounded queue of price updates delivered to one subscriber.
+    """
+
+    def __init__(self, broadcaster, currencies: list = None, maxsize: int = None, mode: str = None):
+        """
+        Initialize subscription.
+
+        :param obj broadcaster: PriceBroadcaster instance feeding the subscription.
+        :param list currencies: currency codes received, None for every currency.
+        :param int maxsize: maximum number of pending updates.
+        :param str mode: drop_oldest keeps the newest maxsize updates,
+            latest_only keeps the newest update per currency.
+        """
+        mode = mode or settings.BROADCAST_MODE
+        if mode not in BROADCAST_MODES:
+            msg = f'Invalid subscription mode {mode}. Allowed values: {", ".join(BROADCAST_MODES)}.'
+            logger.error(f'[Subscription] Subscription error. {msg}')
+            raise CoindeskAPIClientError(msg)
+        self._broadcaster = broadcaster
+        self._currencies = frozenset(currencies) if currencies else None
+        self._mode = mode
+        self._maxsize = maxsize or settings.BROADCAST_QUEUE_SIZE
+        self._pending = deque(maxlen=self._maxsize) if mode == DROP_OLDEST else OrderedDict()
+        # Created by the first get(), inside the loop that awaits it
+        self._ready = None
+        self._closed = False
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        currencies = ', '.join(sorted(self._currencies)) if self._currencies else 'all'
+        return f'<{classname} - {currencies} {self._mode} {len(self._pending)} pending>'
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        update = await self.get()
+        if update is None: raise StopAsyncIteration
+        return update
+
+    @property
+    def currencies(self):
+        """
+        Get currency codes received, None for every currency.
+        """
+        return self._currencies
+
+    @property
+    def closed(self):
+        """
+        Check whether subscription was closed.
+        """
+        return self._closed
+
+    def wants(self, currency: str):
+        """
+        Check whether subscription receives updates for currency.
+
+        :param str currency: currency code.
+        :return bool: True if the currency passes the filter.
+        """
+        return self._currencies is None or currency in self._currencies
+
+    def put(self, update: PriceUpdate):
+        """
+        Queue update without blocking, dropping old updates when full.
+
+        :param obj update: PriceUpdate instance.
+        """
+        if self._closed: return
+        if self._mode == DROP_OLDEST:
+            if len(self._pending) == self._maxsize: self.stats['dropped'] += 1
+            self._pending.append(update)
+        else:
+            if update.currency in self._pending:
+                self.stats['dropped'] += 1
+                del self._pending[update.currency]
+            self._pending[update.currency] = update
+        if self._ready is not None: self._ready.set()
+
+    async def get(self):
+        """
+        Wait for next update.
+
+        :return obj: PriceUpdate instance, None once the subscription is closed.
+        """
+        if self._ready is None: self._ready = asyncio.Event()
+        while not self._pending:
+            if self._closed: return None
+            self._ready.clear()
+            await self._ready.wait()
+        self.stats['delivered'] += 1
+        if self._mode == DROP_OLDEST:
+            return self._pending.popleft()
+        return self._pending.popitem(last=False)[1]
+
+    def close(self):
+        """
+        Stop receiving updates. Pending updates are still delivered.
+        """
+        if self._closed: return
+        self._closed = True
+        if self._ready is not None: self._ready.set()
+        self._broadcaster.unsubscribe(self)
+
+
+class PriceBroadcaster(object):
+    """
+    Poll currentprice once and fan updates out to any number of subscribers.
+    """
+
+    def __init__(self, interval: float = None, currencies: list = None,
+                 request: CoindeskAPIHttpRequest = None):
+        """
+        Initialize price broadcaster.
+
+        :param float interval: seconds between upstream polls.
+        :param list currencies: extra currency codes polled besides the default
+            currentprice currencies.
+        :param obj request: request settings and transport used for polls.
+        """
+        self._interval = interval if interval is not None else settings.BROADCAST_INTERVAL
+        self._request = request if request is not None else CoindeskAPIHttpRequest()
+        self._urls = [(None, RequestSpec(settings.API_CURRENTPRICE_DATA_TYPE).url)]
+        for currency in currencies or []:
+            self._urls.append((currency, RequestSpec(settings.API_CURRENTPRICE_DATA_TYPE, currency).url))
+        self._subscriptions = []
+        self._latest = {}
+        self._task = None
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - every {self._interval}s, {len(self._subscriptions)} subscribers>'
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    @property
+    def latest(self):
+        """
+        Get latest update per currency.
+        """
+        return self._latest
+
+    @property
+    def running(self):
+        """
+        Check whether the polling task is running.
+        """
+        return self._task is not None and not self._task.done()
+
+    def subscribe(self, currencies: list = None, maxsize: int = None, mode: str = None):
+        """
+        Subscribe to price updates. Latest known updates are queued right away.
+
+        :param list currencies: currency codes received, None for every currency.
+        :param int maxsize: maximum number of pending updates.
+        :param str mode: slow consumer behavior (drop_oldest, latest_only).
+        :return obj: Subscription instance.
+        """
+        subscription = Subscription(self, currencies, maxsize, mode)
+        for currency, update in self._latest.items():
+            if subscription.wants(currency): subscription.put(update)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Remove subscription from broadcaster.
+
+        :param obj subscription: Subscription instance.
+        """
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+        if not subscription.closed: subscription.close()
+
+    def start(self):
+        """
+        Start polling task in the running event loop.
+        """
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """
+        Stop polling task and close every subscription.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscription in list(self._subscriptions):
+            subscription.close()
+
+    async def _run(self):
+        """
+        Poll upstream within a single transport session until stopped.
+        """
+        async with self._request.transport.session() as session:
+            while True:
+                await self.poll(session)
+                await asyncio.sleep(self._interval)
+
+    async def poll(self, session):
+        """
+        Fetch, parse and publish current prices once.
+
+        :param obj session: session yielded by the transport.
+        :return int: number of changed currencies published.
+        """
+        self.stats['polls'] += 1
+        results = await asyncio.gather(*(self._request.fetch(session, url)
+                                         for _, url in self._urls), return_exceptions=True)
+        published = 0
+        for (currency, _), data in zip(self._urls, results):
+            try:
+                if isinstance(data, Exception): raise data
+                response = CoindeskAPIHttpResponse.parse(data, settings.API_CURRENTPRICE_DATA_TYPE, currency)
+            except Exception as err:
+                self.stats['errors'] += 1
+                logger.warning(f'[PriceBroadcaster] Poll error. {err}.')
+                continue
+            published += self.publish(response)
+        return published
+
+    def publish(self, response):
+        """
+        Publish changed quotes of a currentprice response to subscribers.
+
+        :param * response: CoindeskAPIHttpResponse instance or response dict.
+        :return int: number of changed currencies published.
+        """
+        data = getattr(response, 'response', response)
+        updated = data.get('time', {}).get('updatedISO')
+        published = 0
+        for code, quote in data.get('bpi', {}).items():
+            update = PriceUpdate(quote.get('code', code), quote.get('rate'), quote['rate_float'], updated)
+            if self._latest.get(update.currency) == update: continue
+            self._latest[update.currency] = update
+            published += 1
+            for subscription in self._subscriptions:
+                if subscription.wants(update.currency): subscription.put(update)
+        self.stats['updates'] += published
+        return published
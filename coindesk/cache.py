@@ -0,0 +1,201 @@
+# encoding: utf-8
+
+import threading
+import time
+from collections import Counter
+from queue import SimpleQueue
+from logging import getLogger
+
+from . import settings
+from .client import CoindeskAPIClient
+from .exceptions import CoindeskAPIClientError
+from .transport import BaseTransport
+
+# Custom logger for cache module
+logger = getLogger(__name__)
+
+
+class CacheEntry(object):
+    """
+    Last good currentprice value and its refresh state.
+    """
+
+    __slots__ = ('value', 'fetched_at', 'retry_at', 'refreshing', 'lock')
+
+    def __init__(self):
+        self.value = None
+        self.fetched_at = None
+        self.retry_at = 0.0
+        self.refreshing = False
+        self.lock = threading.Lock()
+
+    @property
+    def age(self):
+        """
+        Get seconds since value was fetched, None if never fetched.
+        """
+        return time.monotonic() - self.fetched_at if self.fetched_at is not None else None
+
+
+class CurrentPriceCache(object):
+    """
+    Serve currentprice with stale-while-revalidate and stale-if-error semantics.
+    """
+
+    def __init__(self, ttl: float = None, max_stale: float = None, stale_if_error: float = None,
+                 retries: int = 3, timeout: int = 5, transport: BaseTransport = None):
+        """
+        Initialize current price cache.
+
+        :param float ttl: seconds a value is served without refreshing.
+        :param float max_stale: seconds after which a stale value is not served
+            and callers wait for a blocking fetch.
+        :param float stale_if_error: seconds a value is still served when
+            fetching fails.
+        :param int retries: number of request attempts before failing.
+        :param int timeout: seconds before request timeout.
+        :param obj transport: transport performing http requests.
+        """
+        self._ttl = ttl if ttl is not None else settings.SWR_TTL
+        self._max_stale = max_stale if max_stale is not None else settings.SWR_MAX_STALE
+        self._stale_if_error = stale_if_error if stale_if_error is not None else settings.SWR_STALE_IF_ERROR
+        if not 0 <= self._ttl <= self._max_stale:
+            msg = 'Cache ttl must not exceed max stale seconds.'
+            logger.error(f'[CurrentPriceCache] Config error. {msg}')
+            raise CoindeskAPIClientError(msg)
+        self._client_options = {'retries': retries, 'timeout': timeout, 'transport': transport}
+        self._clients = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._refresh_queue = SimpleQueue()
+        self._refresher = None
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - ttl {self._ttl}s, max stale {self._max_stale}s, {len(self._entries)} entries>'
+
+    def _entry(self, currency: str):
+        """
+        Get cache entry and api client for currency, creating them on first use.
+
+        :param str currency: currency code, None for default currentprice.
+        :return obj: CacheEntry instance.
+        """
+        entry = self._entries.get(currency)
+        if entry is None:
+            with self._lock:
+                if currency not in self._entries:
+                    params = {settings.CURRENCY_PARAM: currency} if currency else {}
+                    self._clients[currency] = CoindeskAPIClient.start(
+                        settings.API_CURRENTPRICE_DATA_TYPE, params, **self._client_options)
+                    self._entries[currency] = CacheEntry()
+                entry = self._entries[currency]
+        return entry
+
+    def get(self, currency: str = None):
+        """
+        Get currentprice data, refreshing in background once the ttl expires.
+
+        :param str currency: currency code, None for default currentprice.
+        :return dict: currentprice api response data.
+        """
+        entry = self._entry(currency)
+        age = entry.age
+        if age is not None and age < self._ttl:
+            self.stats['hits'] += 1
+            return entry.value
+        if age is not None and age < self._max_stale:
+            self.stats['stale_hits'] += 1
+            self._refresh_async(currency, entry)
+            return entry.value
+        if age is not None and age < self._stale_if_error and time.monotonic() < entry.retry_at:
+            # Upstream failed recently, do not make every caller wait for it
+            self.stats['stale_if_error'] += 1
+            return entry.value
+        self.stats['misses'] += 1
+        return self._fetch_blocking(currency, entry)
+
+    def _fetch(self, currency: str, entry: CacheEntry):
+        """
+        Fetch currentprice data and store it in cache entry.
+
+        :return dict: currentprice api response data.
+        """
+        self.stats['fetches'] += 1
+        value = self._clients[currency].get()
+        entry.value, entry.fetched_at = value, time.monotonic()
+        return value
+
+    def _fetch_blocking(self, currency: str, entry: CacheEntry):
+        """
+        Fetch value while callers wait, coalescing concurrent callers into one
+        request and falling back to the last value within the error window.
+
+        :return dict: currentprice api response data.
+        """
+        with entry.lock:
+            age = entry.age
+            if age is not None and age < self._max_stale:
+                return entry.value
+            try:
+                return self._fetch(currency, entry)
+            except Exception as err:
+                self.stats['errors'] += 1
+                entry.retry_at = time.monotonic() + settings.SWR_ERROR_RETRY
+                if age is not None and age < self._stale_if_error:
+                    self.stats['stale_if_error'] += 1
+                    logger.warning(f'[CurrentPriceCache] Serving stale value. {err}.')
+                    return entry.value
+                raise
+
+    def _refresh_async(self, currency: str, entry: CacheEntry):
+        """
+        Queue a single background refresh for cache entry, unless a refresh
+        failed within the error retry interval.
+        """
+        if time.monotonic() < entry.retry_at: return
+        with self._lock:
+            if entry.refreshing: return
+            entry.refreshing = True
+            if self._refresher is None:
+                # One long-lived refresher keeps thread start-up off the caller path
+                self._refresher = threading.Thread(target=self._run_refresher,
+                                                   name='coindesk-swr-refresh', daemon=True)
+                self._refresher.start()
+        self._refresh_queue.put((currency, entry))
+
+    def _run_refresher(self):
+        """
+        Process queued background refreshes.
+        """
+        while True:
+            self._refresh(*self._refresh_queue.get())
+
+    def _refresh(self, currency: str, entry: CacheEntry):
+        """
+        Refresh cache entry, keeping the last value on failure.
+        """
+        try:
+            with entry.lock:
+                self._fetch(currency, entry)
+        except Exception as err:
+            self.stats['errors'] += 1
+            entry.retry_at = time.monotonic() + settings.SWR_ERROR_RETRY
+            logger.warning(f'[CurrentPriceCache] Background refresh error. {err}.')
+        finally:
+            entry.refreshing = False
+
+    def invalidate(self, currency: str = None):
+        """
+        Drop cached value so the next get fetches it again.
+
+        :param str currency: currency code, None for default currentprice.
+        """
+        entry = self._entries.get(currency)
+        if entry is not None: entry.fetched_at = None
@@ -0,0 +1,258 @@
+# encoding: utf-8
+
+import re
+from array import array
+from collections import namedtuple
+from datetime import datetime
+from logging import getLogger
+
+from .exceptions import CoindeskAPIClientError, CoindeskAPIHttpResponseError
+
+# Custom logger for candles module
+logger = getLogger(__name__)
+
+INTERVAL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Completed candles in chronological order, one array per field
+Candles = namedtuple('Candles', ['start', 'open', 'high', 'low', 'close', 'ticks'])
+
+
+def parse_interval(interval):
+    """
+    Convert candle interval to seconds.
+
+    :param * interval: seconds or string like 30s, 1m, 5m, 1h, 1d.
+    :return int: interval length in seconds.
+    """
+    if isinstance(interval, int) and not isinstance(interval, bool) and interval > 0:
+        return interval
+    match = re.search(r'^(?P<size>\d+)(?P<unit>[smhd])$', str(interval))
+    if not match or int(match.group('size')) == 0:
+        msg = f'Unvalid candle interval {interval}.'
+        logger.error(f'[CandleAggregator] Interval error. {msg}')
+        raise CoindeskAPIClientError(msg)
+    return int(match.group('size')) * INTERVAL_UNITS[match.group('unit')]
+
+
+class CandleBuffer(object):
+    """
+    Fixed-size ring buffer of completed candles for one currency and interval.
+    """
+
+    __slots__ = ('_capacity', '_size', '_head', '_start', '_open', '_high', '_low', '_close', '_ticks')
+
+    def __init__(self, capacity: int):
+        """
+        Initialize candle ring buffer with preallocated arrays.
+
+        :param int capacity: maximum number of completed candles kept.
+        """
+        self._capacity = capacity
+        self._size = 0
+        self._head = 0
+        self._start = array('q', bytes(8 * capacity))
+        self._open = array('d', bytes(8 * capacity))
+        self._high = array('d', bytes(8 * capacity))
+        self._low = array('d', bytes(8 * capacity))
+        self._close = array('d', bytes(8 * capacity))
+        self._ticks = array('q', bytes(8 * capacity))
+
+    def __len__(self):
+        return self._size
+
+    def push(self, start: int, open_: float, high: float, low: float, close: float, ticks: int):
+        """
+        Store completed candle, overwriting the oldest one when full.
+        """
+        head = self._head
+        self._start[head] = start
+        self._open[head] = open_
+        self._high[head] = high
+        self._low[head] = low
+        self._close[head] = close
+        self._ticks[head] = ticks
+        self._head = (head + 1) % self._capacity
+        if self._size < self._capacity: self._size += 1
+
+    def merge(self, price: float):
+        """
+        Add price to the most recently stored candle.
+
+        :param float price: tick price within the candle interval.
+        """
+        last = (self._head - 1) % self._capacity
+        if price > self._high[last]: self._high[last] = price
+        if price < self._low[last]: self._low[last] = price
+        self._close[last] = price
+        self._ticks[last] += 1
+
+    def arrays(self):
+        """
+        Get completed candles in chronological order.
+
+        :return Candles: start timestamps, ohlc prices and tick counts arrays.
+        """
+        first = (self._head - self._size) % self._capacity
+        fields = (self._start, self._open, self._high, self._low, self._close, self._ticks)
+        if first + self._size <= self._capacity:
+            return Candles(*(field[first:first + self._size] for field in fields))
+        return Candles(*(field[first:] + field[:self._head] for field in fields))
+
+
+class CandleAggregator(object):
+    """
+    Aggregate polled currentprice responses into rolling ohlc candles.
+    """
+
+    def __init__(self, intervals: tuple = ('1m', '5m', '1h'), capacity: int = 1440):
+        """
+        Initialize candle aggregator.
+
+        :param tuple intervals: candle intervals, e.g. 1m, 5m, 1h.
+        :param int capacity: completed candles kept per currency and interval.
+        """
+        if type(capacity) is not int or capacity < 1:
+            msg = 'Capacity must be positive integer number.'
+            logger.error(f'[CandleAggregator] Capacity error. {msg}')
+            raise CoindeskAPIClientError(msg)
+        self._intervals = {interval: parse_interval(interval) for interval in intervals}
+        self._capacity = capacity
+        self._buffers = {}
+        # Open candle per (currency, interval): [start, open, high, low, close, ticks]
+        self._current = {}
+        # Start of the last flushed candle per (currency, interval)
+        self._flushed = {}
+        self._last_updated = None
+        self._last_timestamp = None
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {", ".join(self._intervals)} for {len(self.currencies)} currencies>'
+
+    @property
+    def intervals(self):
+        """
+        Get configured candle intervals.
+        """
+        return list(self._intervals)
+
+    @property
+    def currencies(self):
+        """
+        Get currencies with at least one tick.
+        """
+        return sorted({currency for currency, _ in self._current})
+
+    def _timestamp(self, updated: str):
+        """
+        Get epoch seconds for response update time, reusing last parse.
+
+        :param str updated: response updatedISO value.
+        :return int: epoch seconds.
+        """
+        if updated != self._last_updated:
+            try:
+                self._last_timestamp = int(datetime.fromisoformat(updated).timestamp())
+            except (TypeError, ValueError) as err:
+                msg = f'Unable to parse update time {updated}. {err.args[0]}.'
+                logger.error(f'[CandleAggregator] Response error. {msg}')
+                raise CoindeskAPIHttpResponseError(msg)
+            self._last_updated = updated
+        return self._last_timestamp
+
+    def update(self, response):
+        """
+        Add every currency rate of a currentprice response as a tick.
+
+        :param * response: CoindeskAPIHttpResponse instance or response dict.
+        """
+        data = getattr(response, 'response', response)
+        timestamp = self._timestamp(data.get('time', {}).get('updatedISO'))
+        for code, quote in data.get('bpi', {}).items():
+            price = quote.get('rate_float') if isinstance(quote, dict) else None
+            if price is None:
+                msg = f'Quote for {code} has no rate_float, skipped.'
+                logger.warning(f'[CandleAggregator] Response error. {msg}')
+                continue
+            self.add_tick(code, price, timestamp)
+
+    def add_tick(self, currency: str, price: float, timestamp: int):
+        """
+        Update open candles of every interval with a single price.
+
+        :param str currency: currency code.
+        :param float price: Bitcoin rate in currency.
+        :param int timestamp: epoch seconds of the price.
+        """
+        for interval, seconds in self._intervals.items():
+            key = (currency, interval)
+            start = timestamp - timestamp % seconds
+            candle = self._current.get(key)
+            if candle is None:
+                flushed = self._flushed.get(key)
+                if flushed is not None and start <= flushed:
+                    # Late tick for a flushed candle, never open a second candle with same start
+                    if start == flushed: self._buffers[key].merge(price)
+                    continue
+                self._flushed.pop(key, None)
+                self._current[key] = [start, price, price, price, price, 1]
+            elif start == candle[0]:
+                if price > candle[2]: candle[2] = price
+                if price < candle[3]: candle[3] = price
+                candle[4] = price
+                candle[5] += 1
+            elif start > candle[0]:
+                self._buffer(key).push(*candle)
+                self._current[key] = [start, price, price, price, price, 1]
+
+    def _buffer(self, key: tuple):
+        """
+        Get completed candles buffer, creating it on first use.
+
+        :param tuple key: currency and interval.
+        :return obj: CandleBuffer instance.
+        """
+        buffer = self._buffers.get(key)
+        if buffer is None:
+            buffer = self._buffers[key] = CandleBuffer(self._capacity)
+        return buffer
+
+    def candles(self, currency: str, interval: str):
+        """
+        Get completed candles for currency and interval.
+
+        :param str currency: currency code.
+        :param str interval: configured candle interval.
+        :return Candles: start timestamps, ohlc prices and tick counts arrays.
+        """
+        if interval not in self._intervals:
+            msg = f'Interval {interval} is not aggregated.'
+            logger.error(f'[CandleAggregator] Interval error. {msg}')
+            raise CoindeskAPIClientError(msg)
+        buffer = self._buffers.get((currency, interval))
+        return buffer.arrays() if buffer is not None else CandleBuffer(1).arrays()
+
+    def current(self, currency: str, interval: str):
+        """
+        Get candle still open for currency and interval.
+
+        :param str currency: currency code.
+        :param str interval: configured candle interval.
+        :return tuple: start, open, high, low, close and ticks, or None.
+        """
+        candle = self._current.get((currency, interval))
+        return tuple(candle) if candle is not None else None
+
+    def flush(self):
+        """
+        Close every open candle, e.g. before shutdown.
+        """
+        for key, candle in self._current.items():
+            self._buffer(key).push(*candle)
+            self._flushed[key] = candle[0]
+        self._current.clear()
@@ -0,0 +1,166 @@
+# encoding: utf-8
+
+import argparse
+import asyncio
+import csv
+import json
+import logging
+import sys
+from logging import getLogger
+
+from . import settings
+from .client import CoindeskAPIHttpRequest
+from .exceptions import BaseError, CoindeskAPIClientError
+from .export import EXPORT_COLUMNS, iter_response_rows
+from .specs import RequestSpec
+
+# Custom logger for cli module
+logger = getLogger(__name__)
+
+QUERY_FIELDS = ('data_type', settings.CURRENCY_PARAM, settings.START_PARAM, settings.END_PARAM)
+QUERY_PARAMS = (settings.INDEX_PARAM, settings.CURRENCY_PARAM, settings.START_PARAM,
+                settings.END_PARAM, settings.FOR_PARAM)
+
+
+def parse_query(line: str):
+    """
+    Parse query from json object or data_type[:currency[:start[:end]]] string.
+
+    :param str line: query specification.
+    :return dict: query fields.
+    """
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            query = json.loads(line)
+        except ValueError as err:
+            msg = f'Unable to decode query {line}. {err.args[0]}.'
+            logger.error(f'[CoindeskCLI] Query error. {msg}')
+            raise CoindeskAPIClientError(msg)
+    else:
+        query = dict(zip(QUERY_FIELDS, line.split(':')))
+    return {key: value for key, value in query.items() if value}
+
+
+def build_spec(query: dict):
+    """
+    Get validated request spec for query.
+
+    :param dict query: query fields.
+    :return obj: RequestSpec instance.
+    """
+    params = {key: query[key] for key in QUERY_PARAMS if key in query}
+    return RequestSpec.from_params(query.get('data_type'), params)
+
+
+async def run_queries(queries: list, concurrency: int, request: CoindeskAPIHttpRequest):
+    """
+    Run queries over one pooled session, yielding results as they complete.
+
+    :param list queries: query fields dicts.
+    :param int concurrency: maximum simultaneous requests.
+    :param obj request: request settings and transport shared by queries.
+    :return async generator: (query, data, error) tuples.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(session, query):
+        try:
+            spec = build_spec(query)
+            async with semaphore:
+                return query, await request.execute(session, spec), None
+        except Exception as err:
+            return query, None, str(err.args[0] if err.args else err.__class__.__name__)
+
+    async with request.transport.session() as session:
+        for task in asyncio.as_completed([run(session, query) for query in queries]):
+            yield await task
+
+
+def write_ndjson(stream, query: dict, data: dict, error: str):
+    """
+    Write query result as a json line.
+    """
+    result = {'query': query, 'error': error} if error else {'query': query, 'data': data}
+    stream.write(json.dumps(result, separators=(',', ':')) + '\n')
+
+
+def write_csv(writer, query: dict, data: dict, error: str):
+    """
+    Write query result as csv rows.
+    """
+    label = query.get(settings.CURRENCY_PARAM, 'USD')
+    if error:
+        writer.writerow((query.get('data_type'), None, label, None, error))
+        return
+    for row in iter_response_rows(data, label):
+        writer.writerow((query.get('data_type'),) + row + (None,))
+
+
+async def stream_results(queries: list, args: argparse.Namespace, stream):
+    """
+    Run queries and stream each result as soon as it completes.
+
+    :return int: number of failed queries.
+    """
+    request = CoindeskAPIHttpRequest.start(retries=args.retries, timeout=args.timeout)
+    writer = csv.writer(stream)
+    if args.format == 'csv':
+        writer.writerow(('data_type',) + EXPORT_COLUMNS + ('error',))
+    failed = 0
+    async for query, data, error in run_queries(queries, args.concurrency, request):
+        if error: failed += 1
+        if args.format == 'csv':
+            write_csv(writer, query, data, error)
+        else:
+            write_ndjson(stream, query, data, error)
+        stream.flush()
+    return failed
+
+
+def get_parser():
+    """
+    Get command line arguments parser.
+
+    :return obj: argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog='coindesk',
+        description='Query Coindesk API concurrently and stream results.',
+        epilog='Queries are data_type[:currency[:start[:end]]] strings or json objects '
+               'with data_type, index, currency, start, end and for keys.')
+    parser.add_argument('queries', nargs='*', help='queries, read from stdin if omitted or -')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='maximum simultaneous requests')
+    parser.add_argument('-f', '--format', choices=('ndjson', 'csv'), default='ndjson', help='output format')
+    parser.add_argument('-r', '--retries', type=int, default=3, help='request attempts before failing')
+    parser.add_argument('-t', '--timeout', type=int, default=5, help='seconds before request timeout')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log requests to stderr')
+    return parser
+
+
+def main(argv: list = None):
+    """
+    Run coindesk command line entry point.
+
+    :param list argv: command line arguments.
+    :return int: process exit status.
+    """
+    args = get_parser().parse_args(argv)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    if args.concurrency < 1:
+        get_parser().error('concurrency must be positive')
+    lines = args.queries if args.queries and args.queries != ['-'] else sys.stdin
+    try:
+        queries = [parse_query(line) for line in lines if line.strip()]
+        failed = asyncio.run(stream_results(queries, args, sys.stdout))
+    except BaseError as err:
+        sys.stderr.write(f'coindesk: {err.args[0]}\n')
+        return 2
+    except KeyboardInterrupt:
+        return 130
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,28 +4,31 @@ import asyncio
 import json
 import math
 import re
+import time
 from collections import OrderedDict
 from json import JSONDecodeError
 from logging import getLogger
 from logging.config import fileConfig
 from os.path import dirname, join
 
-import aiohttp
-import jsonschema
 import requests
-from aiohttp import ClientResponse, ClientSession
+from aiohttp import ClientError, ClientResponse, ClientSession
 from furl import furl as URL
 from jsonschema import SchemaError, ValidationError
 from requests.exceptions import RequestException
 
-from . import settings, utils
+from . import deadlines, logs, settings, utils, validators
+from .deadlines import Deadline
 from .decorators import async_event_loop
+from .specs import RequestSpec
 from .exceptions import (CoindeskAPIClientError,
                          CoindeskAPIHttpRequestError,
                          CoindeskAPIHttpResponseError)
+from .transport import BaseTransport, HttpTransport, RawResponse
 
 # Custom logger for client module
-fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'))
+if not getLogger().handlers:
+    fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'), disable_existing_loggers=False)
 logger = getLogger(__name__)
 
 
@@ -34,7 +37,8 @@ class CoindeskAPIHttpRequest(object):
     Enable Coindesk API http request.
     """
 
-    def __init__(self, retries: int = 10, redirects: bool = True, timeout: int = 5, backoff: bool = True):
+    def __init__(self, retries: int = 10, redirects: bool = True, timeout: int = 5, backoff: bool = True,
+                 transport: BaseTransport = None):
         """
         Initialize Coindesk API http request making.
 
@@ -42,11 +46,13 @@ class CoindeskAPIHttpRequest(object):
         :param bool redirects: enable/disable http verbs redirection.
         :param int timeout: seconds before request timeout.
         :param bool backoff: enable/disable http request retry backoff.
+        :param obj transport: transport performing http requests.
         """
         self._retries = retries
         self._redirects = redirects
         self._timeout = timeout
         self._backoff = backoff
+        self._transport = transport if transport is not None else HttpTransport()
 
     def __str__(self):
         """
@@ -58,7 +64,8 @@ class CoindeskAPIHttpRequest(object):
         return f'<{classname} - Coindesk api request>'
 
     @classmethod
-    def start(cls, retries: int = 10, redirects: bool = True, timeout: int = 5, backoff: bool = True):
+    def start(cls, retries: int = 10, redirects: bool = True, timeout: int = 5, backoff: bool = True,
+              transport: BaseTransport = None):
         """
         Get Coindesk API http request instance.
 
@@ -66,10 +73,12 @@ class CoindeskAPIHttpRequest(object):
         :param bool redirects: enable/disable http verbs redirection.
         :param int timeout: seconds before request timeout.
         :param bool backoff: enable/disable http request retry backoff.
+        :param obj transport: transport performing http requests.
         :return cls: CoindeskAPICient class instance.
         """
         retries, redirects, timeout, backoff = cls.validate(retries, redirects, timeout, backoff)
-        return cls(retries, redirects, timeout, backoff)
+        transport = utils.validate_transport(transport)
+        return cls(retries, redirects, timeout, backoff, transport)
 
     @staticmethod
     def validate(retries: int, redirects: bool, timeout: int, backoff: bool):
@@ -162,20 +171,138 @@ class CoindeskAPIHttpRequest(object):
         backoff = utils.validate_backoff(backoff)
         self._backoff = backoff
 
+    @property
+    def transport(self):
+        """
+        Get transport performing http requests.
+
+        :return obj: request transport.
+        """
+        return self._transport
+
+    @transport.setter
+    def transport(self, transport: BaseTransport):
+        """
+        Set transport performing http requests, e.g. record or replay.
+
+        :param obj transport: request transport.
+        """
+        transport = utils.validate_transport(transport)
+        self._transport = transport
+
+    def close(self):
+        """
+        Close session and pooled connections kept open between calls.
+        """
+        self._transport.close()
+
     @async_event_loop
-    async def get(self, url: str, raw: bool = False):
+    async def get(self, url: str, raw: bool = False, deadline: Deadline = None):
         """
         Retrieve response object/data from Coindesk API url.
 
         :param str url: api resource locator.
         :param bool raw: enable/disable api response parsing.
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :return *: api http raw response or response data.
+        """
+        async with self._transport.session() as session:
+            return await self.fetch(session, url, raw, deadline)
+
+    async def fetch(self, session, url: str, raw: bool = False, deadline: Deadline = None):
+        """
+        Retrieve response object/data from Coindesk API url within an open session.
+
+        :param obj session: session yielded by the transport.
+        :param str url: api resource locator.
+        :param bool raw: enable/disable api response parsing.
+        :param * deadline: Deadline instance or overall time budget in seconds,
+            defaults to the deadline of the enclosing request if any.
         :return *: api http raw response or response data.
         """
-        options = self._get_request_options()
-        async with aiohttp.ClientSession() as session:
-            response = await self._http_request(session, url, options)
-        self._check_response_status(response)
-        return response if raw else await self._get_json_response(response)
+        deadline = deadlines.validate_deadline(deadline) if deadline is not None else deadlines.get_deadline()
+        with deadlines.deadline_scope(deadline):
+            options = self._get_request_options()
+            response = await self._http_request(session, url, options, deadline)
+            self._check_response_status(response)
+            if raw:
+                # Buffer body so the response stays readable once the session is closed
+                await response.read()
+                return response
+            return await self._get_json_response(response, deadline)
+
+    @async_event_loop
+    async def get_raw(self, url: str, deadline: Deadline = None):
+        """
+        Retrieve undecoded response body from Coindesk API url.
+
+        :param str url: api resource locator.
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :return obj: RawResponse instance.
+        """
+        async with self._transport.session() as session:
+            return await self.fetch_raw(session, url, deadline)
+
+    async def fetch_raw(self, session, url: str, deadline: Deadline = None):
+        """
+        Retrieve undecoded response body within an open session.
+        The body is read before returning, so it stays usable once the
+        session is closed, and it is never json decoded.
+
+        :param obj session: session yielded by the transport.
+        :param str url: api resource locator.
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :return obj: RawResponse instance.
+        """
+        deadline = deadlines.validate_deadline(deadline) if deadline is not None else deadlines.get_deadline()
+        with deadlines.deadline_scope(deadline):
+            start = time.perf_counter()
+            response = await self._http_request(session, url, self._get_request_options(), deadline)
+            headers_time = time.perf_counter() - start
+            self._check_response_status(response)
+            if deadline is None:
+                body = await response.read()
+            else:
+                try:
+                    body = await asyncio.wait_for(response.read(), deadline.remaining)
+                except asyncio.TimeoutError:
+                    msg = 'Deadline exceeded while reading response.'
+                    logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+                    raise CoindeskAPIHttpRequestError(msg)
+            return RawResponse(str(response.url), response.status, response.reason, response.headers,
+                               body, headers_time, time.perf_counter() - start)
+
+    async def execute(self, session, spec: RequestSpec, raw: bool = False, deadline: Deadline = None):
+        """
+        Execute request spec within an open session.
+        The request holds no per-query state, so one instance can run any
+        number of specs concurrently.
+
+        :param obj session: session yielded by the transport.
+        :param obj spec: RequestSpec instance.
+        :param bool raw: enable/disable api response parsing.
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :return *: api http raw response or response data.
+        """
+        return await self.fetch(session, spec.url, raw, deadline)
+
+    @async_event_loop
+    async def execute_many(self, specs: list, deadline: Deadline = None, return_exceptions: bool = False):
+        """
+        Execute request specs concurrently over one session, fetching equal specs once.
+
+        :param list specs: RequestSpec instances.
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :param bool return_exceptions: return errors in place of failed results.
+        :return list: response data per spec, in specs order.
+        """
+        deadline = deadlines.validate_deadline(deadline)
+        unique = list(dict.fromkeys(specs))
+        async with self._transport.session() as session:
+            results = await asyncio.gather(*(self.execute(session, spec, deadline=deadline) for spec in unique),
+                                           return_exceptions=return_exceptions)
+        results = dict(zip(unique, results))
+        return [results[spec] for spec in specs]
 
     def _get_request_options(self):
         """
@@ -187,27 +314,53 @@ class CoindeskAPIHttpRequest(object):
             'timeout': self.timeout
         }
 
-    async def _http_request(self, session: ClientSession, url: str, options: dict):
+    async def _http_request(self, session: ClientSession, url: str, options: dict,
+                            deadline: Deadline = None):
         """
         Make asynchronous http request to Coindesk API.
 
         :param obj session: client session.
         :param str url: optional query parameters.
         :param dict options: http request options.
+        :param obj deadline: Deadline capping attempt timeouts and backoff sleeps.
         :return obj: http response object.
         """
+        backoff_left = settings.REQUEST_MAX_BACKOFF
         for retry in range(1, self.retries + 1):
+            if deadline is not None:
+                if deadline.expired:
+                    msg = f'Deadline exceeded before response from Coindesk API url {url}.'
+                    logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+                    raise CoindeskAPIHttpRequestError(msg)
+                options['timeout'] = deadline.cap(self.timeout)
             try:
-                return await session.get(url, **options)
-            except RequestException as err:
+                if deadline is None or self._transport.enforces_timeout:
+                    return await self._transport.request(session, url, options)
+                return await asyncio.wait_for(self._transport.request(session, url, options),
+                                              options['timeout'])
+            except (asyncio.TimeoutError, ClientError, RequestException) as err:
+                if deadline is not None and deadline.expired:
+                    msg = f'Deadline exceeded before response from Coindesk API url {url}.'
+                    logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+                    raise CoindeskAPIHttpRequestError(msg)
+                logger.error(f'[CoindeskAPIHttpRequest] Retry {retry} request. {str(err) or repr(err)}.')
+                # No point waiting after the last attempt or once the backoff budget is spent
+                if retry == self.retries or backoff_left <= 0: break
                 timeout = self._wait_exp_backoff(retry) if self.backoff else 0
-                logger.error(f'[CoindeskAPIHttpRequest] Retry {retry} request. {err.args[0]}.')
                 logger.error(f'[CoindeskAPIHttpRequest] Waiting {timeout} ms.')
-                await asyncio.sleep(timeout / 10)
-        else:
-            msg = f'No response from Coindesk API url {url}.'
-            logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
-            raise CoindeskAPIHttpRequestError(msg)
+                sleep = min(timeout / 10, backoff_left)
+                backoff_left -= sleep
+                if deadline is not None:
+                    # Shorten the sleep so one more attempt still fits in the budget
+                    sleep = min(sleep, deadline.remaining - settings.DEADLINE_MIN_ATTEMPT)
+                    if sleep < 0:
+                        msg = f'Deadline exceeded before response from Coindesk API url {url}.'
+                        logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+                        raise CoindeskAPIHttpRequestError(msg)
+                await asyncio.sleep(sleep)
+        msg = f'No response from Coindesk API url {url}.'
+        logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+        raise CoindeskAPIHttpRequestError(msg)
 
     def _wait_exp_backoff(self, retry: int):
         """
@@ -224,30 +377,38 @@ class CoindeskAPIHttpRequest(object):
 
         :param int status: http response status code.
         """
-        status = str(response.status)
+        status = response.status
+        if status < 400:
+            # Success path formats lazily, only if the record is emitted
+            kind = 'info' if status < 200 else 'success' if status < 300 else 'redirect'
+            logger.info('[CoindeskAPIHttpRequest] Request %s. Status code %s - %s.',
+                        kind, status, response.reason)
+            return
         msg = f'Status code {status} - {response.reason}.'
-        if status.startswith('1'):
-            logger.info(f'[CoindeskAPIHttpRequest] Request info. {msg}')
-        elif status.startswith('2'):
-            logger.info(f'[CoindeskAPIHttpRequest] Request success. {msg}')
-        elif status.startswith('3'):
-            logger.info(f'[CoindeskAPIHttpRequest] Request redirect. {msg}')
-        elif status.startswith('4'):
+        if status < 500:
             logger.error(f'[CoindeskAPIHttpRequest] Client error. {msg}')
             raise CoindeskAPIHttpRequestError(msg)
-        elif status.startswith('5'):
+        elif status < 600:
             logger.error(f'[CoindeskAPIHttpRequest] Server error. {msg}')
             raise CoindeskAPIHttpRequestError(msg)
 
-    async def _get_json_response(self, response: ClientResponse):
+    async def _get_json_response(self, response: ClientResponse, deadline: Deadline = None):
         """
         Return response json data format.
 
         :param obj response: http response object.
+        :param obj deadline: Deadline capping the body read.
         :return json: response json data.
         """
         try:
-            data = await response.json(content_type=None)
+            if deadline is None:
+                data = await response.json(content_type=None)
+            else:
+                data = await asyncio.wait_for(response.json(content_type=None), deadline.remaining)
+        except asyncio.TimeoutError:
+            msg = 'Deadline exceeded while reading response.'
+            logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
         except JSONDecodeError as err:
             msg = f'Could not decode json data. {err.args[0]}.'
             logger.error(f'[CoindeskAPIHttpRequest] Request error. {msg}')
@@ -262,7 +423,8 @@ class CoindeskAPIClient(CoindeskAPIHttpRequest):
     """
 
     def __init__(self, data_type: str = None, params: dict = None, retries: int = 10,
-                 redirects: bool = True, timeout: int = 5, backoff: bool = True):
+                 redirects: bool = True, timeout: int = 5, backoff: bool = True,
+                 transport: BaseTransport = None):
         """
         Initialize Coindesk API client.
 
@@ -272,9 +434,10 @@ class CoindeskAPIClient(CoindeskAPIHttpRequest):
         :param bool redirects: enable/disable http verbs redirection.
         :param int timeout: seconds before request timeout.
         :param bool backoff: enable/disable http request retry backoff.
+        :param obj transport: transport performing http requests.
         """
         if params is None: params = {}
-        super(CoindeskAPIClient, self).__init__(retries, redirects, timeout, backoff)
+        super(CoindeskAPIClient, self).__init__(retries, redirects, timeout, backoff, transport)
         self._data_type = data_type
         self._api_endpoint = self._construct_api_endpoint(data_type, params)
 
@@ -290,7 +453,8 @@ class CoindeskAPIClient(CoindeskAPIHttpRequest):
 
     @classmethod
     def start(cls, data_type: str = None, params: dict = None, retries: int = 10,
-              redirects: bool = True, timeout: int = 5, backoff: bool = True):
+              redirects: bool = True, timeout: int = 5, backoff: bool = True,
+              transport: BaseTransport = None):
         """
         Get Coindesk API client instance.
 
@@ -300,13 +464,15 @@ class CoindeskAPIClient(CoindeskAPIHttpRequest):
         :param bool redirects: enable/disable http verbs redirection.
         :param int timeout: seconds before request timeout.
         :param bool backoff: enable/disable http request retry backoff.
+        :param obj transport: transport performing http requests.
         :return cls: CoindeskAPICient class instance.
         """
         if params is None: params = {}
         data_type = utils.validate_data_type(data_type)
         params = utils.validate_params(data_type, params)
         retries, redirects, timeout, backoff = cls.validate(retries, redirects, timeout, backoff)
-        return cls(data_type, params, retries, redirects, timeout, backoff)
+        transport = utils.validate_transport(transport)
+        return cls(data_type, params, retries, redirects, timeout, backoff, transport)
 
     def _construct_api_endpoint(self, data_type: str, params: dict):
         """
@@ -506,18 +672,39 @@ class CoindeskAPIClient(CoindeskAPIHttpRequest):
         if currencies: utils.validate_currencies_settings(currencies)
         return currencies if currencies else utils.get_currencies_settings()
 
-    def get(self, raw: bool = False):
+    def get_raw(self, deadline: Deadline = None):
+        """
+        Make http get request to Coindesk API returning the undecoded body.
+
+        :param * deadline: Deadline instance or overall time budget in seconds.
+        :return obj: RawResponse instance with body, status, headers and timing.
+        """
+        try:
+            deadline = deadlines.validate_deadline(deadline)
+            return super(CoindeskAPIClient, self).get_raw(self.url, deadline)
+        except Exception as err:
+            msg = err.args[0]
+            logger.error(f'[CoindeskAPICient] API call error. {msg}.')
+            logs.dump_recent_events()
+            raise CoindeskAPIClientError(msg)
+
+    def get(self, raw: bool = False, deadline: Deadline = None):
         """
         Make http get request to Coindesk API.
 
         :param bool raw: enable/disable api response parsing.
+        :param * deadline: Deadline instance or overall time budget in seconds
+            covering every attempt, backoff sleep and response parsing.
         :return *: api http raw response or data.
         """
         try:
-            return super(CoindeskAPIClient, self).get(self.url, raw)
+            # Budget starts now, not once the event loop is running
+            deadline = deadlines.validate_deadline(deadline)
+            return super(CoindeskAPIClient, self).get(self.url, raw, deadline)
         except Exception as err:
             msg = err.args[0]
             logger.error(f'[CoindeskAPICient] API call error. {msg}.')
+            logs.dump_recent_events()
             raise CoindeskAPIClientError(msg)
 
 
@@ -580,7 +767,7 @@ class CoindeskAPIHttpResponse(object):
         :param dict schema: response schema to validate.
         """
         try:
-            return jsonschema.validate(response, schema)
+            return validators.get_validation_policy().validate(response, schema)
         except (SchemaError, ValidationError) as err:
             msg = err.args[0]
             logger.error(f'[CoindeskAPIHttpResponse] Response error. {msg}.')
@@ -0,0 +1,132 @@
+# encoding: utf-8
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+
+from .exceptions import CoindeskAPIClientError
+
+# Custom logger for deadlines module
+logger = getLogger(__name__)
+
+# Deadline of the request being made in the current task, if any
+_current_deadline = ContextVar('coindesk_deadline', default=None)
+
+
+class Deadline(object):
+    """
+    Absolute point in time a whole request must complete by.
+    """
+
+    __slots__ = ('at',)
+
+    def __init__(self, at: float):
+        """
+        Initialize deadline.
+
+        :param float at: time.monotonic() value the request must complete by.
+        """
+        self.at = at
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.remaining * 1000:.0f} ms remaining>'
+
+    @classmethod
+    def within(cls, budget: float):
+        """
+        Get deadline a time budget from now.
+
+        :param float budget: seconds available from now.
+        :return cls: Deadline class instance.
+        """
+        return cls(time.monotonic() + budget)
+
+    @classmethod
+    def from_timestamp(cls, timestamp: float):
+        """
+        Get deadline from wall clock unix timestamp.
+
+        :param float timestamp: time.time() value the request must complete by.
+        :return cls: Deadline class instance.
+        """
+        return cls(time.monotonic() + timestamp - time.time())
+
+    @property
+    def remaining(self):
+        """
+        Get seconds left before the deadline, never negative.
+        """
+        return max(0.0, self.at - time.monotonic())
+
+    @property
+    def expired(self):
+        """
+        Check whether the deadline has passed.
+        """
+        return time.monotonic() >= self.at
+
+    def cap(self, seconds: float):
+        """
+        Limit duration to the time left before the deadline.
+
+        :param float seconds: requested duration.
+        :return float: duration not exceeding the remaining time.
+        """
+        return min(seconds, self.remaining)
+
+
+def validate_deadline(deadline):
+    """
+    Get deadline from Deadline instance or time budget in seconds.
+
+    :param * deadline: Deadline instance, seconds budget or None.
+    :return obj: Deadline instance or None.
+    """
+    if deadline is None or isinstance(deadline, Deadline):
+        return deadline
+    if isinstance(deadline, (int, float)) and not isinstance(deadline, bool) and deadline >= 0:
+        return Deadline.within(deadline)
+    msg = 'Deadline must be a Deadline instance or a positive time budget in seconds.'
+    logger.error(f'[Deadline] Deadline error. {msg}')
+    raise CoindeskAPIClientError(msg)
+
+
+def get_deadline():
+    """
+    Get deadline of the request being made in the current task.
+
+    :return obj: Deadline instance or None.
+    """
+    return _current_deadline.get()
+
+
+def get_remaining_time():
+    """
+    Get seconds left for the request being made in the current task.
+    Meant for transports and other request hooks.
+
+    :return float: remaining seconds, None without deadline.
+    """
+    deadline = _current_deadline.get()
+    return deadline.remaining if deadline is not None else None
+
+
+@contextmanager
+def deadline_scope(deadline: Deadline):
+    """
+    Make deadline visible to code running within the scope.
+
+    :param obj deadline: Deadline instance or None.
+    """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
@@ -1,22 +1,108 @@
 # encoding: utf-8
 
 import asyncio
+import atexit
+import os
+import threading
+import weakref
 from functools import wraps
 from logging import getLogger
 from logging.config import fileConfig
 from os.path import dirname, join
 
 # Custom logger for decorators module
-fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'))
+if not getLogger().handlers:
+    fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'), disable_existing_loggers=False)
 logger = getLogger(__name__)
 
+# Event loop reused by the synchronous calls of each thread
+_thread = threading.local()
+_loops = weakref.WeakSet()
+# Sessions closed along with the synchronous calls event loop they run in
+_loop_sessions = weakref.WeakKeyDictionary()
+
+
+class _LoopOwner(object):
+    """
+    Thread local marker, the thread event loop is closed once it is dropped.
+    """
+
+
+def get_event_loop():
+    """
+    Get event loop reused by every synchronous call of the calling thread,
+    so sessions and pooled connections outlive a single call.
+
+    :return obj: asyncio event loop.
+    """
+    loop = getattr(_thread, 'loop', None)
+    if loop is None or loop.is_closed() or _thread.pid != os.getpid():
+        loop = asyncio.new_event_loop()
+        _thread.loop, _thread.pid = loop, os.getpid()
+        # Thread locals are dropped when the thread exits, closing its loop
+        _thread.owner = _LoopOwner()
+        weakref.finalize(_thread.owner, _close_event_loop, loop, os.getpid())
+        _loops.add(loop)
+    return loop
+
+
+def add_loop_session(loop, session):
+    """
+    Close session along with the synchronous calls event loop it runs in.
+
+    :param obj loop: asyncio event loop returned by get_event_loop.
+    :param obj session: aiohttp client session.
+    """
+    _loop_sessions.setdefault(loop, weakref.WeakSet()).add(session)
+
+
+def is_sync_event_loop(loop):
+    """
+    Check whether loop is the synchronous calls event loop of the calling thread.
+
+    :param obj loop: asyncio event loop.
+    :return bool: whether loop outlives a single call.
+    """
+    return loop is getattr(_thread, 'loop', None) and _thread.pid == os.getpid()
+
 
 def async_event_loop(method):
     @wraps(method)
     def result(self, *args, **kwargs):
         caller = self.__class__.__name__
-        logger.info(f'[{caller}] Event loop initialized.')
-        response = asyncio.run(method(self, *args, **kwargs))
-        logger.info(f'[{caller}] Event loop finished.')
+        logger.info('[%s] Event loop initialized.', caller)
+        response = get_event_loop().run_until_complete(method(self, *args, **kwargs))
+        logger.info('[%s] Event loop finished.', caller)
         return response
     return result
+
+
+def _close_event_loop(loop, pid: int):
+    """
+    Close synchronous calls event loop and the sessions still open in it.
+
+    :param obj loop: asyncio event loop.
+    :param int pid: id of the process the loop was created in.
+    """
+    # Forked children must not close connections shared with their parent
+    if pid != os.getpid() or loop.is_running() or loop.is_closed(): return
+    sessions = [session for session in _loop_sessions.pop(loop, ()) if not session.closed]
+    try:
+        if sessions: loop.run_until_complete(_close_sessions(sessions))
+    except RuntimeError:
+        # Another event loop runs in this thread
+        return
+    loop.close()
+
+
+async def _close_sessions(sessions: list):
+    await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+
+@atexit.register
+def _close_event_loops():
+    """
+    Close synchronous calls event loops at interpreter exit.
+    """
+    for loop in list(_loops):
+        _close_event_loop(loop, os.getpid())
@@ -39,3 +39,17 @@ class CoindeskAPIHttpResponseError(BaseError):
     Handle exception for Coindesk API response.
     """
     pass
+
+
+class CoindeskAPISnapshotError(BaseError):
+    """
+    Handle exception for Coindesk price snapshot files.
+    """
+    pass
+
+
+class CoindeskAPIExportError(BaseError):
+    """
+    Handle exception for Coindesk price data export.
+    """
+    pass
@@ -0,0 +1,304 @@
+# encoding: utf-8
+
+import csv
+import os
+from abc import ABCMeta, abstractmethod
+from logging import getLogger
+from os.path import exists, getsize, splitext
+
+from .exceptions import CoindeskAPIExportError
+
+# Custom logger for export module
+logger = getLogger(__name__)
+
+# Exported row layout shared by every output format
+EXPORT_COLUMNS = ('time', 'currency', 'rate')
+EXPORT_ROW_GROUP_SIZE = 10000
+EXPORT_CSV_BUFFER_SIZE = 1 << 16
+
+
+def iter_response_rows(response, currency: str = 'USD'):
+    """
+    Yield export rows from a historical or currentprice api response.
+
+    :param * response: CoindeskAPIHttpResponse instance or response dict.
+    :param str currency: currency label for historical closes.
+    :return generator: (time, currency, rate) tuples.
+    """
+    data = getattr(response, 'response', response)
+    bpi = data.get('bpi', {})
+    updated = data.get('time', {}).get('updatedISO')
+    for key, value in bpi.items():
+        if isinstance(value, dict):
+            yield updated, value.get('code', key), value.get('rate_float')
+        else:
+            yield key, currency, value
+
+
+class PriceExporter(object, metaclass=ABCMeta):
+    """
+    Buffered exporter writing api responses in bounded-size row groups.
+    """
+
+    def __init__(self, path: str, currency: str = 'USD',
+                 row_group_size: int = EXPORT_ROW_GROUP_SIZE, append: bool = False):
+        """
+        Initialize price exporter.
+
+        :param str path: output file path.
+        :param str currency: currency label for historical closes.
+        :param int row_group_size: rows buffered before each write.
+        :param bool append: append to existing file instead of truncating.
+        """
+        if type(row_group_size) is not int or row_group_size < 1:
+            msg = 'Row group size must be positive integer number.'
+            logger.error(f'[PriceExporter] Row group error. {msg}')
+            raise CoindeskAPIExportError(msg)
+        self._path = path
+        self._currency = currency
+        self._row_group_size = row_group_size
+        self._append = append
+        self._buffer = []
+        self._rows = 0
+        self._closed = False
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._path} {self._rows} rows>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def path(self):
+        """
+        Get output file path.
+        """
+        return self._path
+
+    @property
+    def rows(self):
+        """
+        Get number of rows accepted so far.
+        """
+        return self._rows
+
+    def write_row(self, row: tuple):
+        """
+        Buffer single row and flush when the row group is full.
+
+        :param tuple row: (time, currency, rate) row.
+        """
+        if self._closed:
+            msg = f'Exporter for {self._path} is closed.'
+            logger.error(f'[PriceExporter] Export error. {msg}')
+            raise CoindeskAPIExportError(msg)
+        self._buffer.append(row)
+        self._rows += 1
+        if len(self._buffer) >= self._row_group_size:
+            self.flush()
+
+    def write_response(self, response):
+        """
+        Export rows from a single api response.
+
+        :param * response: CoindeskAPIHttpResponse instance or response dict.
+        """
+        for row in iter_response_rows(response, self._currency):
+            self.write_row(row)
+
+    def write_responses(self, responses):
+        """
+        Export rows from an iterable of api responses, e.g. a polling loop.
+
+        :param iterable responses: api responses.
+        :return int: total number of rows accepted.
+        """
+        for response in responses:
+            self.write_response(response)
+        return self._rows
+
+    async def write_stream(self, responses):
+        """
+        Export rows from an asynchronous iterable of api responses.
+
+        :param aiter responses: api responses.
+        :return int: total number of rows accepted.
+        """
+        async for response in responses:
+            self.write_response(response)
+        return self._rows
+
+    def flush(self):
+        """
+        Write buffered rows as one row group.
+        """
+        if not self._buffer: return
+        try:
+            self._write_group(self._buffer)
+        except (OSError, IOError) as err:
+            msg = f'Unable to write export file. {err.args[-1]}.'
+            logger.error(f'[PriceExporter] File error. {msg}')
+            raise CoindeskAPIExportError(msg)
+        self._buffer = []
+
+    def close(self):
+        """
+        Flush pending rows and close output file.
+        """
+        if self._closed: return
+        try:
+            self.flush()
+        finally:
+            self._closed = True
+            self._close_file()
+
+    @abstractmethod
+    def _write_group(self, rows: list):
+        """
+        Write rows to output file as one row group.
+
+        :param list rows: (time, currency, rate) rows.
+        """
+
+    @abstractmethod
+    def _close_file(self):
+        """
+        Finalize and close output file.
+        """
+
+
+class CSVPriceExporter(PriceExporter):
+    """
+    Export api responses to csv file.
+    """
+
+    def __init__(self, path: str, currency: str = 'USD',
+                 row_group_size: int = EXPORT_ROW_GROUP_SIZE, append: bool = False):
+        """
+        Initialize csv price exporter.
+
+        :param str path: output file path.
+        :param str currency: currency label for historical closes.
+        :param int row_group_size: rows buffered before each write.
+        :param bool append: append to existing file instead of truncating.
+        """
+        super(CSVPriceExporter, self).__init__(path, currency, row_group_size, append)
+        has_header = append and exists(path) and getsize(path) > 0
+        try:
+            self._file = open(path, 'a' if append else 'w', newline='',
+                              buffering=EXPORT_CSV_BUFFER_SIZE)
+        except (OSError, IOError) as err:
+            msg = f'Unable to open export file. {err.args[-1]}.'
+            logger.error(f'[CSVPriceExporter] File error. {msg}')
+            raise CoindeskAPIExportError(msg)
+        self._writer = csv.writer(self._file)
+        if not has_header: self._writer.writerow(EXPORT_COLUMNS)
+
+    def _write_group(self, rows: list):
+        self._writer.writerows(rows)
+
+    def _close_file(self):
+        self._file.close()
+
+
+class ParquetPriceExporter(PriceExporter):
+    """
+    Export api responses to parquet file. Requires pyarrow.
+    """
+
+    def __init__(self, path: str, currency: str = 'USD',
+                 row_group_size: int = EXPORT_ROW_GROUP_SIZE, append: bool = False):
+        """
+        Initialize parquet price exporter.
+        Parquet files cannot be reopened for writing, so appending copies the
+        existing row groups one at a time into a new file before new rows.
+        Each append therefore costs a full read and rewrite of the existing
+        file; keep one exporter open rather than reopening it per batch.
+
+        :param str path: output file path.
+        :param str currency: currency label for historical closes.
+        :param int row_group_size: rows buffered before each write.
+        :param bool append: append to existing file, rewriting it once.
+        """
+        super(ParquetPriceExporter, self).__init__(path, currency, row_group_size, append)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            msg = 'Parquet export requires pyarrow package.'
+            logger.error(f'[ParquetPriceExporter] Import error. {msg}')
+            raise CoindeskAPIExportError(msg)
+        self._pa = pa
+        self._schema = pa.schema([
+            ('time', pa.string()), ('currency', pa.string()), ('rate', pa.float64())])
+        self._tmp_path = f'{path}.{os.getpid()}.tmp'
+        self._writer = None
+        try:
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+            if append and exists(path):
+                existing = pq.ParquetFile(path)
+                for group in range(existing.num_row_groups):
+                    self._writer.write_table(existing.read_row_group(group).cast(self._schema))
+        except (OSError, IOError, pa.ArrowException) as err:
+            self._discard_tmp_file()
+            msg = f'Unable to open export file. {err.args[-1]}.'
+            logger.error(f'[ParquetPriceExporter] File error. {msg}')
+            raise CoindeskAPIExportError(msg)
+
+    def _write_group(self, rows: list):
+        columns = list(zip(*rows))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type)
+             for column, field in zip(columns, self._schema)],
+            schema=self._schema)
+        self._writer.write_table(table)
+
+    def _close_file(self):
+        try:
+            self._writer.close()
+            os.replace(self._tmp_path, self._path)
+        finally:
+            self._discard_tmp_file()
+
+    def _discard_tmp_file(self):
+        """
+        Close writer and remove temporary file left by a failed write.
+        """
+        try:
+            if self._writer is not None: self._writer.close()
+        except (OSError, IOError, self._pa.ArrowException):
+            pass
+        if exists(self._tmp_path): os.remove(self._tmp_path)
+
+
+EXPORTERS = {
+    '.csv': CSVPriceExporter,
+    '.parquet': ParquetPriceExporter,
+    '.pq': ParquetPriceExporter,
+}
+
+
+def get_exporter(path: str, fmt: str = None, **kwargs):
+    """
+    Get price exporter for output file format.
+
+    :param str path: output file path.
+    :param str fmt: output format (csv, parquet), inferred from path if None.
+    :return obj: PriceExporter subclass instance.
+    """
+    extension = f'.{fmt.lower()}' if fmt else splitext(path)[1].lower()
+    exporter = EXPORTERS.get(extension)
+    if exporter is None:
+        msg = f'Unsupported export format {extension}.'
+        logger.error(f'[PriceExporter] Format error. {msg}')
+        raise CoindeskAPIExportError(msg)
+    return exporter(path, **kwargs)
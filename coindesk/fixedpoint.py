@@ -0,0 +1,299 @@
+# encoding: utf-8
+
+import operator
+import re
+from array import array
+from decimal import Decimal
+from itertools import repeat
+from logging import getLogger
+
+from . import settings
+from .exceptions import CoindeskAPIHttpResponseError
+
+# Custom logger for fixedpoint module
+logger = getLogger(__name__)
+
+INT64_MAX = (1 << 63) - 1
+
+# Api rate string: optional sign, digits with optional thousands separators
+# and optional decimal digits, e.g. "-9,123.4567"
+RATE_PATTERN = re.compile(r'(-?)(\d{1,3}(?:,\d{3})+|\d+)(?:\.(\d+))?')
+
+
+def parse_rate(rate: str, digits: int = None):
+    """
+    Parse formatted rate string like "9,123.4567" into scaled integer.
+    Decimals beyond digits are truncated.
+
+    :param str rate: api rate string.
+    :param int digits: number of decimal digits kept.
+    :return int: rate scaled by 10 ** digits.
+    """
+    digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+    match = RATE_PATTERN.fullmatch(rate.strip()) if isinstance(rate, str) else None
+    if match is None:
+        msg = f'Unable to parse rate {rate!r}. Expected digits like "9,123.4567".'
+        logger.error(f'[FixedPrice] Rate error. {msg}')
+        raise CoindeskAPIHttpResponseError(msg)
+    sign, whole, fraction = match.groups()
+    value = int(whole.replace(',', '')) * 10 ** digits
+    if fraction and digits:
+        value += int(fraction[:digits].ljust(digits, '0'))
+    return _check_range(-value if sign else value)
+
+
+def parse_float(rate: float, digits: int = None):
+    """
+    Convert float rate into scaled integer, rounding to nearest.
+
+    :param float rate: api rate_float value.
+    :param int digits: number of decimal digits kept.
+    :return int: rate scaled by 10 ** digits.
+    """
+    digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+    return _check_range(round(rate * 10 ** digits))
+
+
+def _to_array(values):
+    """
+    Pack scaled integers into int64 array.
+
+    :param iterable values: scaled integers.
+    :return array: int64 array.
+    """
+    try:
+        return array('q', values)
+    except OverflowError:
+        msg = 'Scaled rate overflows int64.'
+        logger.error(f'[FixedPriceArray] Rate error. {msg}')
+        raise CoindeskAPIHttpResponseError(msg)
+
+
+def _check_range(value: int):
+    """
+    Verify scaled value fits in int64.
+
+    :param int value: scaled integer.
+    :return int: same value.
+    """
+    if not -INT64_MAX - 1 <= value <= INT64_MAX:
+        msg = f'Scaled rate {value} overflows int64.'
+        logger.error(f'[FixedPrice] Rate error. {msg}')
+        raise CoindeskAPIHttpResponseError(msg)
+    return value
+
+
+class FixedPrice(object):
+    """
+    Price stored as int64 scaled by a fixed number of decimal digits.
+    """
+
+    __slots__ = ('value', 'digits')
+
+    def __init__(self, value: int, digits: int = None):
+        """
+        Initialize fixed point price.
+
+        :param int value: price scaled by 10 ** digits.
+        :param int digits: number of decimal digits.
+        """
+        self.value = value
+        self.digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+
+    def __str__(self):
+        """
+        Represent class via decimal string.
+
+        :return str: price decimal representation.
+        """
+        return str(self.to_decimal())
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.value}, {self.digits})'
+
+    @classmethod
+    def from_rate(cls, rate: str, digits: int = None):
+        """
+        Get fixed point price from formatted rate string.
+
+        :param str rate: api rate string like "9,123.4567".
+        :param int digits: number of decimal digits kept.
+        :return cls: FixedPrice class instance.
+        """
+        return cls(parse_rate(rate, digits), digits)
+
+    @classmethod
+    def from_float(cls, rate: float, digits: int = None):
+        """
+        Get fixed point price from float rate.
+
+        :param float rate: api rate_float value.
+        :param int digits: number of decimal digits kept.
+        :return cls: FixedPrice class instance.
+        """
+        return cls(parse_float(rate, digits), digits)
+
+    def _other(self, other):
+        if isinstance(other, FixedPrice):
+            if other.digits != self.digits:
+                msg = f'Cannot combine prices with {self.digits} and {other.digits} digits.'
+                logger.error(f'[FixedPrice] Scale error. {msg}')
+                raise CoindeskAPIHttpResponseError(msg)
+            return other.value
+        return NotImplemented
+
+    def __add__(self, other):
+        value = self._other(other)
+        return value if value is NotImplemented else FixedPrice(_check_range(self.value + value), self.digits)
+
+    def __sub__(self, other):
+        value = self._other(other)
+        return value if value is NotImplemented else FixedPrice(_check_range(self.value - value), self.digits)
+
+    def __mul__(self, factor: int):
+        if not isinstance(factor, int): return NotImplemented
+        return FixedPrice(_check_range(self.value * factor), self.digits)
+
+    __rmul__ = __mul__
+
+    def __neg__(self):
+        return FixedPrice(_check_range(-self.value), self.digits)
+
+    def __eq__(self, other):
+        value = self._other(other)
+        return value if value is NotImplemented else self.value == value
+
+    def __lt__(self, other):
+        value = self._other(other)
+        return value if value is NotImplemented else self.value < value
+
+    def __le__(self, other):
+        value = self._other(other)
+        return value if value is NotImplemented else self.value <= value
+
+    def __hash__(self):
+        return hash((self.value, self.digits))
+
+    def to_decimal(self):
+        """
+        Get exact decimal value.
+
+        :return Decimal: price as decimal.
+        """
+        return Decimal(self.value).scaleb(-self.digits)
+
+    def __float__(self):
+        return self.value / 10 ** self.digits
+
+
+class FixedPriceArray(object):
+    """
+    Compact int64 array of fixed point prices with elementwise arithmetic.
+    Storage is packed, arithmetic is not vectorized: results are computed
+    item by item in Python and packed into a new int64 array.
+    """
+
+    __slots__ = ('values', 'digits')
+
+    def __init__(self, values=(), digits: int = None):
+        """
+        Initialize fixed point price array.
+
+        :param iterable values: prices scaled by 10 ** digits.
+        :param int digits: number of decimal digits.
+        """
+        self.values = values if isinstance(values, array) and values.typecode == 'q' else _to_array(values)
+        self.digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({len(self)} prices, {self.digits} digits)'
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, position: int):
+        if isinstance(position, slice):
+            return FixedPriceArray(self.values[position], self.digits)
+        return FixedPrice(self.values[position], self.digits)
+
+    @classmethod
+    def from_rates(cls, rates, digits: int = None):
+        """
+        Get price array from formatted rate strings.
+
+        :param iterable rates: api rate strings.
+        :param int digits: number of decimal digits kept.
+        :return cls: FixedPriceArray class instance.
+        """
+        digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+        return cls(_to_array(parse_rate(rate, digits) for rate in rates), digits)
+
+    @classmethod
+    def from_floats(cls, rates, digits: int = None):
+        """
+        Get price array from float rates.
+
+        :param iterable rates: api rate_float values.
+        :param int digits: number of decimal digits kept.
+        :return cls: FixedPriceArray class instance.
+        """
+        digits = digits if digits is not None else settings.FIXED_POINT_DIGITS
+        scale = 10 ** digits
+        return cls(_to_array(round(rate * scale) for rate in rates), digits)
+
+    def _values(self, other):
+        if not isinstance(other, (FixedPrice, FixedPriceArray)):
+            return NotImplemented
+        if other.digits != self.digits or isinstance(other, FixedPriceArray) and len(other) != len(self):
+            msg = 'Price arrays must have same length and digits.'
+            logger.error(f'[FixedPriceArray] Shape error. {msg}')
+            raise CoindeskAPIHttpResponseError(msg)
+        return other.values if isinstance(other, FixedPriceArray) else repeat(other.value)
+
+    def _apply(self, function, other):
+        values = self._values(other)
+        if values is NotImplemented: return values
+        return FixedPriceArray(_to_array(map(function, self.values, values)), self.digits)
+
+    def __add__(self, other):
+        return self._apply(operator.add, other)
+
+    def __sub__(self, other):
+        return self._apply(operator.sub, other)
+
+    def __mul__(self, factor: int):
+        if not isinstance(factor, int): return NotImplemented
+        return FixedPriceArray(_to_array(value * factor for value in self.values), self.digits)
+
+    __rmul__ = __mul__
+
+    def sum(self):
+        """
+        Get sum of prices.
+
+        :return obj: FixedPrice total.
+        """
+        return FixedPrice(_check_range(sum(self.values)), self.digits)
+
+    def to_decimals(self):
+        """
+        Lazily convert prices to decimals.
+
+        :return generator: Decimal per price.
+        """
+        exponent = -self.digits
+        return (Decimal(value).scaleb(exponent) for value in self.values)
+
+
+def get_fixed_prices(response, digits: int = None):
+    """
+    Get fixed point prices per currency from currentprice rate strings.
+
+    :param * response: CoindeskAPIHttpResponse instance or response dict.
+    :param int digits: number of decimal digits kept.
+    :return dict: FixedPrice keyed by currency code.
+    """
+    data = getattr(response, 'response', response)
+    return {code: FixedPrice.from_rate(quote['rate'], digits) if 'rate' in quote
+            else FixedPrice.from_float(quote['rate_float'], digits)
+            for code, quote in data.get('bpi', {}).items()}
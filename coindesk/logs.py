@@ -0,0 +1,171 @@
+# encoding: utf-8
+
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from itertools import count
+from logging import getLogger
+
+from . import settings
+
+# Custom logger for logs module
+logger = getLogger(__name__)
+
+# Name of the package logger every coindesk module logger propagates to
+PACKAGE_LOGGER = __name__.rsplit('.', 1)[0]
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep every warning or error record, sample and rate limit the rest.
+    """
+
+    def __init__(self, sample_rate: int = 1, max_per_second: int = None, prefix: str = PACKAGE_LOGGER):
+        """
+        Initialize sampling filter.
+
+        :param int sample_rate: keep one in sample_rate low level records.
+        :param int max_per_second: upper bound of low level records per second.
+        :param str prefix: logger name prefix the filter applies to.
+        """
+        super(SamplingFilter, self).__init__()
+        self._sample_rate = max(1, sample_rate)
+        self._max_per_second = max_per_second
+        self._prefix = prefix
+        self._counter = count()
+        self._window = 0
+        self._window_count = 0
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord):
+        if record.levelno >= logging.WARNING or not record.name.startswith(self._prefix):
+            return True
+        if next(self._counter) % self._sample_rate:
+            self.dropped += 1
+            return False
+        if self._max_per_second is not None:
+            window = int(time.monotonic())
+            if window != self._window:
+                self._window, self._window_count = window, 0
+            self._window_count += 1
+            if self._window_count > self._max_per_second:
+                self.dropped += 1
+                return False
+        return True
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    Keep the most recent log records in memory without formatting them.
+    """
+
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize ring buffer handler.
+
+        :param int capacity: maximum number of records kept.
+        """
+        super(RingBufferHandler, self).__init__(logging.DEBUG)
+        self._records = deque(maxlen=capacity)
+        self.setFormatter(logging.Formatter(settings.LOG_FORMAT))
+
+    def emit(self, record: logging.LogRecord):
+        self._records.append(record)
+
+    @property
+    def records(self):
+        """
+        Get buffered log records, oldest first.
+        """
+        return list(self._records)
+
+    def clear(self):
+        """
+        Drop every buffered record.
+        """
+        self._records.clear()
+
+    def dump(self, stream=None, clear: bool = True):
+        """
+        Format and write buffered records, e.g. after a failed request.
+
+        :param obj stream: writable text stream, stderr by default.
+        :param bool clear: drop records once written.
+        :return int: number of records written.
+        """
+        stream = stream if stream is not None else sys.stderr
+        records = self.records
+        for record in records:
+            stream.write(self.format(record) + '\n')
+        stream.flush()
+        if clear: self.clear()
+        return len(records)
+
+
+_lock = threading.Lock()
+_hot_path = {}
+
+
+def enable_hot_path_logging(sample_rate: int = None, max_per_second: int = None,
+                            buffer_size: int = None):
+    """
+    Enable low overhead logging for high request rates.
+    Low level records of coindesk loggers are sampled before reaching output
+    handlers while every record is kept in an in-memory ring buffer.
+
+    :param int sample_rate: keep one in sample_rate info records.
+    :param int max_per_second: upper bound of info records emitted per second.
+    :param int buffer_size: number of recent records kept in memory.
+    :return obj: ring buffer handler holding recent records.
+    """
+    sample_rate = sample_rate if sample_rate is not None else settings.LOG_SAMPLE_RATE
+    buffer_size = buffer_size if buffer_size is not None else settings.LOG_BUFFER_SIZE
+    with _lock:
+        _disable_hot_path_logging()
+        # One filter per handler, so each record advances every counter once
+        filters = [(handler, SamplingFilter(sample_rate, max_per_second))
+                   for handler in logging.getLogger().handlers]
+        for handler, sampling_filter in filters:
+            handler.addFilter(sampling_filter)
+        ring_buffer = RingBufferHandler(buffer_size)
+        logging.getLogger(PACKAGE_LOGGER).addHandler(ring_buffer)
+        _hot_path.update(filters=filters, buffer=ring_buffer)
+    return ring_buffer
+
+
+def disable_hot_path_logging():
+    """
+    Restore default logging of every record.
+    """
+    with _lock:
+        _disable_hot_path_logging()
+
+
+def _disable_hot_path_logging():
+    if not _hot_path: return
+    for handler, sampling_filter in _hot_path['filters']:
+        handler.removeFilter(sampling_filter)
+    logging.getLogger(PACKAGE_LOGGER).removeHandler(_hot_path['buffer'])
+    _hot_path.clear()
+
+
+def get_recent_events():
+    """
+    Get ring buffer handler if hot path logging is enabled.
+
+    :return obj: ring buffer handler or None.
+    """
+    return _hot_path.get('buffer')
+
+
+def dump_recent_events(stream=None):
+    """
+    Write recent request events if hot path logging is enabled.
+
+    :param obj stream: writable text stream, stderr by default.
+    :return int: number of records written.
+    """
+    ring_buffer = get_recent_events()
+    return ring_buffer.dump(stream) if ring_buffer is not None else 0
@@ -0,0 +1,159 @@
+# encoding: utf-8
+
+import asyncio
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+from logging import getLogger
+
+from . import settings, utils
+from .client import CoindeskAPIHttpRequest
+from .decorators import async_event_loop
+from .scheduler import PriorityScheduler
+from .specs import RequestSpec
+
+# Custom logger for planner module
+logger = getLogger(__name__)
+
+
+def merge_ranges(ranges: list):
+    """
+    Merge overlapping or adjacent inclusive date ranges.
+
+    :param list ranges: (start, end) YYYY-MM-DD string pairs.
+    :return list: minimal sorted (start, end) string pairs covering every range.
+    """
+    merged = []
+    for start, end in sorted((date.fromisoformat(start), date.fromisoformat(end)) for start, end in ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            if end > merged[-1][1]: merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return [(start.isoformat(), end.isoformat()) for start, end in merged]
+
+
+class HistoricalRequestPlanner(object):
+    """
+    Coalesce historical queries issued within a short window into minimal fetches.
+    """
+
+    def __init__(self, window: float = None, request: CoindeskAPIHttpRequest = None,
+                 scheduler: PriorityScheduler = None, priority: str = None):
+        """
+        Initialize historical request planner.
+
+        :param float window: seconds pending queries are collected before fetching.
+        :param obj request: request settings and transport used for fetches.
+        :param obj scheduler: PriorityScheduler fetches take request slots from.
+        :param str priority: priority class of fetches, settings.PLANNER_PRIORITY if None.
+        """
+        self._window = window if window is not None else settings.PLANNER_WINDOW
+        self._request = request if request is not None else CoindeskAPIHttpRequest()
+        if scheduler is not None:
+            self._request = scheduler.request(self._request, priority or settings.PLANNER_PRIORITY)
+        self._pending = []
+        self._flusher = None
+        self._flushes = set()
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.stats["queries"]} queries in {self.stats["fetches"]} fetches>'
+
+    async def get(self, start: str, end: str, index: str = 'USD', currency: str = 'USD'):
+        """
+        Get historical closes for date range, sharing upstream fetches with
+        overlapping queries issued within the planner window.
+
+        :param str start: first date YYYY-MM-DD.
+        :param str end: last date YYYY-MM-DD.
+        :param str index: price index (USD, CNY).
+        :param str currency: currency to fetch data in.
+        :return dict: historical api response data restricted to the range.
+        """
+        params = {settings.INDEX_PARAM: index, settings.CURRENCY_PARAM: currency,
+                  settings.START_PARAM: start, settings.END_PARAM: end}
+        params = utils.validate_params(settings.API_HISTORICAL_DATA_TYPE, params)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append(((index, currency), params[settings.START_PARAM],
+                              params[settings.END_PARAM], future))
+        self.stats['queries'] += 1
+        if self._flusher is None:
+            self._flusher = loop.call_later(self._window, self._start_flush, loop)
+        return await future
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop):
+        """
+        Start flush task, keeping a reference so it is not garbage collected
+        while in flight.
+        """
+        flush = loop.create_task(self._flush())
+        self._flushes.add(flush)
+        flush.add_done_callback(self._flushes.discard)
+
+    @async_event_loop
+    async def get_many(self, queries: list):
+        """
+        Get historical closes for many queries at once.
+
+        :param list queries: dicts with start, end and optional index and currency.
+        :return list: historical api response data per query, in query order.
+        """
+        return await asyncio.gather(*(self.get(**query) for query in queries))
+
+    async def _flush(self):
+        """
+        Merge pending queries per (index, currency) and resolve them.
+        """
+        pending, self._pending, self._flusher = self._pending, [], None
+        groups = defaultdict(list)
+        for key, start, end, future in pending:
+            groups[key].append((start, end, future))
+        try:
+            async with self._request.transport.session() as session:
+                fetches = [self._fetch_group(session, key, queries) for key, queries in groups.items()]
+                await asyncio.gather(*fetches)
+        except Exception as err:
+            for *_, future in pending:
+                if not future.done(): future.set_exception(err)
+
+    async def _fetch_group(self, session, key: tuple, queries: list):
+        """
+        Fetch merged ranges of one (index, currency) and split results back.
+
+        :param obj session: session yielded by the transport.
+        :param tuple key: index and currency.
+        :param list queries: (start, end, future) of each caller.
+        """
+        ranges = merge_ranges([(start, end) for start, end, _ in queries])
+        self.stats['fetches'] += len(ranges)
+        logger.info('[HistoricalRequestPlanner] Merged %d queries into %d fetches for %s.',
+                    len(queries), len(ranges), key)
+        results = await asyncio.gather(*(self._fetch_range(session, key, start, end)
+                                         for start, end in ranges), return_exceptions=True)
+        for start, end, future in queries:
+            if future.done(): continue
+            for (range_start, range_end), data in zip(ranges, results):
+                if range_start <= start and end <= range_end:
+                    break
+            if isinstance(data, Exception):
+                future.set_exception(data)
+                continue
+            bpi = {day: close for day, close in data.get('bpi', {}).items() if start <= day <= end}
+            future.set_result(dict(data, bpi=bpi))
+
+    async def _fetch_range(self, session, key: tuple, start: str, end: str):
+        """
+        Fetch historical closes for merged date range.
+
+        :return dict: historical api response data.
+        """
+        index, currency = key
+        spec = RequestSpec(settings.API_HISTORICAL_DATA_TYPE, currency=currency, index=index,
+                           start=start, end=end)
+        return await self._request.execute(session, spec)
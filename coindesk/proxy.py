@@ -0,0 +1,290 @@
+# encoding: utf-8
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from collections import Counter
+from contextlib import AsyncExitStack
+from logging import getLogger
+
+from aiohttp import web
+from furl import furl as URL
+
+from . import settings
+from .client import CoindeskAPIHttpRequest, CoindeskAPIHttpResponse
+from .exceptions import BaseError, CoindeskAPIHttpResponseError
+from .scheduler import PriorityScheduler
+from .specs import RequestSpec
+from .warmup import warmup_async
+
+# Custom logger for proxy module
+logger = getLogger(__name__)
+
+
+class ProxyEntry(object):
+    """
+    Precomputed upstream response served to every proxy client.
+    """
+
+    __slots__ = ('body', 'headers', 'fetched_at')
+
+    def __init__(self, body: bytes, content_type: str, ttl: float):
+        self.body = body
+        self.headers = {'Content-Type': content_type, 'Cache-Control': f'max-age={int(ttl)}'}
+        self.fetched_at = time.monotonic()
+
+    @property
+    def age(self):
+        """
+        Get seconds since response was fetched.
+        """
+        return time.monotonic() - self.fetched_at
+
+
+class CoindeskProxy(object):
+    """
+    Serve Coindesk API compatible endpoints from cached, coalesced upstream fetches.
+    """
+
+    def __init__(self, request: CoindeskAPIHttpRequest = None, ttls: dict = None,
+                 max_entries: int = None, warmup: bool = None, scheduler: PriorityScheduler = None,
+                 priority: str = None):
+        """
+        Initialize caching proxy.
+
+        :param obj request: request settings and transport used for upstream fetches,
+            by default few retries so a dead upstream fails fast and stale entries are served.
+        :param dict ttls: seconds responses are cached per data type.
+        :param int max_entries: maximum number of cached responses.
+        :param bool warmup: warm up client and connection pool on startup.
+        :param obj scheduler: PriorityScheduler upstream fetches take request slots from.
+        :param str priority: priority class of upstream fetches, settings.PROXY_PRIORITY if None.
+        """
+        self._request = request if request is not None else CoindeskAPIHttpRequest(
+            retries=settings.PROXY_RETRIES, timeout=settings.PROXY_TIMEOUT)
+        if scheduler is not None:
+            self._request = scheduler.request(self._request, priority or settings.PROXY_PRIORITY)
+        self._ttls = dict(settings.PROXY_TTLS, **(ttls or {}))
+        self._max_entries = max_entries or settings.PROXY_MAX_ENTRIES
+        self._entries = {}
+        self._upstream = {}
+        self._inflight = {}
+        self._session = None
+        self._exit_stack = None
+        self._warmup = warmup if warmup is not None else settings.PROXY_WARMUP
+        self.warmup_report = None
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {len(self._upstream)} cached responses, hit ratio {self.hit_ratio:.2%}>'
+
+    @property
+    def hit_ratio(self):
+        """
+        Get ratio of requests served without waiting for upstream.
+        """
+        return self.stats['hits'] / self.stats['requests'] if self.stats['requests'] else 0.0
+
+    def get_app(self):
+        """
+        Get aiohttp application exposing the proxy endpoints.
+
+        :return obj: aiohttp web application.
+        """
+        path = settings.API_PATH.rstrip('/')
+        app = web.Application()
+        app.add_routes([
+            web.get(f'{path}/{settings.API_CURRENTPRICE_DATA_TYPE}.json', self.currentprice),
+            web.get(f'{path}/{settings.API_CURRENTPRICE_DATA_TYPE}/{{currency}}.json', self.currentprice),
+            web.get(f'{path}/{settings.API_HISTORICAL_ENDPOINT}', self.historical),
+            web.get(f'{path}/{settings.API_SUPPORTED_CURRENCIES_ENDPOINT}', self.supported_currencies),
+            web.get(settings.PROXY_STATS_PATH, self.get_stats),
+        ])
+        app.on_startup.append(self._open_session)
+        app.on_cleanup.append(self._close_session)
+        return app
+
+    async def _open_session(self, app):
+        self._exit_stack = AsyncExitStack()
+        self._session = await self._exit_stack.enter_async_context(self._request.transport.session())
+        if self._warmup:
+            self.warmup_report = await warmup_async(self._session)
+
+    async def _close_session(self, app):
+        await self._exit_stack.aclose()
+        self._session = self._exit_stack = None
+
+    async def currentprice(self, request: web.Request):
+        """
+        Serve currentprice for default currencies or currency in path.
+        """
+        currency = request.match_info.get('currency')
+        params = {settings.CURRENCY_PARAM: currency} if currency else {}
+        return await self.serve(request, settings.API_CURRENTPRICE_DATA_TYPE, params)
+
+    async def historical(self, request: web.Request):
+        """
+        Serve historical closes for query string parameters.
+        """
+        return await self.serve(request, settings.API_HISTORICAL_DATA_TYPE, dict(request.query))
+
+    async def supported_currencies(self, request: web.Request):
+        """
+        Serve supported currencies list.
+        """
+        return await self.serve(request, settings.API_SUPPORTED_CURRENCIES_DATA_TYPE, {})
+
+    async def get_stats(self, request: web.Request):
+        """
+        Serve proxy cache and upstream counters.
+        """
+        stats = dict(self.stats, hit_ratio=self.hit_ratio, entries=len(self._upstream))
+        return web.json_response(stats)
+
+    async def serve(self, request: web.Request, data_type: str, params: dict):
+        """
+        Serve cached response, fetching it from upstream once expired.
+
+        :param obj request: proxy http request.
+        :param str data_type: type of data to fetch.
+        :param dict params: api query parameters.
+        :return obj: aiohttp web response.
+        """
+        self.stats['requests'] += 1
+        ttl = self._ttls[data_type]
+        entry = self._entries.get(request.path_qs)
+        if entry is not None and entry.age < ttl:
+            self.stats['hits'] += 1
+            return web.Response(body=entry.body, headers=entry.headers)
+        try:
+            url, currency = self._get_upstream_url(data_type, params)
+        except BaseError as err:
+            return self._error_response(400, err)
+        entry = self._upstream.get(url)
+        if entry is None or entry.age >= ttl:
+            try:
+                entry = await self._fetch_coalesced(url, data_type, currency, ttl)
+            except Exception as err:
+                self.stats['upstream_errors'] += 1
+                logger.warning(f'[CoindeskProxy] Upstream error. {err}.')
+                if entry is None or entry.age >= settings.PROXY_STALE_IF_ERROR:
+                    return self._error_response(502, err)
+                self.stats['stale'] += 1
+        else:
+            self.stats['hits'] += 1
+        self._store(self._entries, request.path_qs, entry)
+        return web.Response(body=entry.body, headers=entry.headers)
+
+    def _get_upstream_url(self, data_type: str, params: dict):
+        """
+        Validate request parameters and get upstream api url.
+
+        :return tuple: upstream url and requested currency.
+        """
+        if data_type == settings.API_SUPPORTED_CURRENCIES_DATA_TYPE:
+            path = f'{settings.API_PATH.rstrip("/")}/{settings.API_SUPPORTED_CURRENCIES_ENDPOINT}'
+            return URL(scheme=settings.API_PROTOCOL, host=settings.API_HOST, path=path).url, None
+        spec = RequestSpec.from_params(data_type, params)
+        currency = spec.currency if data_type == settings.API_CURRENTPRICE_DATA_TYPE else None
+        return spec.url, currency
+
+    async def _fetch_coalesced(self, url: str, data_type: str, currency: str, ttl: float):
+        """
+        Fetch upstream response, sharing one fetch between concurrent misses.
+
+        :return obj: ProxyEntry instance.
+        """
+        future = self._inflight.get(url)
+        if future is not None:
+            self.stats['coalesced'] += 1
+            return await asyncio.shield(future)
+        self.stats['misses'] += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[url] = future
+        try:
+            entry = await self._fetch(url, data_type, currency, ttl)
+            future.set_result(entry)
+            return entry
+        except Exception as err:
+            future.set_exception(err)
+            # Mark exception retrieved when no concurrent caller waits for it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[url]
+
+    async def _fetch(self, url: str, data_type: str, currency: str, ttl: float):
+        """
+        Fetch and validate upstream response.
+
+        :return obj: ProxyEntry instance.
+        """
+        self.stats['upstream'] += 1
+        response = await self._request.fetch_raw(self._session, url)
+        body = response.body
+        try:
+            data = response.json()
+        except ValueError as err:
+            msg = f'Could not decode upstream response. {err.args[0]}.'
+            logger.error(f'[CoindeskProxy] Response error. {msg}')
+            raise CoindeskAPIHttpResponseError(msg)
+        if data_type in settings.VALID_DATA_TYPES:
+            CoindeskAPIHttpResponse.parse(data, data_type, currency)
+        content_type = response.headers.get('Content-Type', 'application/json')
+        entry = ProxyEntry(body, content_type, ttl)
+        self._store(self._upstream, url, entry)
+        return entry
+
+    def _store(self, entries: dict, key: str, entry: ProxyEntry):
+        """
+        Index entry by proxy request path or upstream url, evicting oldest
+        entries once over the limit.
+        """
+        entries.pop(key, None)
+        entries[key] = entry
+        while len(entries) > self._max_entries:
+            del entries[next(iter(entries))]
+
+    def _error_response(self, status: int, err: Exception):
+        return web.json_response({'error': str(err)}, status=status)
+
+
+def get_parser():
+    """
+    Get proxy command line arguments parser.
+
+    :return obj: argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog='coindesk-proxy',
+        description='Serve Coindesk API compatible endpoints from a local cache.')
+    parser.add_argument('--host', default=settings.PROXY_HOST, help='interface to listen on')
+    parser.add_argument('-p', '--port', type=int, default=settings.PROXY_PORT, help='port to listen on')
+    parser.add_argument('-v', '--verbose', action='store_true', help='log requests to stderr')
+    return parser
+
+
+def main(argv: list = None):
+    """
+    Run caching proxy entry point.
+
+    :param list argv: command line arguments.
+    :return int: process exit status.
+    """
+    args = get_parser().parse_args(argv)
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    web.run_app(CoindeskProxy().get_app(), host=args.host, port=args.port, print=None)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
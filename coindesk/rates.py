@@ -0,0 +1,163 @@
+# encoding: utf-8
+
+from array import array
+from logging import getLogger
+
+from .exceptions import CoindeskAPIHttpResponseError
+
+# Custom logger for rates module
+logger = getLogger(__name__)
+
+
+def get_bitcoin_rates(*responses):
+    """
+    Collect Bitcoin rate per currency from currentprice api responses.
+    Later responses overwrite earlier rates for the same currency.
+
+    :param tuple responses: CoindeskAPIHttpResponse instances or response dicts.
+    :return dict: Bitcoin rate keyed by currency code.
+    """
+    rates = {}
+    for response in responses:
+        data = getattr(response, 'response', response)
+        for code, quote in data.get('bpi', {}).items():
+            if not isinstance(quote, dict):
+                msg = f'Response for {code} is not currentprice data.'
+                logger.error(f'[CrossRateMatrix] Response error. {msg}')
+                raise CoindeskAPIHttpResponseError(msg)
+            rate = quote.get('rate_float')
+            if rate is None:
+                rate = float(quote.get('rate', '0').replace(',', ''))
+            rates[quote.get('code', code)] = float(rate)
+    return rates
+
+
+class CrossRateMatrix(object):
+    """
+    Fiat to fiat cross rates derived from Bitcoin current prices.
+    """
+
+    def __init__(self, rates: dict):
+        """
+        Initialize cross rate matrix.
+
+        :param dict rates: Bitcoin rate keyed by currency code.
+        """
+        for code, rate in rates.items():
+            if not rate > 0:
+                msg = f'Bitcoin rate for {code} must be positive.'
+                logger.error(f'[CrossRateMatrix] Rate error. {msg}')
+                raise CoindeskAPIHttpResponseError(msg)
+        self._currencies = tuple(rates)
+        self._index = {code: position for position, code in enumerate(self._currencies)}
+        self._rates = array('d', rates.values())
+        # Row i holds the price of one unit of currency i in every currency j
+        inverse = [1.0 / rate for rate in self._rates]
+        self._matrix = array('d', [quote * base for base in inverse for quote in self._rates])
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {len(self)}x{len(self)} cross rates>'
+
+    def __len__(self):
+        """
+        Get number of currencies in the matrix.
+
+        :return int: matrix dimension.
+        """
+        return len(self._currencies)
+
+    def __contains__(self, currency: str):
+        return currency in self._index
+
+    def __getitem__(self, pair: tuple):
+        """
+        Get cross rate for (base, quote) currency pair.
+
+        :param tuple pair: base and quote currency codes.
+        :return float: amount of quote currency per base currency unit.
+        """
+        return self.rate(*pair)
+
+    @classmethod
+    def from_responses(cls, *responses):
+        """
+        Get cross rate matrix from one or more currentprice api responses.
+
+        :param tuple responses: CoindeskAPIHttpResponse instances or response dicts.
+        :return cls: CrossRateMatrix class instance.
+        """
+        return cls(get_bitcoin_rates(*responses))
+
+    @property
+    def currencies(self):
+        """
+        Get currency codes in matrix order.
+        """
+        return self._currencies
+
+    @property
+    def bitcoin_rates(self):
+        """
+        Get Bitcoin rates in matrix order.
+        """
+        return self._rates
+
+    @property
+    def matrix(self):
+        """
+        Get row-major flat cross rate matrix.
+
+        :return array: N*N float64 array, base currencies as rows.
+        """
+        return self._matrix
+
+    def position(self, currency: str):
+        """
+        Get matrix position of currency.
+
+        :param str currency: currency code.
+        :return int: row/column index of currency.
+        """
+        try:
+            return self._index[currency]
+        except KeyError:
+            msg = f'Currency {currency} not in cross rate matrix.'
+            logger.error(f'[CrossRateMatrix] Currency error. {msg}')
+            raise CoindeskAPIHttpResponseError(msg)
+
+    def rate(self, base: str, quote: str):
+        """
+        Get cross rate for currency pair.
+
+        :param str base: base currency code.
+        :param str quote: quote currency code.
+        :return float: amount of quote currency per base currency unit.
+        """
+        return self._matrix[self.position(base) * len(self._currencies) + self.position(quote)]
+
+    def row(self, base: str):
+        """
+        Get cross rates of base currency against every currency.
+
+        :param str base: base currency code.
+        :return memoryview: float64 rates in matrix order.
+        """
+        size = len(self._currencies)
+        start = self.position(base) * size
+        return memoryview(self._matrix)[start:start + size]
+
+    def to_dict(self):
+        """
+        Get cross rates as nested dict.
+
+        :return dict: rates keyed by base then quote currency.
+        """
+        size = len(self._currencies)
+        return {base: dict(zip(self._currencies, self._matrix[i * size:(i + 1) * size]))
+                for i, base in enumerate(self._currencies)}
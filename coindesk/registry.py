@@ -0,0 +1,227 @@
+# encoding: utf-8
+
+import json
+import os
+import tempfile
+import threading
+import time
+from logging import getLogger
+from os.path import dirname, getmtime, join
+
+from . import settings
+from .exceptions import CoindeskAPIClientError
+
+# Custom logger for registry module
+logger = getLogger(__name__)
+
+
+class CurrencyRegistry(object):
+    """
+    In-memory supported currencies refreshed in background on a ttl.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl: int = None, fetch=None):
+        """
+        Initialize currency registry. Data is loaded lazily on first access.
+
+        :param str cache_dir: directory holding the refreshed currencies file.
+        :param int ttl: seconds before data is refreshed, None disables refresh.
+        :param callable fetch: function returning supported currencies list.
+        """
+        self._cache_dir = cache_dir
+        self._ttl = ttl
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._state = None
+        self._fetched_at = 0.0
+        self._next_refresh = 0.0
+        self._failures = 0
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {len(self.codes)} currencies>'
+
+    @property
+    def cache_file(self):
+        """
+        Get refreshed currencies cache file path.
+        """
+        cache_dir = self._cache_dir or settings.CURRENCIES_CACHE_DIR
+        return join(cache_dir, settings.CURRENCIES_CACHE_FILE)
+
+    @property
+    def ttl(self):
+        """
+        Get seconds before currencies data is refreshed.
+        """
+        return self._ttl if self._ttl is not None else settings.CURRENCIES_REFRESH_TTL
+
+    @property
+    def currencies(self):
+        """
+        Get supported currencies list without blocking on refresh.
+
+        :return list: supported currencies dicts.
+        """
+        return self._get_state()[0]
+
+    @property
+    def codes(self):
+        """
+        Get supported currency codes.
+
+        :return frozenset: supported currency codes.
+        """
+        return self._get_state()[1]
+
+    def _get_state(self):
+        """
+        Get current (currencies, codes) pair, scheduling refresh when stale.
+
+        :return tuple: currencies list and codes set.
+        """
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None: self._load()
+                state = self._state
+        ttl = self.ttl
+        if ttl is not None and time.time() >= max(self._fetched_at + ttl, self._next_refresh):
+            self.refresh_async()
+        return state
+
+    def _load(self):
+        """
+        Load currencies from cache file, falling back to packaged file.
+        """
+        for path in (self.cache_file, join(dirname(__file__), 'currencies.json')):
+            try:
+                with open(path) as currencies_file:
+                    currencies = json.load(currencies_file).get('SUPPORTED_CURRENCIES')
+                # The packaged file is as fresh as the installed package
+                fetched_at = getmtime(path)
+            except (OSError, IOError, ValueError, AttributeError) as err:
+                logger.debug(f'[CurrencyRegistry] File skipped. {path}: {err}.')
+                continue
+            if currencies:
+                self._swap(currencies, fetched_at)
+                return
+        msg = 'Unable to read currencies file.'
+        logger.error(f'[CurrencyRegistry] File error. {msg}')
+        raise CoindeskAPIClientError(msg)
+
+    def _swap(self, currencies: list, fetched_at: float):
+        """
+        Replace in-memory state with a single reference assignment.
+
+        :param list currencies: supported currencies dicts.
+        :param float fetched_at: timestamp of currencies data.
+        """
+        codes = frozenset(currency['currency'] for currency in currencies)
+        self._state = (currencies, codes)
+        self._fetched_at = fetched_at
+
+    def _reload_if_newer(self):
+        """
+        Pick up cache file refreshed by another process.
+
+        :return bool: whether newer data was loaded.
+        """
+        try:
+            if getmtime(self.cache_file) <= self._fetched_at: return False
+            with open(self.cache_file) as currencies_file:
+                currencies = json.load(currencies_file).get('SUPPORTED_CURRENCIES')
+        except (OSError, IOError, ValueError, AttributeError):
+            return False
+        if not currencies: return False
+        self._swap(currencies, getmtime(self.cache_file))
+        return True
+
+    def update(self, currencies: list):
+        """
+        Replace supported currencies in memory and in the cache file.
+        The file is written to a temporary file and atomically renamed.
+
+        :param list currencies: Coindesk API supported currencies.
+        :return bool: whether cache file was written.
+        """
+        self._swap(currencies, time.time())
+        cache_file = self.cache_file
+        cache_dir = dirname(cache_file)
+        tmp_path = None
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile('w', dir=cache_dir, suffix='.tmp', delete=False) as outfile:
+                tmp_path = outfile.name
+                json.dump({'SUPPORTED_CURRENCIES': currencies}, outfile, indent=2)
+                outfile.flush()
+                os.fsync(outfile.fileno())
+            os.replace(tmp_path, cache_file)
+        except (OSError, IOError) as err:
+            if tmp_path is not None and os.path.exists(tmp_path): os.unlink(tmp_path)
+            msg = f'Unable to write currencies file. {err.args[-1]}.'
+            logger.warning(f'[CurrencyRegistry] File error. {msg}')
+            return False
+        self._fetched_at = getmtime(cache_file)
+        logger.info('[CurrencyRegistry] File updated. Currencies cache file successfully updated.')
+        return True
+
+    def refresh(self):
+        """
+        Fetch supported currencies and update registry, blocking the caller.
+
+        :return bool: whether currencies were refreshed.
+        """
+        if self._reload_if_newer(): return True
+        try:
+            currencies = (self._fetch or self._fetch_supported_currencies)()
+            if not currencies or not all('currency' in currency for currency in currencies):
+                raise ValueError('Unexpected supported currencies data')
+        except Exception as err:
+            # Back off exponentially, so offline processes stop trying after a few attempts
+            self._failures += 1
+            delay = settings.CURRENCIES_REFRESH_RETRY * 2 ** (self._failures - 1)
+            self._next_refresh = time.time() + min(delay, self.ttl or delay)
+            logger.warning(f'[CurrencyRegistry] Refresh error. {err}.')
+            return False
+        self._failures = 0
+        self.update(currencies)
+        return True
+
+    def refresh_async(self):
+        """
+        Refresh supported currencies in a daemon thread if not already running.
+
+        :return obj: refresher thread.
+        """
+        with self._lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return self._refresher
+            self._next_refresh = time.time() + settings.CURRENCIES_REFRESH_RETRY
+            self._refresher = threading.Thread(
+                target=self.refresh, name='coindesk-currencies-refresh', daemon=True)
+            self._refresher.start()
+            return self._refresher
+
+    @staticmethod
+    def _fetch_supported_currencies():
+        """
+        Fetch supported currencies list from Coindesk API in a single attempt,
+        failed refreshes are retried on the registry backoff schedule.
+
+        :return list: supported currencies dicts.
+        """
+        from .client import CoindeskAPIHttpRequest
+        resource = settings.API_ENDPOINTS.get(settings.API_SUPPORTED_CURRENCIES_DATA_TYPE)
+        url = f'{settings.API_PROTOCOL}://{settings.API_HOST}{settings.API_PATH}/{resource}'
+        return CoindeskAPIHttpRequest(retries=1, backoff=False).get(url)
+
+
+# Process-wide supported currencies registry
+currency_registry = CurrencyRegistry()
@@ -0,0 +1,260 @@
+# encoding: utf-8
+
+import asyncio
+import time
+from logging import getLogger
+
+from aiohttp import ClientError
+
+from . import deadlines, settings, utils
+from .exceptions import CoindeskAPIHttpRequestError
+from .transport import BaseTransport, HttpTransport, _open_transports
+
+# Custom logger for routing module
+logger = getLogger(__name__)
+
+# Errors after which a request fails over to the next endpoint
+FAILOVER_ERRORS = (ClientError, asyncio.TimeoutError, OSError, CoindeskAPIHttpRequestError)
+
+
+def get_default_base_url():
+    """
+    Get base url requests are built against.
+
+    :return str: default api base url.
+    """
+    return f'{settings.API_PROTOCOL}://{settings.API_HOST}/{settings.API_PATH.strip("/")}'
+
+
+class Endpoint(object):
+    """
+    Upstream base url with moving averages of latency and error rate.
+    """
+
+    __slots__ = ('base_url', 'latency', 'error_rate', 'failures', 'down', 'probe_at',
+                 'requests', 'errors')
+
+    def __init__(self, base_url: str):
+        """
+        Initialize endpoint.
+
+        :param str base_url: url replacing the default api base url.
+        """
+        self.base_url = utils.validate_url(base_url.rstrip('/'))
+        self.latency = None
+        self.error_rate = 0.0
+        self.failures = 0
+        self.down = False
+        self.probe_at = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        latency = f'{self.latency * 1000:.1f} ms' if self.latency is not None else 'unknown'
+        state = 'down' if self.down else 'up'
+        return f'<{classname} - {self.base_url} {state}, latency {latency}, errors {self.error_rate:.1%}>'
+
+    @property
+    def score(self):
+        """
+        Get routing score, lower is better. Unmeasured endpoints score best
+        so every endpoint gets measured, unless they failed before ever
+        answering, which counts as ROUTING_FAILED_LATENCY.
+        """
+        latency = self.latency
+        if latency is None: latency = settings.ROUTING_FAILED_LATENCY if self.errors else 0.0
+        return latency * (1 + settings.ROUTING_ERROR_PENALTY * self.error_rate)
+
+    def record_success(self, latency: float):
+        """
+        Update moving averages after a successful request.
+
+        :param float latency: seconds until response headers.
+        """
+        alpha = settings.ROUTING_EWMA_ALPHA
+        self.requests += 1
+        self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        self.error_rate = (1 - alpha) * self.error_rate
+        self.failures = 0
+        self.down = False
+
+    def record_failure(self):
+        """
+        Update moving averages after a failed request, taking the endpoint
+        out of rotation after too many consecutive failures.
+        """
+        alpha = settings.ROUTING_EWMA_ALPHA
+        self.requests += 1
+        self.errors += 1
+        self.error_rate = alpha + (1 - alpha) * self.error_rate
+        self.failures += 1
+        if self.failures >= settings.ROUTING_MAX_FAILURES and not self.down:
+            self.down = True
+            self.probe_at = time.monotonic() + settings.ROUTING_PROBE_INTERVAL
+            logger.warning(f'[RoutingTransport] Endpoint down. {self.base_url}.')
+
+
+class RoutingTransport(BaseTransport):
+    """
+    Send each request to the best scoring of several equivalent upstreams,
+    failing over to the next one on errors or timeouts.
+    """
+
+    enforces_timeout = True
+
+    def __init__(self, base_urls: list, transport: BaseTransport = None):
+        """
+        Initialize routing transport.
+
+        :param list base_urls: equivalent api base urls like https://host/v1/bpi.
+        :param obj transport: transport performing the actual requests.
+        """
+        if not base_urls:
+            msg = 'Routing transport needs at least one base url.'
+            logger.error(f'[RoutingTransport] Config error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        self._endpoints = [Endpoint(base_url) for base_url in base_urls]
+        self._transport = transport if transport is not None else HttpTransport()
+        self._default_base_url = get_default_base_url()
+        self._probes = set()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        up = sum(not endpoint.down for endpoint in self._endpoints)
+        return f'<{classname} - {up}/{len(self._endpoints)} endpoints up>'
+
+    @property
+    def endpoints(self):
+        """
+        Get endpoints in routing order.
+        """
+        return self._ranked()
+
+    def _ranked(self):
+        """
+        Get endpoints sorted by score, endpoints out of rotation last.
+
+        :return list: Endpoint instances.
+        """
+        return sorted(self._endpoints, key=lambda endpoint: (endpoint.down, endpoint.score))
+
+    def _route(self, url: str, endpoint: Endpoint):
+        """
+        Rewrite url built against the default base url onto endpoint.
+
+        :param str url: api resource locator.
+        :param obj endpoint: Endpoint instance.
+        :return str: endpoint resource locator.
+        """
+        if not url.startswith(self._default_base_url): return url
+        return endpoint.base_url + url[len(self._default_base_url):]
+
+    def session(self):
+        return self._transport.session()
+
+    def close(self):
+        """
+        Cancel endpoint probes still running and close the inner transport.
+        """
+        probes, self._probes = self._probes, set()
+        for probe in list(probes):
+            loop = probe.get_loop()
+            if loop.is_closed() or probe.done(): continue
+            if loop.is_running():
+                loop.call_soon_threadsafe(probe.cancel)
+            else:
+                probe.cancel()
+                loop.run_until_complete(asyncio.gather(probe, return_exceptions=True))
+        self._transport.close()
+
+    async def request(self, session, url: str, options: dict):
+        self._schedule_probes(session)
+        error = None
+        endpoints = self._ranked()
+        for position, endpoint in enumerate(endpoints):
+            attempt_options = dict(options)
+            remaining = deadlines.get_remaining_time()
+            if remaining is not None:
+                if remaining <= 0: break
+                # Split what is left of the deadline among the endpoints still to try
+                share = remaining / (len(endpoints) - position)
+                timeout = attempt_options.get('timeout')
+                attempt_options['timeout'] = min(timeout, share) if timeout else share
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._transport.request(session, self._route(url, endpoint), attempt_options),
+                    attempt_options.get('timeout'))
+            except FAILOVER_ERRORS as err:
+                endpoint.record_failure()
+                logger.warning(f'[RoutingTransport] Failing over. {endpoint.base_url}: {str(err) or repr(err)}.')
+                error = err
+                continue
+            if response.status >= 500:
+                endpoint.record_failure()
+                logger.warning(f'[RoutingTransport] Failing over. {endpoint.base_url}: status {response.status}.')
+                # Reading the body hands the connection back to the pool
+                await response.read()
+                error = response
+                continue
+            endpoint.record_success(time.perf_counter() - start)
+            return response
+        if error is None:
+            msg = f'Deadline exceeded before routing {url}.'
+            logger.error(f'[RoutingTransport] Routing error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        if isinstance(error, Exception): raise error
+        # Every endpoint answered with a server error, let the client report it
+        return error
+
+    def _schedule_probes(self, session):
+        """
+        Start probes of endpoints out of rotation whose probe time has come.
+
+        :param obj session: session yielded by the transport.
+        """
+        now = time.monotonic()
+        for endpoint in self._endpoints:
+            if endpoint.down and endpoint.probe_at <= now:
+                endpoint.probe_at = now + settings.ROUTING_PROBE_INTERVAL
+                probe = asyncio.get_running_loop().create_task(self._probe(session, endpoint))
+                self._probes.add(probe)
+                probe.add_done_callback(self._probes.discard)
+                # Probes outlive the call that scheduled them, cancel them at exit
+                _open_transports.add(self)
+
+    async def _probe(self, session, endpoint: Endpoint):
+        """
+        Probe endpoint out of rotation, bringing it back on success.
+
+        :param obj session: session yielded by the transport.
+        :param obj endpoint: Endpoint instance.
+        """
+        url = f'{endpoint.base_url}/{settings.ROUTING_PROBE_ENDPOINT}'
+        options = {'headers': dict(settings.REQUEST_HEADERS), 'allow_redirects': True,
+                   'timeout': settings.ROUTING_PROBE_TIMEOUT}
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self._transport.request(session, url, options),
+                                              settings.ROUTING_PROBE_TIMEOUT)
+            await response.read()
+        except (RuntimeError,) + FAILOVER_ERRORS as err:
+            # RuntimeError: session closed before the probe ran
+            logger.info('[RoutingTransport] Probe failed. %s: %s.', endpoint.base_url, err)
+            return
+        if response.status >= 500:
+            logger.info('[RoutingTransport] Probe failed. %s: status %s.', endpoint.base_url, response.status)
+            return
+        endpoint.record_success(time.perf_counter() - start)
+        logger.info('[RoutingTransport] Endpoint recovered. %s.', endpoint.base_url)
@@ -0,0 +1,310 @@
+# encoding: utf-8
+
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging import getLogger
+
+from . import deadlines, settings
+from .client import CoindeskAPIHttpRequest
+from .exceptions import CoindeskAPIHttpRequestError
+from .transport import BaseTransport, HttpTransport
+
+# Custom logger for scheduler module
+logger = getLogger(__name__)
+
+# Priority class of requests made in the current task, if set
+_current_priority = ContextVar('coindesk_priority', default=None)
+
+
+@contextmanager
+def request_priority(priority: str):
+    """
+    Run requests made within the scope in priority class.
+
+    :param str priority: priority class name.
+    """
+    token = _current_priority.set(priority)
+    try:
+        yield priority
+    finally:
+        _current_priority.reset(token)
+
+
+class PriorityClass(object):
+    """
+    Queue, share and wait time statistics of one priority class.
+    """
+
+    def __init__(self, name: str, rank: int, weight: float, queue_limit: int, reserved: int):
+        """
+        Initialize priority class.
+
+        :param str name: priority class name.
+        :param int rank: position in priority order, 0 is highest.
+        :param float weight: share of the concurrency limit under contention.
+        :param int queue_limit: maximum number of waiting requests.
+        :param int reserved: slots lower priority classes cannot use.
+        """
+        self.name = name
+        self.rank = rank
+        self.weight = weight
+        self.queue_limit = queue_limit
+        self.reserved = reserved
+        self.waiters = deque()
+        self.inflight = 0
+        self.waits = deque(maxlen=settings.SCHEDULER_WAIT_SAMPLES)
+        self.stats = Counter()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.name} {self.inflight} running, {len(self.waiters)} queued>'
+
+    def get_stats(self):
+        """
+        Get counters and queue wait times of the class.
+
+        :return dict: class statistics, wait times in seconds.
+        """
+        waits = sorted(self.waits)
+        return dict(
+            self.stats, inflight=self.inflight, queued=len(self.waiters),
+            wait_avg=sum(waits) / len(waits) if waits else 0.0,
+            wait_p95=waits[int(len(waits) * 0.95)] if waits else 0.0,
+            wait_max=waits[-1] if waits else 0.0)
+
+
+class PriorityScheduler(object):
+    """
+    Share a global request concurrency limit between priority classes.
+    """
+
+    def __init__(self, limit: int = None, weights: dict = None, queue_limits: dict = None,
+                 reserved: dict = None):
+        """
+        Initialize priority scheduler. Priority order follows settings.SCHEDULER_PRIORITIES.
+
+        :param int limit: maximum number of requests running at once.
+        :param dict weights: share of the limit per class while classes compete.
+        :param dict queue_limits: maximum number of waiting requests per class.
+        :param dict reserved: slots per class that lower priority classes cannot use.
+        """
+        self._limit = limit or settings.SCHEDULER_LIMIT
+        weights = dict(settings.SCHEDULER_WEIGHTS, **(weights or {}))
+        queue_limits = dict(settings.SCHEDULER_QUEUE_LIMITS, **(queue_limits or {}))
+        reserved = dict(settings.SCHEDULER_RESERVED, **(reserved or {}))
+        if sum(reserved.values()) >= self._limit:
+            msg = 'Reserved slots must leave room below the concurrency limit.'
+            logger.error(f'[PriorityScheduler] Config error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        self._classes = [PriorityClass(name, rank, weights[name], queue_limits[name], reserved[name])
+                         for rank, name in enumerate(settings.SCHEDULER_PRIORITIES)]
+        self._by_name = {priority.name: priority for priority in self._classes}
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._inflight}/{self._limit} running>'
+
+    def get_class(self, priority: str = None):
+        """
+        Get priority class by name, current context priority by default.
+
+        :param str priority: priority class name.
+        :return obj: PriorityClass instance.
+        """
+        priority = priority or _current_priority.get() or settings.SCHEDULER_DEFAULT_PRIORITY
+        if priority not in self._by_name:
+            msg = f'Invalid priority {priority}. Allowed values: {", ".join(self._by_name)}.'
+            logger.error(f'[PriorityScheduler] Priority error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        return self._by_name[priority]
+
+    def get_stats(self):
+        """
+        Get statistics of every priority class.
+
+        :return dict: class statistics keyed by class name.
+        """
+        return {priority.name: priority.get_stats() for priority in self._classes}
+
+    def _can_run(self, priority: PriorityClass):
+        """
+        Check whether class may take a slot, keeping slots reserved by higher
+        priority classes free for them.
+        """
+        reserved = sum(max(0, other.reserved - other.inflight)
+                       for other in self._classes[:priority.rank])
+        return self._inflight < self._limit - reserved
+
+    def _grant(self, priority: PriorityClass):
+        self._inflight += 1
+        priority.inflight += 1
+
+    def _dispatch(self):
+        """
+        Hand free slots to waiting requests, picking the class furthest below
+        its weighted share first.
+        """
+        while True:
+            candidates = [priority for priority in self._classes
+                          if priority.waiters and self._can_run(priority)]
+            if not candidates: return
+            priority = min(candidates, key=lambda item: (item.inflight / item.weight, item.rank))
+            loop, future, queued_at = priority.waiters.popleft()
+            self._grant(priority)
+            loop.call_soon_threadsafe(self._resolve, priority, future, queued_at)
+
+    def _resolve(self, priority: PriorityClass, future: asyncio.Future, queued_at: float):
+        if future.done():
+            # Waiter gave up after the slot was granted, it never ran
+            with self._lock:
+                self._release(priority)
+        else:
+            priority.waits.append(time.monotonic() - queued_at)
+            future.set_result(None)
+
+    async def acquire(self, priority: str = None):
+        """
+        Wait for a request slot in priority class, bounded by the request deadline.
+
+        :param str priority: priority class name, current context priority by default.
+        :return obj: PriorityClass instance to release the slot with.
+        """
+        priority = self.get_class(priority)
+        with self._lock:
+            priority.stats['submitted'] += 1
+            if not priority.waiters and self._can_run(priority):
+                self._grant(priority)
+                priority.waits.append(0.0)
+                return priority
+            if len(priority.waiters) >= priority.queue_limit:
+                priority.stats['rejected'] += 1
+                msg = f'Request queue of {priority.name} priority is full.'
+                logger.error(f'[PriorityScheduler] Queue error. {msg}')
+                raise CoindeskAPIHttpRequestError(msg)
+            loop = asyncio.get_running_loop()
+            waiter = (loop, loop.create_future(), time.monotonic())
+            priority.waiters.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter[1]), deadlines.get_remaining_time())
+        except (asyncio.TimeoutError, asyncio.CancelledError) as err:
+            with self._lock:
+                queued = waiter in priority.waiters
+                if queued: priority.waiters.remove(waiter)
+            future = waiter[1]
+            if not queued and future.done() and not future.cancelled():
+                with self._lock:
+                    self._release(priority)
+            else:
+                # A slot granted meanwhile is released once the grant is resolved
+                future.cancel()
+            if isinstance(err, asyncio.CancelledError): raise
+            priority.stats['expired'] += 1
+            msg = f'Deadline exceeded while queued in {priority.name} priority.'
+            logger.error(f'[PriorityScheduler] Queue error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        return priority
+
+    def release(self, priority: PriorityClass):
+        """
+        Release request slot of priority class.
+
+        :param obj priority: PriorityClass instance returned by acquire.
+        """
+        with self._lock:
+            priority.stats['completed'] += 1
+            self._release(priority)
+
+    def _release(self, priority: PriorityClass):
+        """
+        Hand slot back and dispatch it, the caller holds the lock.
+        """
+        self._inflight -= 1
+        priority.inflight -= 1
+        self._dispatch()
+
+    def transport(self, priority: str = None, transport: BaseTransport = None):
+        """
+        Get transport running its requests through the scheduler.
+
+        :param str priority: priority class of every request, current context
+            priority when None.
+        :param obj transport: transport performing the actual requests.
+        :return obj: ScheduledTransport instance.
+        """
+        if priority is not None: self.get_class(priority)
+        return ScheduledTransport(self, priority, transport)
+
+    def request(self, request: CoindeskAPIHttpRequest, priority: str = None):
+        """
+        Get copy of request settings whose requests run through the scheduler.
+
+        :param obj request: CoindeskAPIHttpRequest instance.
+        :param str priority: priority class of every request, current context
+            priority when None.
+        :return obj: CoindeskAPIHttpRequest instance.
+        """
+        return CoindeskAPIHttpRequest(request.retries, request.redirects, request.timeout, request.backoff,
+                                      self.transport(priority, request.transport))
+
+
+class ScheduledTransport(BaseTransport):
+    """
+    Transport holding a scheduler slot for the whole request, body included.
+    """
+
+    def __init__(self, scheduler: PriorityScheduler, priority: str = None, transport: BaseTransport = None):
+        """
+        Initialize scheduled transport.
+
+        :param obj scheduler: PriorityScheduler instance shared by transports.
+        :param str priority: priority class name, current context priority when None.
+        :param obj transport: transport performing the actual requests.
+        """
+        self._scheduler = scheduler
+        self._priority = priority
+        self._transport = transport if transport is not None else HttpTransport()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._priority or "context"} priority>'
+
+    @property
+    def enforces_timeout(self):
+        return self._transport.enforces_timeout
+
+    def session(self):
+        return self._transport.session()
+
+    def close(self):
+        self._transport.close()
+
+    async def request(self, session, url: str, options: dict):
+        priority = await self._scheduler.acquire(self._priority)
+        try:
+            response = await self._transport.request(session, url, options)
+            # Buffer body so the slot covers the whole transfer
+            await response.read()
+            return response
+        finally:
+            self._scheduler.release(priority)
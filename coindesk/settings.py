@@ -1,5 +1,8 @@
 # encoding: utf-8
 
+import os
+from os.path import expanduser, join
+
 from .utils import find_version
 
 # Coindesk API client settings
@@ -50,10 +53,106 @@ VALID_FOR = [
 # Coindesk API client request configuration parameters
 REQUEST_MAX_RETRIES = 10
 REQUEST_MAX_TIMEOUT = 30
+REQUEST_MAX_BACKOFF = 30
 REQUEST_HEADERS = {
     'Accept': 'application/json',
     'Accept-Language': 'en-US',
     'Cache-Control': 'no-cache',
-    'Connection': 'close',
     'X-API-client-version': API_CLIENT_VERSION
 }
+
+# Coindesk API supported currencies cache configuration parameters
+CURRENCIES_CACHE_DIR = os.environ.get('COINDESK_CACHE_DIR') or join(
+    os.environ.get('XDG_CACHE_HOME') or join(expanduser('~'), '.cache'), 'coindesk')
+CURRENCIES_CACHE_FILE = 'currencies.json'
+CURRENCIES_REFRESH_TTL = 24 * 60 * 60
+CURRENCIES_REFRESH_RETRY = 5 * 60
+
+# Coindesk API client hot path logging configuration parameters
+LOG_FORMAT = '%(asctime)s - %(name)-12s %(levelname)-8s: %(message)s'
+LOG_SAMPLE_RATE = 100
+LOG_BUFFER_SIZE = 1000
+
+# Coindesk API client transport profile default parameters
+TRANSPORT_LIMIT = 100
+TRANSPORT_LIMIT_PER_HOST = 0
+TRANSPORT_KEEPALIVE_TIMEOUT = 15
+TRANSPORT_DNS_CACHE_TTL = 300
+TRANSPORT_ACCEPT_ENCODING = 'gzip, deflate'
+
+# Coindesk API historical backfill configuration parameters
+BACKFILL_START_DATE = '2010-07-17'
+BACKFILL_CHUNK_DAYS = 365
+BACKFILL_PROCESSES = 4
+BACKFILL_PROGRESS_INTERVAL = 10
+BACKFILL_PRIORITY = 'bulk'
+
+# Coindesk API current price stale-while-revalidate cache parameters
+SWR_TTL = 30
+SWR_MAX_STALE = 300
+SWR_STALE_IF_ERROR = 3600
+SWR_ERROR_RETRY = 5
+
+# Coindesk API shared memory price segment parameters
+SHARED_SLOTS = 64
+SHARED_READ_RETRIES = 1000
+
+# Coindesk API historical request planner parameters
+PLANNER_WINDOW = 0.05
+PLANNER_PRIORITY = 'bulk'
+
+# Coindesk API fixed point price parameters
+FIXED_POINT_DIGITS = 8
+
+# Coindesk API response validation policy parameters
+VALIDATION_POLICY = 'always'
+VALIDATION_FIRST_N = 10
+VALIDATION_SAMPLE_RATE = 100
+VALIDATION_SHAPE_CACHE = 1024
+
+# Coindesk API current price broadcaster parameters
+BROADCAST_INTERVAL = 10
+BROADCAST_QUEUE_SIZE = 100
+BROADCAST_MODE = 'drop_oldest'
+
+# Coindesk API local caching proxy parameters
+PROXY_HOST = '127.0.0.1'
+PROXY_PORT = 8080
+PROXY_STATS_PATH = '/proxy/stats.json'
+PROXY_MAX_ENTRIES = 1024
+PROXY_WARMUP = True
+PROXY_RETRIES = 2
+PROXY_TIMEOUT = 5
+PROXY_STALE_IF_ERROR = 3600
+PROXY_PRIORITY = 'bulk'
+PROXY_TTLS = {
+    API_CURRENTPRICE_DATA_TYPE: 30,
+    API_HISTORICAL_DATA_TYPE: 3600,
+    API_SUPPORTED_CURRENCIES_DATA_TYPE: 86400,
+}
+
+# Coindesk API request deadline parameters
+DEADLINE_MIN_ATTEMPT = 0.05
+
+# Coindesk API client warm-up parameters
+WARMUP_CONNECTIONS = 4
+WARMUP_DATA_TYPES = [API_CURRENTPRICE_DATA_TYPE, API_HISTORICAL_DATA_TYPE]
+WARMUP_CURRENCIES = []
+
+# Coindesk API multi-endpoint routing parameters
+ROUTING_EWMA_ALPHA = 0.2
+ROUTING_ERROR_PENALTY = 10
+ROUTING_FAILED_LATENCY = 2
+ROUTING_MAX_FAILURES = 3
+ROUTING_PROBE_INTERVAL = 30
+ROUTING_PROBE_TIMEOUT = 2
+ROUTING_PROBE_ENDPOINT = API_CURRENTPRICE_ENDPOINT.format(currency='')
+
+# Coindesk API priority request scheduler parameters
+SCHEDULER_PRIORITIES = ['interactive', 'normal', 'bulk']
+SCHEDULER_DEFAULT_PRIORITY = 'normal'
+SCHEDULER_LIMIT = 16
+SCHEDULER_WEIGHTS = {'interactive': 8, 'normal': 4, 'bulk': 1}
+SCHEDULER_QUEUE_LIMITS = {'interactive': 100, 'normal': 1000, 'bulk': 10000}
+SCHEDULER_RESERVED = {'interactive': 2, 'normal': 0, 'bulk': 0}
+SCHEDULER_WAIT_SAMPLES = 1000
@@ -0,0 +1,246 @@
+# encoding: utf-8
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+from collections import namedtuple
+from logging import getLogger
+from os.path import exists, join
+
+from . import settings
+from .exceptions import CoindeskAPISnapshotError
+
+# Custom logger for shared module
+logger = getLogger(__name__)
+
+# Segment layout: header with seqlock counter followed by fixed-size quote slots
+SHARED_MAGIC = b'CDSQ'
+SHARED_VERSION = 1
+SHARED_HEADER = struct.Struct('<4sHHQI4x')
+SHARED_SEQUENCE = struct.Struct('<Q')
+SHARED_SEQUENCE_OFFSET = 8
+SHARED_SLOT = struct.Struct('<4s4xd32s')
+
+# Latest Bitcoin quote in one currency
+SharedQuote = namedtuple('SharedQuote', ['currency', 'rate_float', 'updatedISO'])
+
+
+def default_segment_path(name: str = 'coindesk-prices'):
+    """
+    Get shared segment file path, in memory backed /dev/shm when available.
+
+    :param str name: segment name.
+    :return str: segment file path.
+    """
+    base_dir = '/dev/shm' if exists('/dev/shm') else tempfile.gettempdir()
+    return join(base_dir, name)
+
+
+class SharedPriceWriter(object):
+    """
+    Publish latest currentprice quotes into a shared memory segment.
+    """
+
+    def __init__(self, path: str = None, slots: int = None):
+        """
+        Create or reset shared price segment.
+
+        :param str path: segment file path.
+        :param int slots: maximum number of currencies published, an existing
+            larger segment keeps its size.
+        """
+        self._path = path or default_segment_path()
+        self._slots = slots or settings.SHARED_SLOTS
+        size = SHARED_HEADER.size + self._slots * SHARED_SLOT.size
+        try:
+            fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                # Never shrink, readers may have mapped the larger segment
+                existing = os.fstat(fd).st_size
+                if existing > size:
+                    self._slots = (existing - SHARED_HEADER.size) // SHARED_SLOT.size
+                    size = SHARED_HEADER.size + self._slots * SHARED_SLOT.size
+                if existing < size: os.ftruncate(fd, size)
+                self._mmap = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+        except (OSError, IOError) as err:
+            msg = f'Unable to create shared segment {self._path}. {err.args[-1]}.'
+            logger.error(f'[SharedPriceWriter] Segment error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        # Continue past the sequence of a previous writer, so readers holding
+        # its last version see the reset segment as a new one
+        magic, version, _, sequence, _ = SHARED_HEADER.unpack_from(self._mmap, 0)
+        if magic != SHARED_MAGIC or version != SHARED_VERSION: sequence = 0
+        self._sequence = (sequence + 2) & ~1
+        self._quotes = {}
+        SHARED_HEADER.pack_into(self._mmap, 0, SHARED_MAGIC, SHARED_VERSION, self._slots,
+                                self._sequence, 0)
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._path} {len(self._quotes)}/{self._slots} quotes>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def path(self):
+        """
+        Get shared segment file path.
+        """
+        return self._path
+
+    def publish(self, *responses):
+        """
+        Publish quotes of one or more currentprice responses in a single update.
+        Currencies not in the responses keep their last published quote.
+
+        :param tuple responses: CoindeskAPIHttpResponse instances or response dicts.
+        :return int: segment version after the update.
+        """
+        quotes = dict(self._quotes)
+        for response in responses:
+            data = getattr(response, 'response', response)
+            updated = data.get('time', {}).get('updatedISO', '')
+            for code, quote in data.get('bpi', {}).items():
+                quotes[quote.get('code', code)] = (quote['rate_float'], updated)
+        if len(quotes) > self._slots:
+            msg = f'Shared segment holds at most {self._slots} currencies.'
+            logger.error(f'[SharedPriceWriter] Segment error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        self._quotes = quotes
+        # Odd sequence marks the update in progress for readers
+        self._write_sequence(self._sequence + 1)
+        offset = SHARED_HEADER.size
+        for code, (rate, updated) in self._quotes.items():
+            SHARED_SLOT.pack_into(self._mmap, offset, code.encode('ascii'), rate,
+                                  updated.encode('ascii'))
+            offset += SHARED_SLOT.size
+        struct.pack_into('<I', self._mmap, SHARED_SEQUENCE_OFFSET + 8, len(self._quotes))
+        self._write_sequence(self._sequence + 1)
+        return self._sequence
+
+    def _write_sequence(self, sequence: int):
+        self._sequence = sequence
+        SHARED_SEQUENCE.pack_into(self._mmap, SHARED_SEQUENCE_OFFSET, sequence)
+
+    def close(self, unlink: bool = False):
+        """
+        Unmap shared segment.
+
+        :param bool unlink: remove segment file as well.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        if unlink and exists(self._path): os.unlink(self._path)
+
+
+class SharedPriceReader(object):
+    """
+    Lock-free reader of quotes published by SharedPriceWriter.
+    """
+
+    def __init__(self, path: str = None):
+        """
+        Map shared price segment read-only.
+
+        :param str path: segment file path.
+        """
+        self._path = path or default_segment_path()
+        try:
+            with open(self._path, 'rb') as segment:
+                self._mmap = mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, IOError, ValueError) as err:
+            msg = f'Unable to map shared segment {self._path}. {err.args[-1]}.'
+            logger.error(f'[SharedPriceReader] Segment error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        magic, version, self._slots, _, _ = SHARED_HEADER.unpack_from(self._mmap, 0)
+        if magic != SHARED_MAGIC or version != SHARED_VERSION:
+            self.close()
+            msg = f'Unsupported shared segment format {magic!r} v{version}.'
+            logger.error(f'[SharedPriceReader] Segment error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        self._version = None
+        self._quotes = {}
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._path} version {self.version}>'
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def version(self):
+        """
+        Get current segment version, even when stable.
+        """
+        return SHARED_SEQUENCE.unpack_from(self._mmap, SHARED_SEQUENCE_OFFSET)[0]
+
+    def quotes(self, retries: int = None):
+        """
+        Get consistent copy of published quotes.
+        Nothing is decoded again while the segment version is unchanged.
+
+        :param int retries: read attempts while a write is in progress.
+        :return dict: SharedQuote instances keyed by currency code.
+        """
+        retries = retries or settings.SHARED_READ_RETRIES
+        for attempt in range(retries):
+            before = self.version
+            if before == self._version:
+                return self._quotes
+            if before % 2:
+                time.sleep(0)
+                continue
+            count = struct.unpack_from('<I', self._mmap, SHARED_SEQUENCE_OFFSET + 8)[0]
+            slots = [SHARED_SLOT.unpack_from(self._mmap, SHARED_HEADER.size + i * SHARED_SLOT.size)
+                     for i in range(min(count, self._slots))]
+            if self.version != before:
+                continue
+            self._quotes = {
+                code.rstrip(b'\0').decode('ascii'): SharedQuote(
+                    code.rstrip(b'\0').decode('ascii'), rate, updated.rstrip(b'\0').decode('ascii'))
+                for code, rate, updated in slots}
+            self._version = before
+            return self._quotes
+        msg = 'Shared segment kept changing while reading.'
+        logger.error(f'[SharedPriceReader] Segment error. {msg}')
+        raise CoindeskAPISnapshotError(msg)
+
+    def get(self, currency: str = 'USD'):
+        """
+        Get latest published quote for currency.
+
+        :param str currency: currency code.
+        :return obj: SharedQuote instance or None.
+        """
+        return self.quotes().get(currency)
+
+    def close(self):
+        """
+        Unmap shared segment.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
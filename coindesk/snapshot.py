@@ -0,0 +1,353 @@
+# encoding: utf-8
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from logging import getLogger
+
+from .exceptions import CoindeskAPISnapshotError
+
+# Custom logger for snapshot module
+logger = getLogger(__name__)
+
+# Snapshot binary layout: fixed little-endian header followed by an int32
+# array of epoch days and a float64 array of closes aligned to 8 bytes.
+SNAPSHOT_MAGIC = b'CDPS'
+SNAPSHOT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct('<4sHH4s4siiI4x')
+SNAPSHOT_EPOCH = date(1970, 1, 1).toordinal()
+
+
+def to_epoch_day(value):
+    """
+    Convert date, datetime or ISO formatted string to days since epoch.
+
+    :param * value: date, datetime or YYYY-MM-DD[...] string.
+    :return int: number of days since 1970-01-01.
+    """
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    if not isinstance(value, date):
+        msg = f'Unable to convert {value!r} to epoch day.'
+        logger.error(f'[PriceSnapshot] Date error. {msg}')
+        raise CoindeskAPISnapshotError(msg)
+    return value.toordinal() - SNAPSHOT_EPOCH
+
+
+def from_epoch_day(day: int):
+    """
+    Convert days since epoch to date.
+
+    :param int day: number of days since 1970-01-01.
+    :return date: corresponding calendar date.
+    """
+    return date.fromordinal(SNAPSHOT_EPOCH + day)
+
+
+def _aligned(offset: int, alignment: int = 8):
+    """
+    Round offset up to the next alignment boundary.
+
+    :param int offset: byte offset.
+    :param int alignment: boundary in bytes.
+    :return int: aligned byte offset.
+    """
+    return (offset + alignment - 1) // alignment * alignment
+
+
+class PriceSnapshotWriter(object):
+    """
+    Collect daily closes and write them in binary snapshot format.
+    """
+
+    def __init__(self, index: str = 'USD', currency: str = 'USD'):
+        """
+        Initialize price snapshot writer.
+
+        :param str index: price index of the series (USD, CNY).
+        :param str currency: currency the closes are quoted in.
+        """
+        self._index = index
+        self._currency = currency
+        self._closes = {}
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._index}/{self._currency} {len(self)} closes>'
+
+    def __len__(self):
+        """
+        Get number of collected closes.
+
+        :return int: number of days in the series.
+        """
+        return len(self._closes)
+
+    def add(self, day, close: float):
+        """
+        Add daily close to the series. Later values overwrite earlier ones.
+
+        :param * day: date, datetime or YYYY-MM-DD string.
+        :param float close: closing price for the day.
+        """
+        self._closes[to_epoch_day(day)] = float(close)
+
+    def add_response(self, response):
+        """
+        Add closes from a historical or currentprice api response.
+
+        :param * response: CoindeskAPIHttpResponse instance or response dict.
+        """
+        data = getattr(response, 'response', response)
+        bpi = data.get('bpi', {})
+        updated = data.get('time', {}).get('updatedISO')
+        if self._currency in bpi and isinstance(bpi[self._currency], dict):
+            self.add(updated, bpi[self._currency]['rate_float'])
+        else:
+            for day, close in bpi.items():
+                self.add(day, close)
+
+    def write(self, path: str):
+        """
+        Write collected series to snapshot file atomically.
+
+        :param str path: snapshot file path.
+        :return str: written snapshot file path.
+        """
+        days = array('i', sorted(self._closes))
+        closes = array('d', (self._closes[day] for day in days))
+        if sys.byteorder != 'little':
+            days.byteswap()
+            closes.byteswap()
+        first, last = (days[0], days[-1]) if days else (0, -1)
+        header = SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0,
+            self._index.encode('ascii'), self._currency.encode('ascii'),
+            first, last, len(days))
+        days_end = SNAPSHOT_HEADER.size + len(days) * days.itemsize
+        padding = bytes(_aligned(days_end) - days_end)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'wb') as outfile:
+                outfile.write(header)
+                outfile.write(days.tobytes())
+                outfile.write(padding)
+                outfile.write(closes.tobytes())
+            os.replace(tmp_path, path)
+        except (OSError, IOError) as err:
+            msg = f'Unable to write snapshot file. {err.args[-1]}.'
+            logger.error(f'[PriceSnapshotWriter] File error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        return path
+
+
+class PriceSnapshot(object):
+    """
+    Memory-mapped read access to a binary price snapshot.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open and map price snapshot file.
+
+        :param str path: snapshot file path.
+        """
+        self._path = path
+        self._mmap = None
+        self._view = None
+        try:
+            with open(path, 'rb') as infile:
+                self._mmap = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, IOError, ValueError) as err:
+            msg = f'Unable to map snapshot file {path}. {err.args[-1]}.'
+            logger.error(f'[PriceSnapshot] File error. {msg}')
+            raise CoindeskAPISnapshotError(msg)
+        self._parse_header()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.index}/{self.currency} {self.start} to {self.end}>'
+
+    def __len__(self):
+        """
+        Get number of days in the snapshot.
+
+        :return int: number of closes.
+        """
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @classmethod
+    def open(cls, path: str):
+        """
+        Get memory-mapped price snapshot instance.
+
+        :param str path: snapshot file path.
+        :return cls: PriceSnapshot class instance.
+        """
+        return cls(path)
+
+    def _parse_header(self):
+        """
+        Read snapshot header and set up zero-copy array views.
+        """
+        if len(self._mmap) < SNAPSHOT_HEADER.size:
+            self._fail('File too short for snapshot header.')
+        magic, version, _, index, currency, first, last, count = \
+            SNAPSHOT_HEADER.unpack_from(self._mmap, 0)
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            self._fail(f'Unsupported snapshot format {magic!r} v{version}.')
+        days_end = SNAPSHOT_HEADER.size + count * 4
+        closes_start = _aligned(days_end)
+        if len(self._mmap) < closes_start + count * 8:
+            self._fail('Snapshot file is truncated.')
+        self._index = index.rstrip(b'\0').decode('ascii')
+        self._currency = currency.rstrip(b'\0').decode('ascii')
+        self._first, self._last, self._count = first, last, count
+        self._view = memoryview(self._mmap)
+        if sys.byteorder == 'little':
+            self._days = self._view[SNAPSHOT_HEADER.size:days_end].cast('i')
+            self._closes = self._view[closes_start:closes_start + count * 8].cast('d')
+        else:
+            self._days = array('i', self._view[SNAPSHOT_HEADER.size:days_end])
+            self._closes = array('d', self._view[closes_start:closes_start + count * 8])
+            self._days.byteswap()
+            self._closes.byteswap()
+
+    def _fail(self, msg: str):
+        """
+        Release mapping and raise snapshot error.
+
+        :param str msg: error description message.
+        """
+        self.close()
+        logger.error(f'[PriceSnapshot] Format error. {msg}')
+        raise CoindeskAPISnapshotError(msg)
+
+    def close(self):
+        """
+        Release array views and unmap snapshot file.
+        Views handed out by days, closes or slice stay readable and keep the
+        mapping alive until they are released or garbage collected.
+        """
+        for name in ('_days', '_closes', '_view'):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview): view.release()
+            setattr(self, name, None)
+        mapping, self._mmap = self._mmap, None
+        if mapping is None: return
+        try:
+            mapping.close()
+        except BufferError:
+            # Exported views hold the last references, the file is
+            # unmapped once they are gone
+            logger.debug('[PriceSnapshot] Close deferred. %s views still exported.', self._path)
+
+    @property
+    def path(self):
+        """
+        Get snapshot file path.
+        """
+        return self._path
+
+    @property
+    def index(self):
+        """
+        Get snapshot price index.
+        """
+        return self._index
+
+    @property
+    def currency(self):
+        """
+        Get snapshot currency code.
+        """
+        return self._currency
+
+    @property
+    def start(self):
+        """
+        Get first date of the series.
+        """
+        return from_epoch_day(self._first) if self._count else None
+
+    @property
+    def end(self):
+        """
+        Get last date of the series.
+        """
+        return from_epoch_day(self._last) if self._count else None
+
+    @property
+    def days(self):
+        """
+        Get zero-copy view of epoch days, valid after the snapshot is closed.
+
+        :return memoryview: int32 days since 1970-01-01.
+        """
+        return self._days[:]
+
+    @property
+    def closes(self):
+        """
+        Get zero-copy view of daily closes, valid after the snapshot is closed.
+
+        :return memoryview: float64 closing prices.
+        """
+        return self._closes[:]
+
+    def slice(self, start=None, end=None):
+        """
+        Get zero-copy views for an inclusive date range.
+
+        :param * start: first date of range, open if None.
+        :param * end: last date of range, open if None.
+        :return tuple: days and closes views for the range.
+        """
+        lo = 0 if start is None else bisect_left(self._days, to_epoch_day(start))
+        hi = self._count if end is None else bisect_right(self._days, to_epoch_day(end))
+        return self._days[lo:hi], self._closes[lo:hi]
+
+    def get(self, day, default: float = None):
+        """
+        Get close for a single date.
+
+        :param * day: date, datetime or YYYY-MM-DD string.
+        :param float default: value returned if date is missing.
+        :return float: closing price for the date.
+        """
+        epoch_day = to_epoch_day(day)
+        pos = bisect_left(self._days, epoch_day)
+        if pos < self._count and self._days[pos] == epoch_day:
+            return self._closes[pos]
+        return default
+
+    def to_bpi(self):
+        """
+        Get series in Coindesk historical bpi format.
+
+        :return dict: closes keyed by YYYY-MM-DD date.
+        """
+        return {from_epoch_day(day).isoformat(): close
+                for day, close in zip(self._days, self._closes)}
@@ -0,0 +1,118 @@
+# encoding: utf-8
+
+from collections import namedtuple
+from functools import lru_cache
+from logging import getLogger
+from urllib.parse import urlencode
+
+from . import settings, utils
+
+# Custom logger for specs module
+logger = getLogger(__name__)
+
+# Spec fields holding query parameters, in api query string order
+SPEC_PARAMS = (
+    ('index', settings.INDEX_PARAM),
+    ('currency', settings.CURRENCY_PARAM),
+    ('start', settings.START_PARAM),
+    ('end', settings.END_PARAM),
+    ('for_', settings.FOR_PARAM),
+)
+
+
+class RequestSpec(namedtuple('RequestSpec', ['data_type', 'currency', 'index', 'start', 'end', 'for_'])):
+    """
+    Immutable, validated description of one Coindesk API query.
+    Specs are hashable, so equal queries can share cache entries and fetches.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, data_type: str, currency: str = None, index: str = None,
+                start: str = None, end: str = None, for_: str = None):
+        """
+        Validate query once and create request spec.
+
+        :param str data_type: type of data to fetch (currentprice, historical).
+        :param str currency: currency to fetch data in.
+        :param str index: historical price index (USD, CNY).
+        :param str start: historical first date YYYY-MM-DD.
+        :param str end: historical last date YYYY-MM-DD.
+        :param str for_: historical relative period (yesterday).
+        """
+        values = {'currency': currency, 'index': index, 'start': start, 'end': end, 'for_': for_}
+        params = {param: values[field] for field, param in SPEC_PARAMS if values[field] is not None}
+        data_type = utils.validate_data_type(data_type)
+        params = utils.validate_params(data_type, params)
+        values = {field: params.get(param) for field, param in SPEC_PARAMS}
+        return super(RequestSpec, cls).__new__(cls, data_type, **values)
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.url}>'
+
+    @classmethod
+    def from_params(cls, data_type: str, params: dict = None):
+        """
+        Get request spec from api query parameters.
+
+        :param str data_type: type of data to fetch (currentprice, historical).
+        :param dict params: optional url query parameters.
+        :return cls: RequestSpec class instance.
+        """
+        params = params or {}
+        fields = {param: field for field, param in SPEC_PARAMS}
+        if not set(params) <= set(fields):
+            # Raise the usual invalid param error
+            utils.validate_params(data_type, dict(params))
+        return cls(data_type, **{fields[param]: value for param, value in params.items()})
+
+    @property
+    def params(self):
+        """
+        Get api query parameters of the spec.
+        """
+        return {param: getattr(self, field) for field, param in SPEC_PARAMS
+                if getattr(self, field) is not None}
+
+    @property
+    def url(self):
+        """
+        Get Coindesk api endpoint of the spec.
+        """
+        return get_spec_url(self)
+
+
+def get_spec_url(spec: RequestSpec):
+    """
+    Get Coindesk api endpoint of request spec, built once per distinct spec
+    and api base url.
+
+    :param obj spec: RequestSpec instance.
+    :return str: Coindesk api endpoint.
+    """
+    base = f'{settings.API_PROTOCOL}://{settings.API_HOST}/{settings.API_PATH.strip("/")}'
+    return _build_spec_url(base, spec)
+
+
+@lru_cache(maxsize=1024)
+def _build_spec_url(base: str, spec: RequestSpec):
+    """
+    Build Coindesk api endpoint of request spec. The base url is part of the
+    cache key, so changed api settings never return stale urls.
+
+    :param str base: api base url.
+    :param obj spec: RequestSpec instance.
+    :return str: Coindesk api endpoint.
+    """
+    if spec.data_type == settings.API_CURRENTPRICE_DATA_TYPE:
+        currency = f'/{spec.currency}' if spec.currency else ''
+        return f'{base}/{settings.API_CURRENTPRICE_ENDPOINT.format(currency=currency)}'
+    query = urlencode(spec.params)
+    url = f'{base}/{settings.API_HISTORICAL_ENDPOINT}'
+    return f'{url}?{query}' if query else url
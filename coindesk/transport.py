@@ -0,0 +1,513 @@
+# encoding: utf-8
+
+import asyncio
+import atexit
+import base64
+import gzip
+import json
+import time
+import weakref
+from abc import ABCMeta, abstractmethod
+from collections import defaultdict, deque, namedtuple
+from contextlib import asynccontextmanager
+from logging import getLogger
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import aiohttp
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+
+from . import decorators, settings
+from .exceptions import CoindeskAPIHttpRequestError
+
+# Custom logger for transport module
+logger = getLogger(__name__)
+
+# Transports holding sessions open between synchronous calls
+_open_transports = weakref.WeakSet()
+
+
+class TransportResponse(object):
+    """
+    Minimal in-memory http response served by non-network transports.
+    """
+
+    def __init__(self, url: str, status: int, reason: str = None,
+                 headers: dict = None, body: bytes = b''):
+        """
+        Initialize transport response.
+
+        :param str url: requested url.
+        :param int status: http response status code.
+        :param str reason: http response reason phrase.
+        :param dict headers: http response headers.
+        :param bytes body: http response body.
+        """
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers if headers is not None else {}
+        self._body = body
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.status} {self.url}>'
+
+    async def read(self):
+        return self._body
+
+    async def text(self, encoding: str = 'utf-8'):
+        return self._body.decode(encoding)
+
+    async def json(self, content_type: str = None, loads=json.loads):
+        return loads(self._body.decode('utf-8'))
+
+
+class RawResponse(namedtuple('RawResponse', ['url', 'status', 'reason', 'headers', 'body',
+                                             'headers_time', 'elapsed'])):
+    """
+    Undecoded response body read while the session was open, with timing.
+    headers_time and elapsed are seconds until headers and until the whole
+    body were received.
+    """
+
+    __slots__ = ()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.status} {len(self.body)} bytes in {self.elapsed * 1000:.1f} ms>'
+
+    @property
+    def view(self):
+        """
+        Get memoryview over body for slicing without copies.
+        """
+        return memoryview(self.body)
+
+    def json(self, loads=json.loads):
+        """
+        Decode body as json, for callers that need the data after all.
+
+        :param callable loads: json decoding function.
+        :return *: decoded response data.
+        """
+        return loads(self.body)
+
+
+class TransportProfile(object):
+    """
+    Connection pool, keep-alive, dns cache, timeout and compression settings.
+    """
+
+    def __init__(self, limit: int = None, limit_per_host: int = None, keepalive_timeout: float = None,
+                 dns_cache_ttl: int = None, connect_timeout: float = None, read_timeout: float = None,
+                 compression: bool = True):
+        """
+        Initialize transport profile. Unset values default to settings.
+
+        :param int limit: total simultaneous connections, 0 for unlimited.
+        :param int limit_per_host: simultaneous connections per host, 0 for unlimited.
+        :param float keepalive_timeout: idle seconds before closing connections, 0 disables keep-alive.
+        :param int dns_cache_ttl: seconds resolved addresses are cached, 0 disables cache.
+        :param float connect_timeout: seconds to acquire connection and connect.
+        :param float read_timeout: seconds between reads of response data.
+        :param bool compression: negotiate gzip/deflate response compression.
+        """
+        def default(value, setting):
+            return value if value is not None else setting
+        self.limit = self._validate('limit', default(limit, settings.TRANSPORT_LIMIT))
+        self.limit_per_host = self._validate(
+            'limit_per_host', default(limit_per_host, settings.TRANSPORT_LIMIT_PER_HOST))
+        self.keepalive_timeout = self._validate(
+            'keepalive_timeout', default(keepalive_timeout, settings.TRANSPORT_KEEPALIVE_TIMEOUT))
+        self.dns_cache_ttl = self._validate(
+            'dns_cache_ttl', default(dns_cache_ttl, settings.TRANSPORT_DNS_CACHE_TTL))
+        self.connect_timeout = self._validate('connect_timeout', connect_timeout, optional=True)
+        self.read_timeout = self._validate('read_timeout', read_timeout, optional=True)
+        self.compression = bool(compression)
+        self._headers = {
+            'Connection': 'keep-alive' if self.keepalive_timeout else 'close',
+            'Accept-Encoding': settings.TRANSPORT_ACCEPT_ENCODING if self.compression else 'identity',
+        }
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return (f'<{classname} - limit {self.limit}/{self.limit_per_host} '
+                f'keepalive {self.keepalive_timeout}s dns {self.dns_cache_ttl}s>')
+
+    @staticmethod
+    def _validate(name: str, value, optional: bool = False):
+        """
+        Validate non negative numeric profile value.
+
+        :param str name: profile parameter name.
+        :param * value: profile parameter value.
+        :param bool optional: whether None is accepted.
+        :return *: validated value.
+        """
+        if value is None and optional: return value
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+            msg = f'Transport {name} must be zero or positive number.'
+            logger.error(f'[TransportProfile] Profile error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        return value
+
+    def connector(self):
+        """
+        Get connector configured with pool, keep-alive and dns cache settings.
+
+        :return obj: aiohttp tcp connector.
+        """
+        options = {
+            'limit': self.limit,
+            'limit_per_host': self.limit_per_host,
+            'use_dns_cache': bool(self.dns_cache_ttl),
+            'ttl_dns_cache': self.dns_cache_ttl or None,
+        }
+        if self.keepalive_timeout:
+            options['keepalive_timeout'] = self.keepalive_timeout
+        else:
+            options['force_close'] = True
+        return TCPConnector(**options)
+
+    def timeout(self, total: float = None):
+        """
+        Get request timeout combining total, connect and read timeouts.
+
+        :param float total: seconds for the whole request, None for no limit.
+        :return obj: aiohttp client timeout.
+        """
+        return ClientTimeout(total=total or None, connect=self.connect_timeout,
+                             sock_read=self.read_timeout)
+
+    def prepare_options(self, options: dict):
+        """
+        Apply profile headers and timeouts to http request options.
+
+        :param dict options: http request options.
+        :return dict: updated http request options.
+        """
+        options['headers'].update(self._headers)
+        options['timeout'] = self.timeout(options.get('timeout'))
+        return options
+
+
+class BaseTransport(object, metaclass=ABCMeta):
+    """
+    Pluggable transport used by CoindeskAPIHttpRequest to perform requests.
+    """
+
+    # Transports splitting the request deadline themselves, the client
+    # then leaves the whole remaining budget to them
+    enforces_timeout = False
+
+    @abstractmethod
+    def session(self):
+        """
+        Get asynchronous context manager yielding the request session.
+        """
+
+    @abstractmethod
+    async def request(self, session, url: str, options: dict):
+        """
+        Perform http get request.
+
+        :param obj session: session yielded by session().
+        :param str url: api resource locator.
+        :param dict options: http request options.
+        :return obj: http response object.
+        """
+
+    def close(self):
+        """
+        Release sessions and connections kept open between requests.
+        """
+
+
+class HttpTransport(BaseTransport):
+    """
+    Default transport performing real http requests with aiohttp.
+    """
+
+    def __init__(self, profile: TransportProfile = None):
+        """
+        Initialize http transport.
+
+        :param obj profile: connection and compression settings.
+        """
+        self._profile = profile if profile is not None else TransportProfile()
+        self._sessions = {}
+        # Close kept sessions once the transport is garbage collected
+        weakref.finalize(self, _close_sessions, self._sessions)
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._profile}>'
+
+    @property
+    def profile(self):
+        """
+        Get transport connection and compression settings.
+        """
+        return self._profile
+
+    @asynccontextmanager
+    async def session(self):
+        """
+        Yield session kept open across synchronous calls of the thread, so
+        keep-alive connections and cached dns entries are reused. Any other
+        event loop gets a session closed on exit, as it outlives the loop.
+        """
+        loop = asyncio.get_running_loop()
+        if not decorators.is_sync_event_loop(loop):
+            async with self._open_session() as session:
+                yield session
+            return
+        session = self._sessions.get(loop)
+        if session is None or session.closed:
+            session = self._sessions[loop] = self._open_session()
+            decorators.add_loop_session(loop, session)
+            _open_transports.add(self)
+        yield session
+
+    def _open_session(self):
+        return aiohttp.ClientSession(connector=self._profile.connector(), auto_decompress=True)
+
+    async def request(self, session: ClientSession, url: str, options: dict):
+        options = self._profile.prepare_options(dict(options, headers=dict(options['headers'])))
+        return await session.get(url, **options)
+
+    def close(self):
+        """
+        Close sessions kept open across synchronous calls.
+        """
+        _close_sessions(self._sessions)
+
+
+def _close_sessions(sessions: dict):
+    """
+    Close sessions kept open per event loop and forget them.
+
+    :param dict sessions: aiohttp sessions keyed by event loop.
+    """
+    pending = dict(sessions)
+    sessions.clear()
+    for loop, session in pending.items():
+        if loop.is_closed() or session.closed: continue
+        try:
+            if loop.is_running():
+                asyncio.run_coroutine_threadsafe(session.close(), loop)
+            else:
+                loop.run_until_complete(session.close())
+        except RuntimeError:
+            # Another loop runs in this thread, close once the session loop runs again
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+
+
+class RecordingTransport(BaseTransport):
+    """
+    Transport recording every response to a gzip json lines cassette.
+    """
+
+    def __init__(self, path: str, transport: BaseTransport = None):
+        """
+        Initialize recording transport.
+
+        :param str path: cassette file path, appended to if it exists.
+        :param obj transport: transport performing the actual requests.
+        """
+        self._path = path
+        self._transport = transport if transport is not None else HttpTransport()
+        self._recorded = 0
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._path} {self._recorded} recorded>'
+
+    @property
+    def recorded(self):
+        """
+        Get number of responses recorded by this transport.
+        """
+        return self._recorded
+
+    @property
+    def enforces_timeout(self):
+        return self._transport.enforces_timeout
+
+    def session(self):
+        return self._transport.session()
+
+    def close(self):
+        self._transport.close()
+
+    async def request(self, session, url: str, options: dict):
+        started = time.monotonic()
+        response = await self._transport.request(session, url, options)
+        body = await response.read()
+        self._record(url, response, body, time.monotonic() - started)
+        return response
+
+    def _record(self, url: str, response, body: bytes, elapsed: float):
+        """
+        Append response entry to cassette file.
+
+        :param str url: requested url.
+        :param obj response: http response object.
+        :param bytes body: http response body.
+        :param float elapsed: request round trip seconds.
+        """
+        try:
+            entry = {'body': body.decode('utf-8')}
+        except UnicodeDecodeError:
+            entry = {'body64': base64.b64encode(body).decode('ascii')}
+        entry.update({
+            'url': url,
+            'status': response.status,
+            'reason': response.reason,
+            'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+            'elapsed': round(elapsed, 6),
+        })
+        try:
+            with gzip.open(self._path, 'at', encoding='utf-8') as cassette:
+                cassette.write(json.dumps(entry, separators=(',', ':')) + '\n')
+        except (OSError, IOError) as err:
+            msg = f'Unable to write cassette file. {err.args[-1]}.'
+            logger.error(f'[RecordingTransport] File error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        self._recorded += 1
+
+
+class ReplayTransport(BaseTransport):
+    """
+    Transport serving recorded responses from memory without network access.
+    """
+
+    def __init__(self, path: str, preserve_timing: bool = False, loop: bool = False):
+        """
+        Initialize replay transport loading the whole cassette in memory.
+
+        :param str path: cassette file path.
+        :param bool preserve_timing: sleep recorded round trip time per request.
+        :param bool loop: restart responses for an url once exhausted.
+        """
+        self._path = path
+        self._preserve_timing = preserve_timing
+        self._loop = loop
+        self._entries = defaultdict(list)
+        self._queues = {}
+        self._replayed = 0
+        self._load()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self._path} {self._replayed} replayed>'
+
+    @property
+    def replayed(self):
+        """
+        Get number of responses served by this transport.
+        """
+        return self._replayed
+
+    @property
+    def urls(self):
+        """
+        Get recorded urls, query parameters sorted.
+        """
+        return list(self._entries)
+
+    def _load(self):
+        """
+        Read cassette entries grouped by url in recording order.
+        """
+        try:
+            with gzip.open(self._path, 'rt', encoding='utf-8') as cassette:
+                for line in cassette:
+                    entry = json.loads(line)
+                    body = entry.get('body')
+                    body = body.encode('utf-8') if body is not None \
+                        else base64.b64decode(entry['body64'])
+                    response = (entry['status'], entry['reason'], entry['headers'], body)
+                    self._entries[_normalize_url(entry['url'])].append((response, entry['elapsed']))
+        except (OSError, IOError, ValueError, KeyError) as err:
+            msg = f'Unable to read cassette file. {err.args[-1]}.'
+            logger.error(f'[ReplayTransport] File error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        self.rewind()
+
+    def rewind(self):
+        """
+        Restart replay from the first recorded response of every url.
+        """
+        self._queues = {url: deque(entries) for url, entries in self._entries.items()}
+
+    @asynccontextmanager
+    async def session(self):
+        yield None
+
+    async def request(self, session, url: str, options: dict):
+        key = _normalize_url(url)
+        queue = self._queues.get(key)
+        if queue is not None and not queue and self._loop:
+            queue.extend(self._entries[key])
+        if not queue:
+            msg = f'No recorded response left for url {url}.'
+            logger.error(f'[ReplayTransport] Replay error. {msg}')
+            raise CoindeskAPIHttpRequestError(msg)
+        (status, reason, headers, body), elapsed = queue.popleft()
+        if self._preserve_timing:
+            await asyncio.sleep(elapsed)
+        self._replayed += 1
+        return TransportResponse(url, status, reason, headers, body)
+
+
+def _normalize_url(url: str):
+    """
+    Sort url query parameters, so urls built by clients and request specs
+    in different parameter order match the same recorded responses.
+
+    :param str url: requested url.
+    :return str: url with sorted query string.
+    """
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(parts._replace(query=query))
+
+
+@atexit.register
+def _close_open_transports():
+    """
+    Close sessions still open at interpreter exit.
+    """
+    for transport in list(_open_transports):
+        transport.close()
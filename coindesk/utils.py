@@ -1,20 +1,20 @@
 # encoding: utf-8
 
 import codecs
-import json
 import re
 from datetime import datetime
 from logging import getLogger
 from logging.config import fileConfig
 from os.path import dirname, join
 
-from . import schemas, settings
+from . import registry, schemas, settings, transport as transports
 from .exceptions import (CoindeskAPIClientError,
                          CoindeskAPIHttpRequestError,
                          CoindeskAPIHttpResponseError)
 
 # Custom logger for client config module
-fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'))
+if not getLogger().handlers:
+    fileConfig(join(dirname(dirname(__file__)), 'logging.cfg'), disable_existing_loggers=False)
 logger = getLogger(__name__)
 
 
@@ -94,8 +94,7 @@ def validate_currency(currency: str = None, params: dict = None):
     """
     if params is None: params = {}
     currency = currency or params.get(settings.CURRENCY_PARAM)
-    currencies = list(map(lambda c: c['currency'], get_currencies_settings()))
-    if currency is not None and currency not in currencies:
+    if currency is not None and currency not in registry.currency_registry.codes:
         msg = f'Unvalid provided currency {currency}.'
         logger.error(f'[CoinDeskAPIClient] Currency error. {msg}')
         raise CoindeskAPIClientError(msg)
@@ -203,6 +202,20 @@ def validate_backoff(backoff: bool):
     return backoff
 
 
+def validate_transport(transport):
+    """
+    Validate http request transport.
+
+    :param obj transport: transport performing http requests.
+    :return obj: transport instance or None for default transport.
+    """
+    if transport is not None and not isinstance(transport, transports.BaseTransport):
+        msg = 'Transport must be BaseTransport instance.'
+        logger.error(f'[CoindeskAPIHttpRequest] Transport error. {msg}')
+        raise CoindeskAPIHttpRequestError(msg)
+    return transport
+
+
 def validate_url(url: str):
     """
     Validate Coindesk constructed url.
@@ -227,9 +240,8 @@ def validate_currencies_settings(currencies: list):
 
     :param list currencies: Coindesk API supported currencies.
     """
-    codes = list(map(lambda c: c['currency'], get_currencies_settings()))
-    supported_codes = list(map(lambda c: c['currency'], currencies))
-    if not set(codes) == set(supported_codes):
+    supported_codes = set(map(lambda c: c['currency'], currencies))
+    if not registry.currency_registry.codes == supported_codes:
         msg = 'Valid currencies settings out of date.'
         logger.warning(f'[CoindeskAPIHttpRequest] Currencies warn. {msg}')
         update_currencies_settings(currencies)
@@ -238,37 +250,22 @@ def validate_currencies_settings(currencies: list):
 def get_currencies_settings():
     """
     Get supported currencies settings list.
+    Stale data is refreshed in background without blocking the caller.
 
-    :return list: valid currencies list from settings file.
+    :return list: valid currencies list from registry.
     """
-    currencies_json = join(dirname(__file__), 'currencies.json')
-    try:
-        with open(currencies_json) as currencies_file:
-            currencies = json.load(currencies_file)
-    except (OSError, IOError) as err:
-        msg = f'Unable to read currencies file. {err.args[0]}.'
-        logger.error(f'[CoindeskAPIClient] File error. {msg}')
-        raise CoindeskAPIClientError(msg)
-    return currencies.get('SUPPORTED_CURRENCIES')
+    return registry.currency_registry.currencies
 
 
 def update_currencies_settings(currencies: list):
     """
-    Get supported currencies settings list.
+    Update supported currencies settings list.
+    The list is swapped in memory and atomically written to the user cache
+    directory, the packaged currencies file is never modified.
 
     :param list currencies: Coindesk API supported currencies.
     """
-    currencies_json = join(dirname(__file__), 'currencies.json')
-    supported_currencies = {'SUPPORTED_CURRENCIES': currencies}
-    try:
-        with open(currencies_json, 'w') as outfile:
-            json.dump(supported_currencies, outfile, indent=2)
-    except (OSError, IOError) as err:
-        msg = f'Unable to write currencies file. {err.args[0]}.'
-        logger.error(f'[CoindeskAPIClient] File error. {msg}')
-        raise CoindeskAPIClientError(msg)
-    msg = 'Currencies file successfully updated.'
-    logger.info(f'[CoindeskAPIClient] File updated. {msg}')
+    registry.currency_registry.update(currencies)
 
 
 def get_schema(data_type: str, currency: str = None):
@@ -0,0 +1,337 @@
+# encoding: utf-8
+
+import random
+import threading
+from collections import Counter
+from logging import getLogger
+
+import jsonschema
+from jsonschema import SchemaError
+from jsonschema.validators import validator_for
+
+from . import settings
+from .exceptions import CoindeskAPIClientError
+
+# Custom logger for validators module
+logger = getLogger(__name__)
+
+# Keywords the compiler understands, plus annotations without validation effect
+COMPILED_KEYWORDS = {'type', 'properties', 'required'}
+ANNOTATION_KEYWORDS = {'title', 'description', '$comment', 'default', 'examples', '$schema', '$id'}
+
+TYPE_CHECKS = {
+    'object': 'isinstance({var}, dict)',
+    'array': 'isinstance({var}, list)',
+    'string': 'isinstance({var}, str)',
+    'boolean': 'isinstance({var}, bool)',
+    'null': '{var} is None',
+    'number': '(isinstance({var}, (int, float)) and not isinstance({var}, bool))',
+    'integer': ('((isinstance({var}, int) and not isinstance({var}, bool))'
+                ' or (isinstance({var}, float) and {var}.is_integer()))'),
+}
+
+_MISSING = object()
+_compiled = {}
+_lock = threading.Lock()
+
+
+class _Unsupported(Exception):
+    """
+    Raised when a schema uses keywords the compiler does not handle.
+    """
+    pass
+
+
+def _compile_node(schema, var: str, depth: int, keywords: frozenset, counter: list):
+    """
+    Generate straight-line check statements for a schema node.
+    Keys that are not validation keywords are ignored, as jsonschema ignores
+    them: the currency entries nested under bpi in the packaged schemas carry
+    no properties keyword, so neither path checks their fields. Keywords the
+    validator knows but the compiler does not make the whole schema fall back
+    to jsonschema.
+
+    :param * schema: schema dict or boolean schema.
+    :param str var: name of the variable holding the instance.
+    :param int depth: indentation level.
+    :param frozenset keywords: keywords known to the jsonschema validator.
+    :param list counter: single item list used to name variables.
+    :return list: python source lines.
+    """
+    indent = '    ' * depth
+    if schema is True: return []
+    if schema is False: return [f'{indent}return False']
+    if not isinstance(schema, dict): raise _Unsupported(schema)
+    unsupported = (set(schema) & keywords) - COMPILED_KEYWORDS - ANNOTATION_KEYWORDS
+    if unsupported: raise _Unsupported(unsupported)
+
+    lines = []
+    types = schema.get('type')
+    if types is not None:
+        types = [types] if isinstance(types, str) else list(types)
+        if any(type_ not in TYPE_CHECKS for type_ in types): raise _Unsupported(types)
+        checks = ' or '.join(TYPE_CHECKS[type_].format(var=var) for type_ in types)
+        lines.append(f'{indent}if not ({checks}): return False')
+
+    # Object keywords only apply when the instance is an object
+    guarded = types != ['object']
+    body_depth = depth + 1 if guarded else depth
+    body_indent = '    ' * body_depth
+    body = []
+    for key in schema.get('required', []):
+        body.append(f'{body_indent}if {key!r} not in {var}: return False')
+    for key, subschema in schema.get('properties', {}).items():
+        counter[0] += 1
+        child = f'v{counter[0]}'
+        checks = _compile_node(subschema, child, body_depth + 1, keywords, counter)
+        if checks:
+            body.append(f'{body_indent}{child} = {var}.get({key!r}, _MISSING)')
+            body.append(f'{body_indent}if {child} is not _MISSING:')
+            body.extend(checks)
+    if body and guarded:
+        lines.append(f'{indent}if isinstance({var}, dict):')
+    lines.extend(body)
+    return lines
+
+
+def compile_schema(schema: dict):
+    """
+    Compile schema into a specialized validation function.
+
+    :param dict schema: response schema.
+    :return callable: function returning True for valid instances, or None
+        if the schema uses keywords the compiler does not handle.
+    """
+    validator_class = validator_for(schema)
+    try:
+        validator_class.check_schema(schema)
+        keywords = frozenset(validator_class.VALIDATORS)
+        lines = ['def validate(v0):']
+        lines.extend(_compile_node(schema, 'v0', 1, keywords, [0]))
+        lines.append('    return True')
+    except (SchemaError, _Unsupported) as err:
+        logger.warning(f'[SchemaCompiler] Schema not compiled. {err}.')
+        return None
+    namespace = {'_MISSING': _MISSING}
+    exec(compile('\n'.join(lines), '<coindesk-schema>', 'exec'), namespace)
+    validate = namespace['validate']
+    validate.source = '\n'.join(lines)
+    return validate
+
+
+def get_compiled_validator(schema: dict):
+    """
+    Get compiled validator for schema, compiling it on first use.
+
+    :param dict schema: response schema.
+    :return callable: compiled validation function or None.
+    """
+    key = id(schema)
+    entry = _compiled.get(key)
+    if entry is None or entry[0] is not schema:
+        with _lock:
+            entry = (schema, compile_schema(schema))
+            _compiled[key] = entry
+    return entry[1]
+
+
+def validate(instance, schema: dict):
+    """
+    Validate instance against schema.
+    Valid instances only run the compiled checks; invalid ones are validated
+    again with jsonschema so raised errors and messages are unchanged.
+
+    :param * instance: decoded response data.
+    :param dict schema: response schema.
+    """
+    check = get_compiled_validator(schema)
+    if check is not None and check(instance):
+        return None
+    return jsonschema.validate(instance, schema)
+
+
+def get_shape(instance):
+    """
+    Get structural fingerprint of decoded response data.
+    Object keys and value types are part of the shape, except for objects whose
+    values are all scalars of one type (like historical closes keyed by date),
+    which only keep that type so varying keys do not change the shape.
+
+    :param * instance: decoded response data.
+    :return tuple: hashable shape.
+    """
+    cls = type(instance)
+    if cls is dict:
+        shapes = [get_shape(value) for value in instance.values()]
+        if shapes and type(shapes[0]) is type and shapes.count(shapes[0]) == len(shapes):
+            return ('map', shapes[0])
+        return (tuple(instance), tuple(shapes))
+    if cls is list:
+        return ('array', frozenset(map(get_shape, instance)))
+    return cls
+
+
+class ValidationPolicy(object):
+    """
+    Decide which responses run full schema validation.
+    """
+
+    name = 'always'
+
+    def __init__(self):
+        """
+        Initialize validation policy.
+        """
+        self.stats = Counter()
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        """
+        Represent class via params string.
+
+        :return str: class representation.
+        """
+        classname = self.__class__.__name__
+        return f'<{classname} - {self.stats["validated"]} validated, {self.stats["skipped"]} skipped>'
+
+    def should_validate(self, instance, schema: dict):
+        """
+        Check whether response must be validated.
+
+        :param * instance: decoded response data.
+        :param dict schema: response schema.
+        :return bool: True to run full validation.
+        """
+        return True
+
+    def validate(self, instance, schema: dict):
+        """
+        Validate response if the policy requires it.
+
+        :param * instance: decoded response data.
+        :param dict schema: response schema.
+        :return bool: True if the response was validated.
+        """
+        if not self.should_validate(instance, schema):
+            self.stats['skipped'] += 1
+            return False
+        validate(instance, schema)
+        self.stats['validated'] += 1
+        return True
+
+
+class FirstNPolicy(ValidationPolicy):
+    """
+    Validate the first responses of every schema only.
+    """
+
+    name = 'first'
+
+    def __init__(self, first: int = None):
+        """
+        Initialize first N validation policy.
+
+        :param int first: number of responses validated per schema.
+        """
+        super(FirstNPolicy, self).__init__()
+        self._first = first if first is not None else settings.VALIDATION_FIRST_N
+        self._seen = Counter()
+
+    def should_validate(self, instance, schema: dict):
+        with self._lock:
+            self._seen[id(schema)] += 1
+            return self._seen[id(schema)] <= self._first
+
+
+class SampledPolicy(ValidationPolicy):
+    """
+    Validate a random sample of one in sample_rate responses.
+    """
+
+    name = 'sampled'
+
+    def __init__(self, sample_rate: int = None):
+        """
+        Initialize sampled validation policy.
+
+        :param int sample_rate: validate one in sample_rate responses.
+        """
+        super(SampledPolicy, self).__init__()
+        self._sample_rate = max(1, sample_rate if sample_rate is not None else settings.VALIDATION_SAMPLE_RATE)
+
+    def should_validate(self, instance, schema: dict):
+        return random.randrange(self._sample_rate) == 0
+
+
+class ShapePolicy(ValidationPolicy):
+    """
+    Validate responses whose structural shape was not seen before.
+    """
+
+    name = 'shape'
+
+    def __init__(self, cache_size: int = None):
+        """
+        Initialize shape fingerprint validation policy.
+
+        :param int cache_size: maximum number of known shapes kept.
+        """
+        super(ShapePolicy, self).__init__()
+        self._cache_size = cache_size if cache_size is not None else settings.VALIDATION_SHAPE_CACHE
+        self._shapes = set()
+
+    def should_validate(self, instance, schema: dict):
+        return (id(schema), get_shape(instance)) not in self._shapes
+
+    def validate(self, instance, schema: dict):
+        key = (id(schema), get_shape(instance))
+        if key in self._shapes:
+            self.stats['skipped'] += 1
+            return False
+        validate(instance, schema)
+        self.stats['validated'] += 1
+        # Only shapes that passed validation are trusted afterwards
+        with self._lock:
+            if len(self._shapes) >= self._cache_size: self._shapes.clear()
+            self._shapes.add(key)
+        return True
+
+
+VALIDATION_POLICIES = {policy.name: policy for policy in
+                       (ValidationPolicy, FirstNPolicy, SampledPolicy, ShapePolicy)}
+
+_policy = None
+
+
+def get_validation_policy():
+    """
+    Get validation policy applied to parsed responses.
+
+    :return obj: ValidationPolicy instance.
+    """
+    if _policy is None:
+        set_validation_policy(settings.VALIDATION_POLICY)
+    return _policy
+
+
+def set_validation_policy(policy):
+    """
+    Set validation policy applied to parsed responses.
+
+    :param * policy: ValidationPolicy instance or policy name
+        (always, first, sampled, shape).
+    :return obj: ValidationPolicy instance.
+    """
+    global _policy
+    if isinstance(policy, str):
+        if policy not in VALIDATION_POLICIES:
+            msg = f'Invalid validation policy {policy}. Allowed values: {", ".join(VALIDATION_POLICIES)}.'
+            logger.error(f'[ValidationPolicy] Policy error. {msg}')
+            raise CoindeskAPIClientError(msg)
+        policy = VALIDATION_POLICIES[policy]()
+    elif not isinstance(policy, ValidationPolicy):
+        msg = 'Validation policy must be a ValidationPolicy instance or policy name.'
+        logger.error(f'[ValidationPolicy] Policy error. {msg}')
+        raise CoindeskAPIClientError(msg)
+    _policy = policy
+    return policy
@@ -0,0 +1,143 @@
+# encoding: utf-8
+
+import asyncio
+import time
+from collections import OrderedDict, namedtuple
+from logging import getLogger
+
+from aiohttp import ClientSession, ClientTimeout
+
+from . import decorators, registry, settings, utils, validators
+from .client import CoindeskAPIHttpRequest
+from .specs import RequestSpec
+
+# Custom logger for warmup module
+logger = getLogger(__name__)
+
+# Outcome of one warm-up step
+WarmupStep = namedtuple('WarmupStep', ['seconds', 'warmed', 'error'])
+
+
+async def warmup_async(session=None, connections: int = None, data_types: list = None,
+                       currencies: list = None):
+    """
+    Pay cold start costs ahead of the first request.
+    Connections stay pooled only as long as the session they were opened in,
+    so pass the session later requests will use.
+
+    :param obj session: open session yielded by the request transport,
+        None skips opening connections.
+    :param int connections: number of pooled connections opened to the api host.
+    :param list data_types: data types whose response validators are compiled.
+    :param list currencies: currency codes whose currentprice validators are compiled.
+    :return dict: WarmupStep per step (registry, validators, connections), in order.
+    """
+    connections = connections if connections is not None else settings.WARMUP_CONNECTIONS
+    data_types = data_types if data_types is not None else settings.WARMUP_DATA_TYPES
+    currencies = currencies if currencies is not None else settings.WARMUP_CURRENCIES
+    report = OrderedDict()
+    report['registry'] = _run_step(lambda: len(registry.currency_registry.codes))
+    report['validators'] = _run_step(lambda: _compile_validators(data_types, currencies))
+    report['connections'] = await _run_async_step(_open_connections(session, connections))
+    logger.info('[Warmup] Warm-up finished. %s.', ', '.join(
+        f'{name} {step.warmed} in {step.seconds * 1000:.1f} ms' for name, step in report.items()))
+    return report
+
+
+def warmup(request: CoindeskAPIHttpRequest = None, connections: int = None,
+           data_types: list = None, currencies: list = None):
+    """
+    Pay cold start costs ahead of the first request, blocking until done.
+    Connections are opened in the session the request transport keeps for
+    synchronous calls of the calling thread, so pass the request or client
+    later calls are made with. No connections are opened without request.
+
+    :param obj request: request or client whose transport is warmed up.
+    :param int connections: number of connections opened to the api host.
+    :param list data_types: data types whose response validators are compiled.
+    :param list currencies: currency codes whose currentprice validators are compiled.
+    :return dict: WarmupStep per step (registry, validators, connections), in order.
+    """
+    async def run():
+        if request is None:
+            return await warmup_async(None, connections, data_types, currencies)
+        async with request.transport.session() as session:
+            return await warmup_async(session, connections, data_types, currencies)
+    return decorators.get_event_loop().run_until_complete(run())
+
+
+def _run_step(step):
+    """
+    Run synchronous warm-up step, timing it and keeping its error.
+
+    :param callable step: function returning number of warmed items.
+    :return obj: WarmupStep instance.
+    """
+    start = time.perf_counter()
+    try:
+        warmed, error = step(), None
+    except Exception as err:
+        warmed, error = 0, err
+        logger.warning(f'[Warmup] Step error. {err}.')
+    return WarmupStep(time.perf_counter() - start, warmed, error)
+
+
+async def _run_async_step(step):
+    """
+    Run asynchronous warm-up step, timing it and keeping its error.
+
+    :param coroutine step: coroutine returning number of warmed items.
+    :return obj: WarmupStep instance.
+    """
+    start = time.perf_counter()
+    try:
+        warmed, error = await step, None
+    except Exception as err:
+        warmed, error = 0, err
+        logger.warning(f'[Warmup] Step error. {err}.')
+    return WarmupStep(time.perf_counter() - start, warmed, error)
+
+
+def _compile_validators(data_types: list, currencies: list):
+    """
+    Build schemas and compile their validators.
+    Currentprice schemas of every currency are one shared schema object, so
+    it is compiled once however many currencies are given.
+
+    :return int: number of validators compiled.
+    """
+    schemas = [(data_type, None) for data_type in data_types]
+    if settings.API_CURRENTPRICE_DATA_TYPE in data_types:
+        schemas.extend((settings.API_CURRENTPRICE_DATA_TYPE, currency) for currency in currencies)
+    validators.get_validation_policy()
+    compiled = {}
+    for data_type, currency in schemas:
+        if currency is not None: utils.validate_currency(currency)
+        schema = utils.get_schema(data_type, currency)
+        compiled[id(schema)] = validators.get_compiled_validator(schema)
+    return len(compiled)
+
+
+async def _open_connections(session, connections: int):
+    """
+    Open keep-alive connections to api host through the session pool,
+    filling the connector dns cache on the way. Only aiohttp sessions hold
+    connections; other transports are skipped.
+
+    :return int: number of connections opened.
+    """
+    if not isinstance(session, ClientSession) or connections < 1: return 0
+    url = RequestSpec(settings.API_CURRENTPRICE_DATA_TYPE).url
+    timeout = ClientTimeout(total=settings.REQUEST_MAX_TIMEOUT)
+
+    async def connect():
+        # HEAD completes the tls handshake and releases the connection to the pool
+        async with session.head(url, headers=settings.REQUEST_HEADERS, timeout=timeout,
+                                allow_redirects=False):
+            pass
+
+    # Concurrent requests cannot share a connection, so each opens its own
+    results = await asyncio.gather(*(connect() for _ in range(connections)), return_exceptions=True)
+    errors = [result for result in results if isinstance(result, Exception)]
+    if len(errors) == connections: raise errors[0]
+    return connections - len(errors)
@@ -51,6 +51,15 @@ setup(
         "requests>=2.22.0",
         "furl>=2.1.0",
     ],
+    extras_require={
+        "parquet": ["pyarrow>=0.15.0"],
+    },
+    entry_points={
+        "console_scripts": [
+            "coindesk=coindesk.cli:main",
+            "coindesk-proxy=coindesk.proxy:main",
+        ],
+    },
     license='MIT',
     keywords='api asynchronous Bitcoin blockchain client Coindesk Python',
     classifiers=[
@@ -0,0 +1,13 @@
+# encoding: utf-8
+
+import pytest
+
+from coindesk import settings
+
+
+@pytest.fixture(autouse=True)
+def offline_settings(monkeypatch):
+    """
+    Keep tests offline: no supported currencies refresh against the live api.
+    """
+    monkeypatch.setattr(settings, 'CURRENCIES_REFRESH_TTL', None)
@@ -0,0 +1,69 @@
+# encoding: utf-8
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs, urlsplit
+
+from coindesk.transport import BaseTransport, TransportResponse
+
+
+def currentprice_data(rates: dict = None):
+    """
+    Get currentprice api response data.
+
+    :param dict rates: Bitcoin rate keyed by currency code.
+    :return dict: currentprice response data.
+    """
+    rates = rates if rates is not None else {'USD': 4000.0}
+    return {
+        'time': {'updated': 'Jan 1, 2019 00:00:00 UTC', 'updatedISO': '2019-01-01T00:00:00+00:00',
+                 'updateduk': 'Jan 1, 2019 at 00:00 GMT'},
+        'disclaimer': 'Test data.',
+        'chartName': 'Bitcoin',
+        'bpi': {code: {'code': code, 'rate': f'{rate:,.4f}', 'description': code, 'rate_float': rate}
+                for code, rate in rates.items()},
+    }
+
+
+def historical_data(url: str):
+    """
+    Get historical api response data with closes on the first and last
+    day of the requested range.
+
+    :param str url: historical api resource locator.
+    :return dict: historical response data.
+    """
+    query = parse_qs(urlsplit(url).query)
+    start, end = query['start'][0], query['end'][0]
+    return {'time': {'updated': 'Jan 2, 2019 00:03:00 UTC', 'updatedISO': '2019-01-02T00:03:00+00:00'},
+            'disclaimer': 'Test data.', 'bpi': {start: 1.0, end: 2.0}}
+
+
+class FakeTransport(BaseTransport):
+    """
+    Transport answering every url with the response built by a handler.
+    """
+
+    def __init__(self, handler=None, delay: float = 0):
+        """
+        Initialize fake transport.
+
+        :param obj handler: callable taking the url, returning data, bytes or TransportResponse.
+        :param float delay: seconds each request takes.
+        """
+        self._handler = handler if handler is not None else (lambda url: currentprice_data())
+        self._delay = delay
+        self.urls = []
+
+    @asynccontextmanager
+    async def session(self):
+        yield None
+
+    async def request(self, session, url: str, options: dict):
+        self.urls.append(url)
+        if self._delay: await asyncio.sleep(self._delay)
+        result = self._handler(url)
+        if isinstance(result, TransportResponse): return result
+        body = result if isinstance(result, bytes) else json.dumps(result).encode()
+        return TransportResponse(url, 200, 'OK', {'Content-Type': 'application/javascript'}, body)
@@ -0,0 +1,49 @@
+# encoding: utf-8
+
+import json
+from os.path import exists
+
+import pytest
+
+from coindesk.backfill import BackfillRunner, WorkUnit, plan_work_units
+from coindesk.exceptions import CoindeskAPIClientError
+from coindesk.transport import TransportResponse
+
+from .fakes import FakeTransport, historical_data
+
+UNITS = plan_work_units(['USD', 'EUR'], ['USD'], '2019-01-01', '2019-01-20', 10)
+
+
+def failing_eur_data(url: str):
+    if 'currency=EUR' in url and 'start=2019-01-11' in url:
+        return TransportResponse(url, 500, 'Internal Server Error')
+    return historical_data(url)
+
+
+def test_plan_work_units():
+    assert UNITS == [
+        WorkUnit('USD', 'USD', '2019-01-01', '2019-01-10'), WorkUnit('USD', 'USD', '2019-01-11', '2019-01-20'),
+        WorkUnit('USD', 'EUR', '2019-01-01', '2019-01-10'), WorkUnit('USD', 'EUR', '2019-01-11', '2019-01-20')]
+    assert plan_work_units(['USD'], ['USD'], '2019-01-01', '2019-01-03', 2)[-1].end == '2019-01-03'
+
+
+def test_plan_invalid_range_raises():
+    with pytest.raises(CoindeskAPIClientError):
+        plan_work_units(['USD'], ['USD'], '2019-01-02', '2019-01-01')
+
+
+def test_backfill_checkpoints_and_resumes(tmp_path):
+    transport = FakeTransport(failing_eur_data)
+    runner = BackfillRunner(str(tmp_path), processes=2, retries=1, transport=transport)
+    progress = runner.run(UNITS)
+    assert (progress.done, progress.failed, progress.days) == (3, 1, 6)
+    assert len(runner.completed_units()) == 3
+    with open(runner.unit_path(UNITS[0])) as unit_file:
+        assert json.load(unit_file)['bpi'] == {'2019-01-01': 1.0, '2019-01-10': 2.0}
+    assert not exists(runner.unit_path(UNITS[3]))
+
+    runner = BackfillRunner(str(tmp_path), processes=2, retries=1, transport=FakeTransport(historical_data))
+    progress = runner.run(UNITS)
+    assert (progress.skipped, progress.done, progress.failed) == (3, 1, 0)
+    assert len(runner.completed_units()) == 4
+
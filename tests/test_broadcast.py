@@ -0,0 +1,62 @@
+# encoding: utf-8
+
+import asyncio
+
+import pytest
+
+from coindesk.broadcast import DROP_OLDEST, LATEST_ONLY, PriceBroadcaster
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIClientError
+
+from .fakes import FakeTransport, currentprice_data
+
+
+def drain(subscription):
+    updates = []
+    while subscription._pending:
+        updates.append(asyncio.run(subscription.get()))
+    return updates
+
+
+def test_publish_only_changed_quotes():
+    broadcaster = PriceBroadcaster()
+    subscription = broadcaster.subscribe(['EUR'])
+    assert broadcaster.publish(currentprice_data({'USD': 1.0, 'EUR': 2.0})) == 2
+    assert broadcaster.publish(currentprice_data({'USD': 1.5, 'EUR': 2.0})) == 1
+    assert [(update.currency, update.rate_float) for update in drain(subscription)] == [('EUR', 2.0)]
+
+
+def test_new_subscribers_get_latest_updates():
+    broadcaster = PriceBroadcaster()
+    broadcaster.publish(currentprice_data({'USD': 1.0, 'EUR': 2.0}))
+    assert [update.currency for update in drain(broadcaster.subscribe())] == ['USD', 'EUR']
+
+
+@pytest.mark.parametrize('mode, rates', [(DROP_OLDEST, [2.0, 3.0]), (LATEST_ONLY, [3.0])])
+def test_slow_subscribers_drop_updates(mode, rates):
+    broadcaster = PriceBroadcaster()
+    subscription = broadcaster.subscribe(maxsize=2, mode=mode)
+    for rate in (1.0, 2.0, 3.0):
+        broadcaster.publish(currentprice_data({'USD': rate}))
+    assert [update.rate_float for update in drain(subscription)] == rates
+    assert subscription.stats['dropped'] == 3 - len(rates)
+
+
+def test_invalid_mode_raises():
+    with pytest.raises(CoindeskAPIClientError):
+        PriceBroadcaster().subscribe(mode='block')
+
+
+def test_polling_fans_out_until_stopped():
+    transport = FakeTransport(lambda url: currentprice_data({'USD': 4000.0, 'EUR': 3200.0}))
+    broadcaster = PriceBroadcaster(interval=0.01, request=CoindeskAPIHttpRequest(retries=1, transport=transport))
+
+    async def run():
+        async with broadcaster:
+            first, second = broadcaster.subscribe(['USD']), broadcaster.subscribe(['EUR'])
+            updates = await asyncio.gather(first.get(), second.get())
+        return updates, await first.get(), first.closed
+    (usd, eur), after_stop, closed = asyncio.run(run())
+    assert (usd.rate_float, eur.rate_float) == (4000.0, 3200.0)
+    assert after_stop is None and closed
+    assert not broadcaster.running
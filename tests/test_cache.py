@@ -0,0 +1,75 @@
+# encoding: utf-8
+
+import time
+
+import pytest
+
+from coindesk.cache import CurrentPriceCache
+from coindesk.exceptions import CoindeskAPIClientError
+from coindesk.transport import TransportResponse
+
+from .fakes import FakeTransport, currentprice_data
+
+
+class Upstream(object):
+    """
+    Currentprice upstream whose rate and availability tests can change.
+    """
+
+    def __init__(self):
+        self.rate = 4000.0
+        self.down = False
+
+    def __call__(self, url: str):
+        if self.down: return TransportResponse(url, 503, 'Service Unavailable')
+        return currentprice_data({'USD': self.rate})
+
+
+def get_rate(cache: CurrentPriceCache):
+    return cache.get()['bpi']['USD']['rate_float']
+
+
+@pytest.fixture
+def upstream():
+    return Upstream()
+
+
+def test_fresh_value_served_from_cache(upstream):
+    cache = CurrentPriceCache(ttl=60, retries=1, transport=FakeTransport(upstream))
+    assert get_rate(cache) == 4000.0
+    upstream.rate = 5000.0
+    assert get_rate(cache) == 4000.0
+    assert (cache.stats['misses'], cache.stats['hits'], cache.stats['fetches']) == (1, 1, 1)
+
+
+def test_stale_value_served_while_revalidating(upstream):
+    cache = CurrentPriceCache(ttl=0, max_stale=60, retries=1, transport=FakeTransport(upstream))
+    get_rate(cache)
+    upstream.rate = 5000.0
+    assert get_rate(cache) == 4000.0
+    deadline = time.monotonic() + 5
+    while cache._entries[None].value['bpi']['USD']['rate_float'] != 5000.0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.stats['fetches'] == 2
+
+
+def test_stale_value_served_if_error(upstream):
+    cache = CurrentPriceCache(ttl=0, max_stale=0, stale_if_error=60, retries=1, transport=FakeTransport(upstream))
+    get_rate(cache)
+    upstream.down = True
+    assert get_rate(cache) == 4000.0
+    assert get_rate(cache) == 4000.0
+    assert cache.stats['fetches'] == 2
+    assert cache.stats['stale_if_error'] == 2
+
+
+def test_error_without_value_raises(upstream):
+    upstream.down = True
+    cache = CurrentPriceCache(retries=1, transport=FakeTransport(upstream))
+    with pytest.raises(CoindeskAPIClientError):
+        cache.get()
+
+
+def test_invalid_ttl_raises():
+    with pytest.raises(CoindeskAPIClientError):
+        CurrentPriceCache(ttl=10, max_stale=5)
@@ -0,0 +1,66 @@
+# encoding: utf-8
+
+import pytest
+
+from coindesk.candles import CandleAggregator, CandleBuffer, parse_interval
+from coindesk.exceptions import CoindeskAPIClientError
+
+from .fakes import currentprice_data
+
+
+@pytest.mark.parametrize('interval, seconds', [(30, 30), ('30s', 30), ('5m', 300), ('1h', 3600), ('1d', 86400)])
+def test_parse_interval(interval, seconds):
+    assert parse_interval(interval) == seconds
+
+
+@pytest.mark.parametrize('interval', ['0m', '5x', '', True, -5])
+def test_parse_invalid_interval(interval):
+    with pytest.raises(CoindeskAPIClientError):
+        parse_interval(interval)
+
+
+def test_ticks_bucketed_per_interval():
+    aggregator = CandleAggregator(intervals=('1m', '5m'))
+    for timestamp, price in [(0, 10.0), (30, 12.0), (59, 9.0), (60, 11.0), (299, 13.0), (300, 14.0)]:
+        aggregator.add_tick('USD', price, timestamp)
+    minutes = aggregator.candles('USD', '1m')
+    assert list(minutes.start) == [0, 60, 240]
+    assert (minutes.open[0], minutes.high[0], minutes.low[0], minutes.close[0], minutes.ticks[0]) == \
+        (10.0, 12.0, 9.0, 9.0, 3)
+    five_minutes = aggregator.candles('USD', '5m')
+    assert list(five_minutes.start) == [0]
+    assert (five_minutes.high[0], five_minutes.close[0], five_minutes.ticks[0]) == (13.0, 13.0, 5)
+    assert aggregator.current('USD', '5m') == (300, 14.0, 14.0, 14.0, 14.0, 1)
+
+
+def test_late_ticks_after_flush_merge_into_flushed_candle():
+    aggregator = CandleAggregator(intervals=('1m',))
+    aggregator.add_tick('USD', 10.0, 0)
+    aggregator.flush()
+    aggregator.add_tick('USD', 15.0, 30)
+    aggregator.add_tick('USD', 11.0, 60)
+    aggregator.flush()
+    candles = aggregator.candles('USD', '1m')
+    assert list(candles.start) == [0, 60]
+    assert (candles.high[0], candles.close[0], candles.ticks[0]) == (15.0, 15.0, 2)
+
+
+def test_update_skips_quotes_without_rate():
+    aggregator = CandleAggregator(intervals=('1m',))
+    data = currentprice_data({'USD': 4000.0, 'EUR': 3200.0})
+    del data['bpi']['EUR']['rate_float']
+    aggregator.update(data)
+    assert aggregator.currencies == ['USD']
+
+
+def test_ring_buffer_keeps_latest_candles():
+    buffer = CandleBuffer(3)
+    for start in range(5):
+        buffer.push(start, 1.0, 1.0, 1.0, 1.0, 1)
+    assert len(buffer) == 3
+    assert list(buffer.arrays().start) == [2, 3, 4]
+
+
+def test_unknown_interval_raises():
+    with pytest.raises(CoindeskAPIClientError):
+        CandleAggregator(intervals=('1m',)).candles('USD', '5m')
@@ -0,0 +1,56 @@
+# encoding: utf-8
+
+import argparse
+import asyncio
+import io
+import json
+
+import pytest
+
+from coindesk import cli
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIClientError
+
+from .fakes import FakeTransport, currentprice_data, historical_data
+
+
+def fake_data(url: str):
+    return historical_data(url) if 'historical' in url else currentprice_data({'EUR': 3200.0})
+
+
+@pytest.fixture
+def fake_request(monkeypatch):
+    request = CoindeskAPIHttpRequest(retries=1, transport=FakeTransport(fake_data))
+    monkeypatch.setattr(CoindeskAPIHttpRequest, 'start', classmethod(lambda cls, **kwargs: request))
+    return request
+
+
+def stream(queries: list, fmt: str = 'ndjson'):
+    args = argparse.Namespace(retries=1, timeout=5, concurrency=2, format=fmt)
+    output = io.StringIO()
+    failed = asyncio.run(cli.stream_results([cli.parse_query(query) for query in queries], args, output))
+    return failed, output.getvalue().splitlines()
+
+
+def test_parse_query():
+    assert cli.parse_query('historical:EUR:2019-01-01') == \
+        {'data_type': 'historical', 'currency': 'EUR', 'start': '2019-01-01'}
+    assert cli.parse_query(' {"data_type": "currentprice", "currency": ""} ') == {'data_type': 'currentprice'}
+    with pytest.raises(CoindeskAPIClientError):
+        cli.parse_query('{"data_type": ')
+
+
+def test_stream_ndjson_results(fake_request):
+    failed, lines = stream(['currentprice:EUR', 'historical:USD:2019-01-01:2019-01-05', 'unknown'])
+    results = {result['query']['data_type']: result for result in map(json.loads, lines)}
+    assert failed == 1
+    assert results['currentprice']['data']['bpi']['EUR']['rate_float'] == 3200.0
+    assert results['historical']['data']['bpi'] == {'2019-01-01': 1.0, '2019-01-05': 2.0}
+    assert results['unknown']['error']
+
+
+def test_stream_csv_results(fake_request):
+    failed, lines = stream(['historical:USD:2019-01-01:2019-01-05'], fmt='csv')
+    assert failed == 0
+    assert lines == ['data_type,time,currency,rate,error',
+                     'historical,2019-01-01,USD,1.0,', 'historical,2019-01-05,USD,2.0,']
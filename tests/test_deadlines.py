@@ -0,0 +1,68 @@
+# encoding: utf-8
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from coindesk import deadlines
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.deadlines import Deadline, validate_deadline
+from coindesk.exceptions import CoindeskAPIClientError, CoindeskAPIHttpRequestError
+from coindesk.specs import RequestSpec
+
+from .fakes import FakeTransport, currentprice_data
+
+SPEC = RequestSpec('currentprice')
+
+
+def execute(request, deadline):
+    async def run():
+        async with request.transport.session() as session:
+            return await request.execute(session, SPEC, deadline=deadline)
+    return asyncio.run(run())
+
+
+def test_deadline_remaining_and_cap():
+    deadline = Deadline.within(10)
+    assert 9 < deadline.remaining <= 10 and not deadline.expired
+    assert deadline.cap(1) == 1 and deadline.cap(60) <= 10
+    assert Deadline.within(-1).remaining == 0.0 and Deadline.within(-1).expired
+    assert abs(Deadline.from_timestamp(time.time() + 5).remaining - 5) < 0.1
+
+
+@pytest.mark.parametrize('deadline', [-1, True, '5'])
+def test_invalid_deadline_raises(deadline):
+    with pytest.raises(CoindeskAPIClientError):
+        validate_deadline(deadline)
+
+
+def test_transport_sees_remaining_time():
+    remaining = []
+
+    def handler(url):
+        remaining.append(deadlines.get_remaining_time())
+        return currentprice_data()
+    execute(CoindeskAPIHttpRequest(retries=1, transport=FakeTransport(handler)), 5)
+    assert 4 < remaining[0] <= 5
+    assert deadlines.get_remaining_time() is None
+
+
+def test_hanging_request_stops_at_deadline():
+    request = CoindeskAPIHttpRequest(retries=3, timeout=30, transport=FakeTransport(delay=60))
+    started = time.monotonic()
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        execute(request, 0.2)
+    assert time.monotonic() - started < 1
+
+
+def test_retries_and_backoff_stop_at_deadline():
+    def handler(url):
+        raise ClientConnectionError('refused')
+    transport = FakeTransport(handler)
+    started = time.monotonic()
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        execute(CoindeskAPIHttpRequest(retries=10, transport=transport), 0.3)
+    assert time.monotonic() - started < 1.5
+    assert 1 <= len(transport.urls) < 10
@@ -0,0 +1,61 @@
+# encoding: utf-8
+
+import csv
+
+import pytest
+
+from coindesk.exceptions import CoindeskAPIExportError
+from coindesk.export import CSVPriceExporter, get_exporter, iter_response_rows
+
+HISTORICAL = {'bpi': {'2019-01-01': 3843.52, '2019-01-02': 3943.41}}
+CURRENTPRICE = {'time': {'updatedISO': '2019-01-03T00:00:00+00:00'},
+                'bpi': {'EUR': {'code': 'EUR', 'rate_float': 3350.1}}}
+
+
+def read_csv(path):
+    with open(path, newline='') as infile:
+        return list(csv.reader(infile))
+
+
+def test_iter_response_rows():
+    assert list(iter_response_rows(HISTORICAL, 'USD')) == [
+        ('2019-01-01', 'USD', 3843.52), ('2019-01-02', 'USD', 3943.41)]
+    assert list(iter_response_rows(CURRENTPRICE)) == [('2019-01-03T00:00:00+00:00', 'EUR', 3350.1)]
+
+
+def test_csv_export_in_row_groups(tmp_path):
+    path = str(tmp_path / 'prices.csv')
+    with get_exporter(path, row_group_size=1) as exporter:
+        exporter.write_responses([HISTORICAL, CURRENTPRICE])
+    rows = read_csv(path)
+    assert rows[0] == ['time', 'currency', 'rate']
+    assert len(rows) == 4
+
+
+def test_csv_append_keeps_single_header(tmp_path):
+    path = str(tmp_path / 'prices.csv')
+    with CSVPriceExporter(path) as exporter:
+        exporter.write_response(HISTORICAL)
+    with CSVPriceExporter(path, append=True) as exporter:
+        exporter.write_response(HISTORICAL)
+    rows = read_csv(path)
+    assert rows.count(['time', 'currency', 'rate']) == 1
+    assert len(rows) == 5
+
+
+def test_parquet_export_and_append(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = str(tmp_path / 'prices.parquet')
+    with get_exporter(path) as exporter:
+        exporter.write_response(HISTORICAL)
+    with get_exporter(path, append=True) as exporter:
+        exporter.write_response(CURRENTPRICE)
+    table = pq.read_table(path)
+    assert table.column_names == ['time', 'currency', 'rate']
+    assert table.column('rate').to_pylist() == [3843.52, 3943.41, 3350.1]
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_unsupported_format_raises(tmp_path):
+    with pytest.raises(CoindeskAPIExportError):
+        get_exporter(str(tmp_path / 'prices.xlsx'))
@@ -0,0 +1,66 @@
+# encoding: utf-8
+
+from decimal import Decimal
+
+import pytest
+
+from coindesk.exceptions import CoindeskAPIHttpResponseError
+from coindesk.fixedpoint import FixedPrice, FixedPriceArray, get_fixed_prices, parse_float, parse_rate
+
+from .fakes import currentprice_data
+
+
+@pytest.mark.parametrize('rate, digits, value', [
+    ('9,123.4567', 4, 91234567),
+    ('9123.4567', 4, 91234567),
+    ('1,234,567.8', 4, 12345678000),
+    ('-0.5', 2, -50),
+    (' 12 ', 2, 1200),
+    ('0.123456789', 8, 12345678),
+    ('7.99', 0, 7),
+])
+def test_parse_rate(rate, digits, value):
+    assert parse_rate(rate, digits) == value
+
+
+@pytest.mark.parametrize('rate', ['', '1,23.4', '12,3456', '1.2.3', '$5', '1e5', 5.0, None])
+def test_parse_invalid_rate(rate):
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        parse_rate(rate, 4)
+
+
+def test_parse_overflow():
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        parse_rate('99999999999999', 8)
+
+
+def test_parse_float_rounds():
+    assert parse_float(0.1 + 0.2, 8) == 30000000
+    assert parse_float(9123.4567, 4) == 91234567
+
+
+def test_fixed_price_arithmetic():
+    price = FixedPrice.from_rate('9,123.4567', 4)
+    assert str(price + FixedPrice.from_rate('0.0433', 4)) == '9123.5000'
+    assert (price * 2).to_decimal() == Decimal('18246.9134')
+    assert -price < price <= price
+    assert float(price - price) == 0.0
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        price + FixedPrice.from_rate('1', 2)
+
+
+def test_fixed_price_array():
+    prices = FixedPriceArray.from_rates(['1.50', '2,000.25'], 2)
+    assert prices.values.typecode == 'q'
+    assert list((prices + FixedPrice(50, 2)).values) == [200, 200075]
+    assert list((prices - prices).values) == [0, 0]
+    assert prices.sum() == FixedPrice(200175, 2)
+    assert list(prices.to_decimals()) == [Decimal('1.50'), Decimal('2000.25')]
+    assert prices[1:].values.tolist() == [200025]
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        prices + FixedPriceArray.from_floats([1.0], 2)
+
+
+def test_fixed_prices_from_response():
+    prices = get_fixed_prices(currentprice_data({'USD': 4000.25, 'EUR': 3200.5}), 4)
+    assert prices == {'USD': FixedPrice(40002500, 4), 'EUR': FixedPrice(32005000, 4)}
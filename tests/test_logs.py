@@ -0,0 +1,53 @@
+# encoding: utf-8
+
+import io
+import logging
+
+from coindesk import logs
+from coindesk.logs import RingBufferHandler, SamplingFilter
+
+
+def make_record(name: str = 'coindesk.client', level: int = logging.INFO):
+    return logging.LogRecord(name, level, __file__, 1, 'Request %s.', ('sent',), None)
+
+
+def test_sampling_keeps_one_in_rate():
+    sampling_filter = SamplingFilter(sample_rate=4)
+    kept = [sampling_filter.filter(make_record()) for _ in range(8)]
+    assert kept.count(True) == 2
+    assert sampling_filter.dropped == 6
+
+
+def test_sampling_keeps_warnings_and_foreign_loggers():
+    sampling_filter = SamplingFilter(sample_rate=1000)
+    sampling_filter.filter(make_record())
+    assert sampling_filter.filter(make_record(level=logging.WARNING))
+    assert sampling_filter.filter(make_record(name='aiohttp.client'))
+
+
+def test_sampling_rate_limit():
+    sampling_filter = SamplingFilter(max_per_second=3)
+    kept = [sampling_filter.filter(make_record()) for _ in range(10)]
+    assert kept.count(True) <= 6
+
+
+def test_ring_buffer_dump():
+    handler = RingBufferHandler(capacity=2)
+    for _ in range(3):
+        handler.emit(make_record())
+    stream = io.StringIO()
+    assert handler.dump(stream) == 2
+    assert stream.getvalue().count('Request sent.') == 2
+    assert handler.records == []
+
+
+def test_hot_path_logging_toggles_handlers():
+    ring_buffer = logs.enable_hot_path_logging(sample_rate=10)
+    try:
+        assert logs.get_recent_events() is ring_buffer
+        logging.getLogger('coindesk.client').info('Request %s.', 'sent')
+        assert len(ring_buffer.records) == 1
+    finally:
+        logs.disable_hot_path_logging()
+    assert logs.get_recent_events() is None
+    assert logs.dump_recent_events() == 0
@@ -0,0 +1,65 @@
+# encoding: utf-8
+
+import asyncio
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIHttpRequestError
+from coindesk.planner import HistoricalRequestPlanner, merge_ranges
+from coindesk.transport import TransportResponse
+
+from .fakes import FakeTransport, historical_data
+
+
+def daily_data(url: str):
+    query = parse_qs(urlsplit(url).query)
+    if query['currency'][0] == 'JPY': return TransportResponse(url, 500, 'Internal Server Error')
+    first, last = date.fromisoformat(query['start'][0]), date.fromisoformat(query['end'][0])
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    return dict(historical_data(url), bpi={day.isoformat(): float(day.day) for day in days})
+
+
+@pytest.fixture
+def transport():
+    return FakeTransport(daily_data)
+
+
+@pytest.fixture
+def planner(transport):
+    return HistoricalRequestPlanner(window=0.01, request=CoindeskAPIHttpRequest(retries=1, transport=transport))
+
+
+def test_merge_ranges():
+    ranges = [('2019-01-05', '2019-01-09'), ('2019-01-01', '2019-01-03'), ('2019-01-04', '2019-01-04'),
+              ('2019-01-20', '2019-01-21'), ('2019-01-06', '2019-01-07')]
+    assert merge_ranges(ranges) == [('2019-01-01', '2019-01-09'), ('2019-01-20', '2019-01-21')]
+
+
+def test_overlapping_queries_share_one_fetch(planner, transport):
+    results = planner.get_many([{'start': '2019-01-01', 'end': '2019-01-05'},
+                                {'start': '2019-01-04', 'end': '2019-01-08'},
+                                {'start': '2019-01-02', 'end': '2019-01-02'}])
+    assert [sorted(result['bpi']) for result in results] == [
+        [f'2019-01-0{day}' for day in range(1, 6)], [f'2019-01-0{day}' for day in range(4, 9)], ['2019-01-02']]
+    assert len(transport.urls) == 1
+    assert planner.stats == {'queries': 3, 'fetches': 1}
+
+
+def test_queries_grouped_per_currency(planner, transport):
+    planner.get_many([{'start': '2019-01-01', 'end': '2019-01-02'},
+                      {'start': '2019-01-01', 'end': '2019-01-02', 'currency': 'EUR'},
+                      {'start': '2019-01-10', 'end': '2019-01-12', 'currency': 'EUR'}])
+    assert len(transport.urls) == 3
+
+
+def test_failed_fetch_fails_its_queries_only(planner):
+    async def run():
+        return await asyncio.gather(planner.get('2019-01-01', '2019-01-02', currency='JPY'),
+                                    planner.get('2019-01-01', '2019-01-02', currency='EUR'),
+                                    return_exceptions=True)
+    failed, succeeded = asyncio.run(run())
+    assert isinstance(failed, CoindeskAPIHttpRequestError)
+    assert sorted(succeeded['bpi']) == ['2019-01-01', '2019-01-02']
@@ -0,0 +1,62 @@
+# encoding: utf-8
+
+import pytest
+from jsonschema import ValidationError
+
+from coindesk import schemas, validators
+from coindesk.exceptions import CoindeskAPIClientError
+from coindesk.validators import FirstNPolicy, SampledPolicy, ShapePolicy, get_shape
+
+from .fakes import currentprice_data, historical_data
+
+HISTORICAL_URL = 'https://api.coindesk.com/v1/bpi/historical/close.json?start={}&end={}'
+
+
+@pytest.fixture
+def restore_policy():
+    policy = validators.get_validation_policy()
+    yield
+    validators.set_validation_policy(policy)
+
+
+def test_historical_shape_ignores_dates():
+    first = historical_data(HISTORICAL_URL.format('2019-01-01', '2019-01-02'))
+    second = historical_data(HISTORICAL_URL.format('2019-02-01', '2019-02-10'))
+    assert get_shape(first) == get_shape(second)
+    assert get_shape(currentprice_data({'USD': 1.0})) != get_shape(currentprice_data({'EUR': 1.0}))
+
+
+def test_first_n_policy():
+    policy = FirstNPolicy(first=2)
+    results = [policy.validate(currentprice_data(), schemas.CURRENTPRICE_SCHEMA) for _ in range(4)]
+    assert results == [True, True, False, False]
+    assert policy.stats == {'validated': 2, 'skipped': 2}
+
+
+def test_sampled_policy_rate_one_validates_all():
+    policy = SampledPolicy(sample_rate=1)
+    assert all(policy.should_validate({}, schemas.CURRENTPRICE_SCHEMA) for _ in range(10))
+
+
+def test_shape_policy_validates_new_shapes_only():
+    policy = ShapePolicy()
+    schema = schemas.CURRENTPRICE_SCHEMA
+    assert policy.validate(currentprice_data({'USD': 1.0}), schema)
+    assert not policy.validate(currentprice_data({'USD': 2.0}), schema)
+    assert policy.validate(currentprice_data({'USD': 1.0, 'EUR': 1.0}), schema)
+    assert policy.stats == {'validated': 2, 'skipped': 1}
+
+
+def test_shape_policy_does_not_trust_invalid_shapes():
+    policy = ShapePolicy()
+    invalid = {'time': {}, 'bpi': {}}
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            policy.validate(invalid, schemas.CURRENTPRICE_SCHEMA)
+
+
+def test_set_validation_policy(restore_policy):
+    assert isinstance(validators.set_validation_policy('shape'), ShapePolicy)
+    assert isinstance(validators.get_validation_policy(), ShapePolicy)
+    with pytest.raises(CoindeskAPIClientError):
+        validators.set_validation_policy('never')
@@ -0,0 +1,71 @@
+# encoding: utf-8
+
+import asyncio
+import threading
+
+import pytest
+
+from coindesk import decorators, settings
+from coindesk.exceptions import CoindeskAPIHttpRequestError
+from coindesk.transport import HttpTransport, TransportProfile
+
+
+def test_profile_defaults_to_settings():
+    profile = TransportProfile()
+    assert profile.limit == settings.TRANSPORT_LIMIT
+    assert profile.keepalive_timeout == settings.TRANSPORT_KEEPALIVE_TIMEOUT
+
+
+@pytest.mark.parametrize('option', ['limit', 'keepalive_timeout', 'dns_cache_ttl', 'read_timeout'])
+@pytest.mark.parametrize('value', [-1, 'ten', True])
+def test_profile_rejects_invalid_values(option, value):
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        TransportProfile(**{option: value})
+
+
+def test_profile_request_options():
+    profile = TransportProfile(keepalive_timeout=0, compression=False, connect_timeout=1)
+    options = profile.prepare_options({'headers': {'Accept': '*/*'}, 'timeout': 5})
+    assert options['headers'] == {'Accept': '*/*', 'Connection': 'close', 'Accept-Encoding': 'identity'}
+    assert (options['timeout'].total, options['timeout'].connect) == (5, 1)
+
+
+def test_profile_connector():
+    async def connector_options(profile):
+        connector = profile.connector()
+        try:
+            return connector.limit, connector.limit_per_host, connector.force_close
+        finally:
+            await connector.close()
+    assert asyncio.run(connector_options(TransportProfile(limit=7, limit_per_host=3))) == (7, 3, False)
+    assert asyncio.run(connector_options(TransportProfile(keepalive_timeout=0)))[2]
+
+
+async def enter_session(transport):
+    async with transport.session() as session:
+        return session
+
+
+def test_session_reused_across_sync_calls():
+    transport = HttpTransport()
+    loop = decorators.get_event_loop()
+    first = loop.run_until_complete(enter_session(transport))
+    second = loop.run_until_complete(enter_session(transport))
+    assert first is second and not first.closed
+    transport.close()
+    assert first.closed
+
+
+def test_session_closed_with_other_loops():
+    assert asyncio.run(enter_session(HttpTransport())).closed
+
+
+def test_thread_exit_closes_session():
+    transport, sessions = HttpTransport(), []
+
+    def run():
+        sessions.append(decorators.get_event_loop().run_until_complete(enter_session(transport)))
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert sessions[0].closed
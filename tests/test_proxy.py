@@ -0,0 +1,92 @@
+# encoding: utf-8
+
+import asyncio
+
+from aiohttp.test_utils import TestClient, TestServer
+
+from coindesk import settings
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.proxy import CoindeskProxy
+from coindesk.transport import TransportResponse
+
+from .fakes import FakeTransport, currentprice_data, historical_data
+
+
+class Upstream(FakeTransport):
+    """
+    Slow upstream that tests can take down.
+    """
+
+    def __init__(self):
+        super(Upstream, self).__init__(self.respond, delay=0.05)
+        self.down = False
+
+    def respond(self, url: str):
+        if self.down: return TransportResponse(url, 503, 'Service Unavailable')
+        return historical_data(url) if 'historical' in url else currentprice_data({'USD': 4000.0, 'EUR': 3200.0})
+
+
+def serve(proxy: CoindeskProxy, scenario):
+    async def run():
+        async with TestClient(TestServer(proxy.get_app())) as client:
+            return await scenario(client)
+    return asyncio.run(run())
+
+
+def make_proxy(upstream: Upstream, **kwargs):
+    return CoindeskProxy(request=CoindeskAPIHttpRequest(retries=1, transport=upstream), warmup=False, **kwargs)
+
+
+def test_concurrent_misses_share_one_fetch():
+    upstream = Upstream()
+    proxy = make_proxy(upstream)
+
+    async def scenario(client):
+        responses = await asyncio.gather(*(client.get('/v1/bpi/currentprice.json') for _ in range(5)))
+        bodies = [await response.json(content_type=None) for response in responses]
+        cached = await client.get('/v1/bpi/currentprice.json')
+        return [response.status for response in responses], bodies, cached.status
+    statuses, bodies, cached = serve(proxy, scenario)
+    assert statuses == [200] * 5 and cached == 200
+    assert bodies[0]['bpi']['EUR']['rate_float'] == 3200.0
+    assert len(upstream.urls) == 1
+    assert (proxy.stats['misses'], proxy.stats['coalesced'], proxy.stats['hits']) == (1, 4, 1)
+
+
+def test_stale_entry_served_when_upstream_fails():
+    upstream = Upstream()
+    proxy = make_proxy(upstream, ttls={settings.API_CURRENTPRICE_DATA_TYPE: 0})
+
+    async def scenario(client):
+        first = await client.get('/v1/bpi/currentprice.json')
+        upstream.down = True
+        second = await client.get('/v1/bpi/currentprice.json')
+        return first.status, second.status, await second.json(content_type=None)
+    first, second, body = serve(proxy, scenario)
+    assert (first, second) == (200, 200)
+    assert body['bpi']['USD']['rate_float'] == 4000.0
+    assert proxy.stats['stale'] == 1
+
+
+def test_errors_without_cached_entry():
+    upstream = Upstream()
+    upstream.down = True
+    proxy = make_proxy(upstream)
+
+    async def scenario(client):
+        failed = await client.get('/v1/bpi/currentprice.json')
+        invalid = await client.get('/v1/bpi/historical/close.json?index=FOO')
+        return failed.status, invalid.status
+    assert serve(proxy, scenario) == (502, 400)
+
+
+def test_historical_and_stats_endpoints():
+    proxy = make_proxy(Upstream())
+
+    async def scenario(client):
+        historical = await client.get('/v1/bpi/historical/close.json?start=2019-01-01&end=2019-01-05')
+        stats = await client.get(settings.PROXY_STATS_PATH)
+        return await historical.json(content_type=None), await stats.json()
+    historical, stats = serve(proxy, scenario)
+    assert historical['bpi'] == {'2019-01-01': 1.0, '2019-01-05': 2.0}
+    assert (stats['requests'], stats['upstream'], stats['entries']) == (1, 1, 1)
@@ -0,0 +1,41 @@
+# encoding: utf-8
+
+import pytest
+
+from coindesk.exceptions import CoindeskAPIHttpResponseError
+from coindesk.rates import CrossRateMatrix, get_bitcoin_rates
+
+CURRENTPRICE = {'bpi': {
+    'USD': {'code': 'USD', 'rate': '4,000.0000', 'rate_float': 4000.0},
+    'EUR': {'code': 'EUR', 'rate': '3,200.0000', 'rate_float': 3200.0},
+}}
+
+
+def test_bitcoin_rates_fall_back_to_rate_string():
+    rates = get_bitcoin_rates(CURRENTPRICE, {'bpi': {'GBP': {'code': 'GBP', 'rate': '2,000.0000'}}})
+    assert rates == {'USD': 4000.0, 'EUR': 3200.0, 'GBP': 2000.0}
+
+
+def test_cross_rates():
+    matrix = CrossRateMatrix.from_responses(CURRENTPRICE)
+    assert matrix.currencies == ('USD', 'EUR')
+    assert matrix['USD', 'EUR'] == pytest.approx(0.8)
+    assert matrix.rate('EUR', 'USD') == pytest.approx(1.25)
+    assert list(matrix.row('USD')) == pytest.approx([1.0, 0.8])
+    assert matrix.to_dict()['EUR']['EUR'] == pytest.approx(1.0)
+
+
+def test_unknown_currency_raises():
+    matrix = CrossRateMatrix({'USD': 4000.0})
+    assert 'GBP' not in matrix
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        matrix.rate('USD', 'GBP')
+
+
+@pytest.mark.parametrize('response', [
+    {'bpi': {'2019-01-01': 3843.52}},
+    {'bpi': {'USD': {'code': 'USD', 'rate_float': 0.0}}},
+])
+def test_invalid_rates_raise(response):
+    with pytest.raises(CoindeskAPIHttpResponseError):
+        CrossRateMatrix.from_responses(response)
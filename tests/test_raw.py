@@ -0,0 +1,38 @@
+# encoding: utf-8
+
+import json
+
+import pytest
+
+from coindesk.client import CoindeskAPIClient
+from coindesk.exceptions import CoindeskAPIClientError
+from coindesk.transport import TransportResponse
+
+from .fakes import FakeTransport, currentprice_data
+
+BODY = json.dumps(currentprice_data({'EUR': 3200.0})).encode()
+
+
+def make_client(handler):
+    return CoindeskAPIClient.start('currentprice', {'currency': 'EUR'}, retries=1,
+                                   transport=FakeTransport(handler))
+
+
+def test_raw_body_passed_through_unchanged():
+    response = make_client(lambda url: BODY).get_raw()
+    assert response.body == BODY
+    assert (response.status, response.url) == (200, 'https://api.coindesk.com/v1/bpi/currentprice/EUR.json')
+    assert bytes(response.view[:1]) == b'{'
+    assert response.json()['bpi']['EUR']['rate_float'] == 3200.0
+    assert 0 <= response.headers_time <= response.elapsed
+
+
+def test_raw_body_is_neither_decoded_nor_validated():
+    assert make_client(lambda url: b'not json').get_raw().body == b'not json'
+    with pytest.raises(CoindeskAPIClientError):
+        make_client(lambda url: b'not json').get()
+
+
+def test_raw_error_status_raises():
+    with pytest.raises(CoindeskAPIClientError):
+        make_client(lambda url: TransportResponse(url, 404, 'Not Found')).get_raw()
@@ -0,0 +1,52 @@
+# encoding: utf-8
+
+import json
+import time
+
+from coindesk import settings
+from coindesk.registry import CurrencyRegistry
+
+CURRENCIES = [{'currency': 'USD', 'country': 'United States Dollar'},
+              {'currency': 'EUR', 'country': 'Euro'}]
+
+
+def test_loads_packaged_currencies(tmp_path):
+    registry = CurrencyRegistry(cache_dir=str(tmp_path))
+    assert {'USD', 'EUR', 'GBP'} <= registry.codes
+
+
+def test_update_writes_cache_file_atomically(tmp_path):
+    registry = CurrencyRegistry(cache_dir=str(tmp_path))
+    assert registry.update(CURRENCIES)
+    with open(registry.cache_file) as cache_file:
+        assert json.load(cache_file) == {'SUPPORTED_CURRENCIES': CURRENCIES}
+    assert not list(tmp_path.glob('*.tmp'))
+    assert CurrencyRegistry(cache_dir=str(tmp_path)).codes == {'USD', 'EUR'}
+
+
+def test_stale_data_refreshes_in_background(tmp_path):
+    registry = CurrencyRegistry(cache_dir=str(tmp_path), ttl=1, fetch=lambda: CURRENCIES)
+    registry._fetched_at = registry._next_refresh = 0.0
+    registry._state = ([], frozenset())
+    assert registry.codes == frozenset()
+    registry._refresher.join(5)
+    assert registry.codes == {'USD', 'EUR'}
+
+
+def test_failed_refresh_backs_off(tmp_path):
+    def fetch():
+        raise OSError('offline')
+    registry = CurrencyRegistry(cache_dir=str(tmp_path), ttl=3600, fetch=fetch)
+    assert not registry.refresh()
+    first = registry._next_refresh - time.time()
+    assert not registry.refresh()
+    second = registry._next_refresh - time.time()
+    assert first > 0 and second > first
+    assert second <= 2 * settings.CURRENCIES_REFRESH_RETRY + 1
+
+
+def test_no_ttl_never_refreshes(tmp_path):
+    registry = CurrencyRegistry(cache_dir=str(tmp_path), fetch=lambda: CURRENCIES)
+    registry._fetched_at = 0.0
+    registry.codes
+    assert registry._refresher is None
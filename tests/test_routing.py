@@ -0,0 +1,103 @@
+# encoding: utf-8
+
+import asyncio
+import time
+
+import pytest
+from aiohttp import ClientConnectionError
+
+from coindesk import settings
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIHttpRequestError
+from coindesk.routing import Endpoint, RoutingTransport
+from coindesk.scheduler import PriorityScheduler
+from coindesk.specs import RequestSpec
+from coindesk.transport import RecordingTransport, TransportResponse
+
+from .fakes import FakeTransport, currentprice_data
+
+PRIMARY = 'https://primary.example.com/v1/bpi'
+SECONDARY = 'https://secondary.example.com/v1/bpi'
+
+
+class HangingTransport(FakeTransport):
+    """
+    Fake transport never answering requests to the primary endpoint.
+    """
+
+    async def request(self, session, url: str, options: dict):
+        if url.startswith(PRIMARY): await asyncio.sleep(60)
+        return await super().request(session, url, options)
+
+
+def execute(transport, deadline=None):
+    request = CoindeskAPIHttpRequest(retries=1, transport=transport)
+
+    async def run():
+        async with transport.session() as session:
+            return await request.execute(session, RequestSpec('currentprice'), deadline=deadline)
+    return asyncio.run(run())
+
+
+def test_endpoint_score():
+    endpoint = Endpoint(PRIMARY)
+    assert endpoint.score == 0.0
+    endpoint.record_failure()
+    assert endpoint.score == settings.ROUTING_FAILED_LATENCY * (1 + settings.ROUTING_ERROR_PENALTY * 0.2)
+    endpoint.record_success(0.1)
+    assert endpoint.latency == 0.1 and endpoint.failures == 0
+    assert endpoint.score == pytest.approx(0.1 * (1 + settings.ROUTING_ERROR_PENALTY * 0.16))
+
+
+def test_endpoint_down_after_max_failures():
+    endpoint = Endpoint(PRIMARY)
+    for _ in range(settings.ROUTING_MAX_FAILURES): endpoint.record_failure()
+    assert endpoint.down
+    endpoint.record_success(0.1)
+    assert not endpoint.down
+
+
+def test_route_rewrites_default_base_url():
+    transport = RoutingTransport([SECONDARY + '/'])
+    endpoint = transport.endpoints[0]
+    assert transport._route(f'{transport._default_base_url}/currentprice.json', endpoint) == \
+        f'{SECONDARY}/currentprice.json'
+    assert transport._route('https://other.example.com/x', endpoint) == 'https://other.example.com/x'
+
+
+def test_no_base_urls_raises():
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        RoutingTransport([])
+
+
+@pytest.mark.parametrize('failure', [ClientConnectionError('refused'), 503])
+def test_fails_over_to_next_endpoint(failure):
+    def handler(url):
+        if not url.startswith(PRIMARY): return currentprice_data()
+        if isinstance(failure, Exception): raise failure
+        return TransportResponse(url, failure, 'Service Unavailable')
+    inner = FakeTransport(handler)
+    transport = RoutingTransport([PRIMARY, SECONDARY], inner)
+    assert execute(transport)['bpi']['USD']['rate_float'] == 4000.0
+    assert [url.split('/')[2] for url in inner.urls] == ['primary.example.com', 'secondary.example.com']
+    # The failed endpoint now ranks behind the healthy one
+    assert [endpoint.base_url for endpoint in transport.endpoints] == [SECONDARY, PRIMARY]
+
+
+def test_deadline_split_between_endpoints():
+    inner = HangingTransport()
+    transport = RoutingTransport([PRIMARY, SECONDARY], inner)
+    start = time.monotonic()
+    assert execute(transport, deadline=1)['bpi']
+    # The primary gets half of the deadline, the secondary what is left
+    assert 0.4 < time.monotonic() - start < 1
+    primary = next(endpoint for endpoint in transport.endpoints if endpoint.base_url == PRIMARY)
+    assert primary.errors == 1
+
+
+def test_wrappers_delegate_enforces_timeout(tmp_path):
+    transport = RoutingTransport([PRIMARY], FakeTransport())
+    assert transport.enforces_timeout and not FakeTransport().enforces_timeout
+    assert RecordingTransport(str(tmp_path / 'responses'), transport).enforces_timeout
+    assert PriorityScheduler().transport('normal', transport).enforces_timeout
+    assert not PriorityScheduler().transport('normal', FakeTransport()).enforces_timeout
@@ -0,0 +1,131 @@
+# encoding: utf-8
+
+import asyncio
+
+import pytest
+
+from coindesk.backfill import BackfillRunner, plan_work_units
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.deadlines import Deadline, deadline_scope
+from coindesk.exceptions import CoindeskAPIHttpRequestError
+from coindesk.planner import HistoricalRequestPlanner
+from coindesk.proxy import CoindeskProxy
+from coindesk.scheduler import PriorityScheduler, ScheduledTransport, request_priority
+from coindesk.specs import RequestSpec
+
+from .fakes import FakeTransport, historical_data
+
+NO_RESERVED = {'interactive': 0}
+UNITS = plan_work_units(['USD', 'EUR'], ['USD'], '2019-01-01', '2019-01-20', 10)
+
+
+async def hold(scheduler, priority, started, seconds=0.01):
+    slot = await scheduler.acquire(priority)
+    started.append(priority)
+    await asyncio.sleep(seconds)
+    scheduler.release(slot)
+
+
+def test_weighted_shares_under_contention():
+    scheduler = PriorityScheduler(limit=4, reserved=NO_RESERVED)
+    started = []
+
+    async def run():
+        await asyncio.gather(*[hold(scheduler, 'bulk', started) for _ in range(8)],
+                             *[hold(scheduler, 'normal', started) for _ in range(8)])
+    asyncio.run(run())
+    # Bulk took every free slot first, queued normal requests then get four times its share
+    assert started[:4] == ['bulk'] * 4
+    assert started[4:12].count('normal') >= 6
+    stats = scheduler.get_stats()
+    assert stats['bulk']['completed'] == stats['normal']['completed'] == 8
+    assert stats['normal']['wait_max'] > 0 and stats['bulk']['inflight'] == 0
+
+
+def test_reserved_slots_kept_for_higher_priority():
+    scheduler = PriorityScheduler(limit=3)
+
+    async def run():
+        bulk = await scheduler.acquire('bulk')
+        waiter = asyncio.ensure_future(scheduler.acquire('bulk'))
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        interactive = await asyncio.wait_for(scheduler.acquire('interactive'), 1)
+        scheduler.release(bulk)
+        scheduler.release(await waiter)
+        scheduler.release(interactive)
+    asyncio.run(run())
+    assert scheduler.get_stats()['bulk']['completed'] == 2
+
+
+def test_full_queue_rejects():
+    scheduler = PriorityScheduler(limit=1, queue_limits={'normal': 1}, reserved=NO_RESERVED)
+
+    async def run():
+        slot = await scheduler.acquire()
+        waiter = asyncio.ensure_future(scheduler.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(CoindeskAPIHttpRequestError):
+            await scheduler.acquire()
+        scheduler.release(slot)
+        scheduler.release(await waiter)
+    asyncio.run(run())
+    assert scheduler.get_stats()['normal']['rejected'] == 1
+
+
+def test_deadline_expires_queued_request():
+    scheduler = PriorityScheduler(limit=1, reserved=NO_RESERVED)
+
+    async def run():
+        slot = await scheduler.acquire()
+        with deadline_scope(Deadline.within(0.05)), pytest.raises(CoindeskAPIHttpRequestError):
+            await scheduler.acquire()
+        scheduler.release(slot)
+    asyncio.run(run())
+    stats = scheduler.get_stats()['normal']
+    assert (stats['submitted'], stats['completed'], stats['expired']) == (2, 1, 1)
+    assert (stats['inflight'], stats['queued'], stats['wait_max']) == (0, 0, 0.0)
+
+
+def test_context_priority_and_invalid_priority():
+    scheduler = PriorityScheduler()
+    assert scheduler.get_class().name == 'normal'
+    with request_priority('interactive'):
+        assert scheduler.get_class().name == 'interactive'
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        scheduler.get_class('urgent')
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        PriorityScheduler(limit=2)
+
+
+def test_scheduled_request_runs_through_scheduler():
+    scheduler = PriorityScheduler()
+    inner = FakeTransport()
+    request = scheduler.request(CoindeskAPIHttpRequest(retries=2, timeout=3, transport=inner), 'interactive')
+    assert isinstance(request.transport, ScheduledTransport)
+    assert (request.retries, request.timeout) == (2, 3)
+
+    async def run():
+        async with request.transport.session() as session:
+            return await request.execute(session, RequestSpec('currentprice'))
+    assert asyncio.run(run())['bpi']
+    assert len(inner.urls) == 1
+    assert scheduler.get_stats()['interactive']['completed'] == 1
+
+
+def test_planner_and_proxy_use_scheduler():
+    scheduler = PriorityScheduler()
+    planner = HistoricalRequestPlanner(scheduler=scheduler)
+    proxy = CoindeskProxy(scheduler=scheduler, priority='normal', warmup=False)
+    assert isinstance(planner._request.transport, ScheduledTransport)
+    assert planner._request.transport._priority == 'bulk'
+    assert proxy._request.transport._priority == 'normal'
+
+
+def test_backfill_takes_scheduler_slots(tmp_path):
+    scheduler = PriorityScheduler()
+    runner = BackfillRunner(str(tmp_path), processes=2, retries=1, scheduler=scheduler,
+                            transport=FakeTransport(historical_data))
+    assert runner.run(UNITS).done == 4
+    stats = scheduler.get_stats()['bulk']
+    assert (stats['submitted'], stats['completed'], stats['inflight']) == (4, 4, 0)
@@ -0,0 +1,69 @@
+# encoding: utf-8
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from coindesk.exceptions import CoindeskAPISnapshotError
+from coindesk.shared import SHARED_SEQUENCE, SHARED_SEQUENCE_OFFSET, SharedPriceReader, SharedPriceWriter
+
+from .fakes import currentprice_data
+
+
+def read_rate(path: str, currency: str):
+    with SharedPriceReader(path) as reader:
+        return reader.get(currency).rate_float
+
+
+@pytest.fixture
+def segment(tmp_path):
+    return str(tmp_path / 'prices.shm')
+
+
+def test_publish_and_read(segment):
+    with SharedPriceWriter(segment, slots=4) as writer, SharedPriceReader(segment) as reader:
+        writer.publish(currentprice_data({'USD': 4000.0, 'EUR': 3200.0}))
+        quote = reader.get('EUR')
+        assert (quote.currency, quote.rate_float, quote.updatedISO) == ('EUR', 3200.0, '2019-01-01T00:00:00+00:00')
+        assert reader.quotes() is reader.quotes()
+        version = writer.publish(currentprice_data({'USD': 4100.0}))
+        assert reader.version == version
+        assert {code: quote.rate_float for code, quote in reader.quotes().items()} == {'USD': 4100.0, 'EUR': 3200.0}
+
+
+def test_read_from_other_process(segment):
+    with SharedPriceWriter(segment) as writer:
+        writer.publish(currentprice_data({'GBP': 3000.0}))
+        with ProcessPoolExecutor(1) as executor:
+            assert executor.submit(read_rate, segment, 'GBP').result() == 3000.0
+
+
+def test_new_writer_keeps_segment_size_and_version(segment):
+    with SharedPriceWriter(segment, slots=8) as writer:
+        version = writer.publish(currentprice_data())
+    size = os.path.getsize(segment)
+    with SharedPriceWriter(segment, slots=2), SharedPriceReader(segment) as reader:
+        assert os.path.getsize(segment) == size
+        assert reader.version > version
+        assert reader.quotes() == {}
+
+
+def test_too_many_currencies_raises(segment):
+    with SharedPriceWriter(segment, slots=1) as writer:
+        with pytest.raises(CoindeskAPISnapshotError):
+            writer.publish(currentprice_data({'USD': 4000.0, 'EUR': 3200.0}))
+
+
+def test_reader_gives_up_on_write_in_progress(segment):
+    with SharedPriceWriter(segment) as writer, SharedPriceReader(segment) as reader:
+        SHARED_SEQUENCE.pack_into(writer._mmap, SHARED_SEQUENCE_OFFSET, 7)
+        with pytest.raises(CoindeskAPISnapshotError):
+            reader.quotes(retries=3)
+
+
+def test_reader_rejects_unknown_segment(segment):
+    with open(segment, 'wb') as outfile:
+        outfile.write(bytes(64))
+    with pytest.raises(CoindeskAPISnapshotError):
+        SharedPriceReader(segment)
@@ -0,0 +1,51 @@
+# encoding: utf-8
+
+from datetime import date
+
+import pytest
+
+from coindesk.exceptions import CoindeskAPISnapshotError
+from coindesk.snapshot import PriceSnapshot, PriceSnapshotWriter, from_epoch_day, to_epoch_day
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    writer = PriceSnapshotWriter('USD', 'EUR')
+    writer.add_response({'bpi': {'2019-01-03': 3.5, '2019-01-01': 1.5, '2019-01-02': 2.5}})
+    return writer.write(str(tmp_path / 'usd-eur.snap'))
+
+
+def test_epoch_day_round_trip():
+    assert to_epoch_day('1970-01-02') == 1
+    assert from_epoch_day(to_epoch_day(date(2019, 1, 1))) == date(2019, 1, 1)
+
+
+def test_snapshot_round_trip(snapshot_path):
+    with PriceSnapshot.open(snapshot_path) as snapshot:
+        assert (snapshot.index, snapshot.currency, len(snapshot)) == ('USD', 'EUR', 3)
+        assert (snapshot.start, snapshot.end) == (date(2019, 1, 1), date(2019, 1, 3))
+        assert list(snapshot.closes) == [1.5, 2.5, 3.5]
+        assert snapshot.to_bpi() == {'2019-01-01': 1.5, '2019-01-02': 2.5, '2019-01-03': 3.5}
+
+
+def test_snapshot_lookup_and_slice(snapshot_path):
+    with PriceSnapshot.open(snapshot_path) as snapshot:
+        assert snapshot.get('2019-01-02') == 2.5
+        assert snapshot.get('2018-12-31', default=0.0) == 0.0
+        days, closes = snapshot.slice('2019-01-02', None)
+        assert [from_epoch_day(day) for day in days] == [date(2019, 1, 2), date(2019, 1, 3)]
+        assert list(closes) == [2.5, 3.5]
+
+
+def test_views_outlive_close(snapshot_path):
+    snapshot = PriceSnapshot.open(snapshot_path)
+    closes = snapshot.closes
+    snapshot.close()
+    assert list(closes) == [1.5, 2.5, 3.5]
+
+
+def test_invalid_snapshot_raises(tmp_path):
+    path = tmp_path / 'bad.snap'
+    path.write_bytes(b'not a snapshot file at all, just some bytes' * 2)
+    with pytest.raises(CoindeskAPISnapshotError):
+        PriceSnapshot.open(str(path))
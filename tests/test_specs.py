@@ -0,0 +1,54 @@
+# encoding: utf-8
+
+import pytest
+
+from coindesk import settings
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIClientError
+from coindesk.specs import RequestSpec
+
+from .fakes import FakeTransport, currentprice_data, historical_data
+
+
+def test_specs_are_hashable_values():
+    first = RequestSpec('historical', index='USD', start='2019-01-01', end='2019-01-05')
+    second = RequestSpec.from_params('historical', {'start': '2019-01-01', 'end': '2019-01-05', 'index': 'USD'})
+    assert first == second and hash(first) == hash(second)
+    assert len({first, second, RequestSpec('currentprice')}) == 2
+    with pytest.raises(AttributeError):
+        first.start = '2019-01-02'
+
+
+@pytest.mark.parametrize('data_type, params', [
+    ('prices', {}),
+    ('currentprice', {'currency': 'XXX'}),
+    ('historical', {'start': '2019-13-01', 'end': '2019-12-31'}),
+    ('historical', {'color': 'red'}),
+])
+def test_invalid_specs_raise(data_type, params):
+    with pytest.raises(CoindeskAPIClientError):
+        RequestSpec.from_params(data_type, params)
+
+
+def test_spec_urls():
+    assert RequestSpec('currentprice').url == 'https://api.coindesk.com/v1/bpi/currentprice.json'
+    assert RequestSpec('currentprice', 'EUR').url == 'https://api.coindesk.com/v1/bpi/currentprice/EUR.json'
+    assert RequestSpec('historical', start='2019-01-01', end='2019-01-05').url == \
+        'https://api.coindesk.com/v1/bpi/historical/close.json?start=2019-01-01&end=2019-01-05'
+
+
+def test_spec_url_follows_api_settings(monkeypatch):
+    spec = RequestSpec('currentprice')
+    spec.url
+    monkeypatch.setattr(settings, 'API_HOST', 'coindesk.example.com')
+    assert spec.url == 'https://coindesk.example.com/v1/bpi/currentprice.json'
+
+
+def test_execute_many_fetches_equal_specs_once():
+    transport = FakeTransport(lambda url: historical_data(url) if 'historical' in url else currentprice_data())
+    request = CoindeskAPIHttpRequest(retries=1, transport=transport)
+    historical = RequestSpec('historical', start='2019-01-01', end='2019-01-05')
+    results = request.execute_many([historical, RequestSpec('currentprice'), historical])
+    assert results[0] is results[2]
+    assert results[0]['bpi'] == {'2019-01-01': 1.0, '2019-01-05': 2.0}
+    assert len(transport.urls) == 2
@@ -0,0 +1,60 @@
+# encoding: utf-8
+
+import asyncio
+
+import pytest
+
+from coindesk.client import CoindeskAPIHttpRequest
+from coindesk.exceptions import CoindeskAPIHttpRequestError
+from coindesk.specs import RequestSpec
+from coindesk.transport import BaseTransport, RecordingTransport, ReplayTransport
+
+from .fakes import FakeTransport, currentprice_data
+
+
+def execute(request, spec):
+    async def run():
+        async with request.transport.session() as session:
+            return await request.execute(session, spec)
+    return asyncio.run(run())
+
+
+def test_base_transport_is_abstract():
+    with pytest.raises(TypeError):
+        BaseTransport()
+
+
+def test_record_then_replay(tmp_path):
+    cassette = str(tmp_path / 'cassette.jsonl.gz')
+    spec = RequestSpec('currentprice', 'EUR')
+    recorder = RecordingTransport(cassette, FakeTransport(lambda url: currentprice_data({'EUR': 3200.0})))
+    recorded = execute(CoindeskAPIHttpRequest(transport=recorder), spec)
+    assert recorder.recorded == 1
+
+    replay = ReplayTransport(cassette)
+    replayed = execute(CoindeskAPIHttpRequest(transport=replay), spec)
+    assert replayed == recorded
+    assert replay.replayed == 1
+
+
+def test_replay_matches_urls_in_any_query_order(tmp_path):
+    cassette = str(tmp_path / 'cassette.jsonl.gz')
+    recorder = RecordingTransport(cassette, FakeTransport())
+    asyncio.run(recorder.request(None, 'https://api.coindesk.com/v1/bpi/x.json?b=2&a=1', {}))
+    replay = ReplayTransport(cassette)
+    response = asyncio.run(replay.request(None, 'https://api.coindesk.com/v1/bpi/x.json?a=1&b=2', {}))
+    assert response.status == 200
+
+
+def test_replay_exhausted_unless_looping(tmp_path):
+    cassette = str(tmp_path / 'cassette.jsonl.gz')
+    url = 'https://api.coindesk.com/v1/bpi/currentprice.json'
+    asyncio.run(RecordingTransport(cassette, FakeTransport()).request(None, url, {}))
+    replay = ReplayTransport(cassette)
+    asyncio.run(replay.request(None, url, {}))
+    with pytest.raises(CoindeskAPIHttpRequestError):
+        asyncio.run(replay.request(None, url, {}))
+    looping = ReplayTransport(cassette, loop=True)
+    for _ in range(3):
+        asyncio.run(looping.request(None, url, {}))
+    assert looping.replayed == 3
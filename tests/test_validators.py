@@ -0,0 +1,65 @@
+# encoding: utf-8
+
+import pytest
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
+
+from coindesk import schemas, validators
+
+from .fakes import currentprice_data
+
+SCHEMA = {
+    'type': 'object',
+    'properties': {
+        'name': {'type': 'string', 'description': 'Name.'},
+        'count': {'type': ['integer', 'null']},
+        'nested': {'type': 'object', 'properties': {'flag': {'type': 'boolean'}}, 'required': ['flag']},
+        'ratio': {'type': 'number'},
+    },
+    'required': ['name'],
+}
+
+INSTANCES = [
+    {'name': 'a'}, {'name': 'a', 'count': 3}, {'name': 'a', 'count': 3.0}, {'name': 'a', 'count': None},
+    {'name': 'a', 'count': 3.5}, {'name': 'a', 'count': True}, {'name': 1}, {}, [], 'name',
+    {'name': 'a', 'nested': {'flag': False}}, {'name': 'a', 'nested': {}}, {'name': 'a', 'nested': 1},
+    {'name': 'a', 'ratio': 1}, {'name': 'a', 'ratio': False}, {'name': 'a', 'extra': object()},
+]
+
+
+def is_valid(instance, schema):
+    return validator_for(schema)(schema).is_valid(instance)
+
+
+@pytest.mark.parametrize('instance', INSTANCES)
+def test_compiled_validator_matches_jsonschema(instance):
+    assert validators.compile_schema(SCHEMA)(instance) == is_valid(instance, SCHEMA)
+
+
+@pytest.mark.parametrize('schema', [schemas.CURRENTPRICE_SCHEMA, schemas.CURRENTPRICE_CODE_SCHEMA,
+                                    schemas.HISTORICAL_SCHEMA])
+def test_packaged_schemas_compile(schema):
+    check = validators.compile_schema(schema)
+    assert check is not None
+    data = currentprice_data()
+    for instance in (data, dict(data, bpi=[]), {'time': {}}, dict(data, disclaimer=None)):
+        assert check(instance) == is_valid(instance, schema)
+
+
+def test_unsupported_keywords_fall_back_to_jsonschema():
+    schema = {'type': 'object', 'properties': {'rate': {'type': 'number', 'minimum': 0}}}
+    assert validators.compile_schema(schema) is None
+    validators.validate({'rate': 1}, schema)
+    with pytest.raises(ValidationError):
+        validators.validate({'rate': -1}, schema)
+
+
+def test_invalid_instance_raises_jsonschema_error():
+    with pytest.raises(ValidationError) as error:
+        validators.validate({'name': 1}, SCHEMA)
+    assert error.value.message == "1 is not of type 'string'"
+
+
+def test_compiled_validator_is_cached():
+    schema = dict(SCHEMA)
+    assert validators.get_compiled_validator(schema) is validators.get_compiled_validator(schema)
@@ -0,0 +1,53 @@
+# encoding: utf-8
+
+import asyncio
+from types import SimpleNamespace
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+
+from coindesk import settings, warmup
+from coindesk.client import CoindeskAPIHttpRequest
+
+from .fakes import FakeTransport
+
+
+def test_warmup_without_request_skips_connections():
+    report = warmup.warmup(data_types=['currentprice', 'historical'], currencies=['EUR', 'GBP'])
+    assert list(report) == ['registry', 'validators', 'connections']
+    assert report['registry'].warmed > 0
+    # Default currentprice, currency currentprice and historical schemas
+    assert report['validators'].warmed == 3
+    assert report['connections'] == (report['connections'][0], 0, None)
+
+
+def test_warmup_keeps_step_errors():
+    report = warmup.warmup(data_types=['currentprice'], currencies=['XXX'])
+    assert report['validators'].warmed == 0
+    assert report['validators'].error is not None
+
+
+def test_warmup_skips_non_http_transports():
+    request = CoindeskAPIHttpRequest(transport=FakeTransport())
+    assert warmup.warmup(request, connections=2, data_types=[])['connections'].warmed == 0
+
+
+def test_open_pooled_connections(monkeypatch):
+    requests = []
+
+    async def handler(request):
+        peer = request.transport.get_extra_info('peername')
+        requests.append((request.method, request.headers.get('Accept-Language'), peer))
+        return web.Response()
+
+    async def run():
+        app = web.Application()
+        app.router.add_route('*', '/{tail:.*}', handler)
+        async with TestServer(app) as server, ClientSession() as session:
+            url = str(server.make_url('/'))
+            monkeypatch.setattr(warmup, 'RequestSpec', lambda data_type: SimpleNamespace(url=url))
+            return await warmup.warmup_async(session, connections=3, data_types=[])
+    report = asyncio.run(run())
+    assert report['connections'].warmed == 3
+    assert len({peer for *_, peer in requests}) == 3
+    assert {(method, language) for method, language, _ in requests} == {('HEAD', settings.REQUEST_HEADERS['Accept-Language'])}